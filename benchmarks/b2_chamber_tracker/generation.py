@@ -1,4 +1,5 @@
 import os
+from Configurables import Gaussino
 from GaudiKernel import SystemOfUnits as units
 from TargetTracker.tracker_geometry import tracker_default_options
 from TargetTracker.tracker_generation import set_particle_gun
@@ -22,3 +23,8 @@ set_particle_gun(
     particle_energy=particle_energy,
     particles_per_event=particles_per_event,
 )
+
+# Repeated runs of one configuration get distinct random streams through the
+# run number (exported by the analysis pipeline for each repeat).
+if "RUN_NUMBER" in os.environ:
+    Gaussino().RunNumber = int(os.environ["RUN_NUMBER"])
@@ -1,6 +1,6 @@
 import os
 
-from Configurables import GiGaMT
+from Configurables import GiGaMT, Gaussino
 
 from CaloChallenge.cc_geometry import planar_detector_SiW_options
 from CaloChallenge.cc_generation import (
@@ -40,3 +40,8 @@ set_particle_gun_momentum_range(
 # Fix for truth tracking
 
 GiGaMT().HepMCConverter.CheckParticle = False
+
+# Repeated runs of one configuration get distinct random streams through the
+# run number (exported by the analysis pipeline for each repeat).
+if "RUN_NUMBER" in os.environ:
+    Gaussino().RunNumber = int(os.environ["RUN_NUMBER"])
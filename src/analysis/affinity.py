@@ -0,0 +1,191 @@
+"""
+CPU affinity for simulation runs: NUMA-aware CPU sets per run.
+
+The topology comes from sysfs (NUMA nodes, physical cores and their SMT
+siblings), restricted to the CPUs this process may use. Each run gets a CPU
+set sized to its thread count, packed into a single NUMA node when one has
+room, and spread over the emptiest nodes otherwise.
+
+SMT policies:
+- spread: one hardware thread per physical core first, siblings only once
+  every core of the node is in use.
+- pack: fill both siblings of a core before moving to the next core.
+- avoid: never use the second sibling of a core (fewer usable CPUs).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import threading
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SYS_DEVICES = Path("/sys/devices/system")
+
+PIN_MODES = ("off", "numa")
+SMT_POLICIES = ("spread", "pack", "avoid")
+
+
+@dataclass(frozen=True)
+class PinningPolicy:
+    mode: str = "off"
+    smt: str = "spread"
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+
+@dataclass(frozen=True)
+class CpuInfo:
+    cpu: int
+    node: int
+    # Physical core, unique across packages.
+    core: tuple[int, int]
+    # 0 for the first hardware thread of a core, 1 for its SMT sibling, ...
+    thread: int
+
+
+def parse_cpu_list(text: str) -> list[int]:
+    """Parse a kernel CPU list such as "0-3,8,10-11"."""
+    cpus: list[int] = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        cpus.extend(range(int(lo), int(hi or lo) + 1))
+    return cpus
+
+
+def format_cpu_list(cpus: Iterable[int]) -> str:
+    """Inverse of parse_cpu_list, with contiguous CPUs folded into ranges."""
+    ranges: list[str] = []
+    ordered = sorted(set(cpus))
+    i = 0
+    while i < len(ordered):
+        j = i
+        while j + 1 < len(ordered) and ordered[j + 1] == ordered[j] + 1:
+            j += 1
+        ranges.append(str(ordered[i]) if i == j else f"{ordered[i]}-{ordered[j]}")
+        i = j + 1
+    return ",".join(ranges)
+
+
+def _read_int(path: Path, default: int) -> int:
+    try:
+        return int(path.read_text().strip())
+    except (OSError, ValueError):
+        return default
+
+
+def read_topology(
+    sys_root: Path = SYS_DEVICES, *, allowed: Iterable[int] | None = None
+) -> list[CpuInfo]:
+    """CPUs usable by this process with their NUMA node, core and SMT rank."""
+    if allowed is None:
+        allowed = os.sched_getaffinity(0)
+    allowed = set(allowed)
+
+    node_of: dict[int, int] = {}
+    for node_dir in sorted((sys_root / "node").glob("node[0-9]*")):
+        try:
+            cpus = parse_cpu_list((node_dir / "cpulist").read_text())
+        except (OSError, ValueError):
+            continue
+        for cpu in cpus:
+            node_of[cpu] = int(node_dir.name[4:])
+
+    siblings: dict[tuple[int, int], list[int]] = {}
+    for cpu in sorted(allowed):
+        topo = sys_root / "cpu" / f"cpu{cpu}" / "topology"
+        core = (_read_int(topo / "physical_package_id", 0), _read_int(topo / "core_id", cpu))
+        siblings.setdefault(core, []).append(cpu)
+
+    infos = [
+        CpuInfo(cpu=cpu, node=node_of.get(cpu, 0), core=core, thread=rank)
+        for core, cpus in siblings.items()
+        for rank, cpu in enumerate(cpus)
+    ]
+    return sorted(infos, key=lambda info: info.cpu)
+
+
+class CpuAllocator:
+    """Hands out disjoint CPU sets to concurrent runs (thread-safe)."""
+
+    def __init__(self, topology: Sequence[CpuInfo], *, smt: str = "spread") -> None:
+        if smt not in SMT_POLICIES:
+            raise ValueError(f"smt policy must be one of {SMT_POLICIES}, got {smt!r}")
+        if smt == "avoid":
+            topology = [info for info in topology if info.thread == 0]
+        if smt == "pack":
+            preference = sorted(topology, key=lambda info: (info.core, info.thread))
+        else:
+            preference = sorted(topology, key=lambda info: (info.thread, info.core))
+
+        # Per node, the CPUs in the order they should be handed out.
+        self._order: dict[int, list[int]] = {}
+        for info in preference:
+            self._order.setdefault(info.node, []).append(info.cpu)
+        self._free = {cpu for cpus in self._order.values() for cpu in cpus}
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return sum(len(cpus) for cpus in self._order.values())
+
+    def _free_on(self, node: int) -> list[int]:
+        return [cpu for cpu in self._order[node] if cpu in self._free]
+
+    def acquire(self, count: int) -> list[int]:
+        """Reserve `count` CPUs, within one NUMA node whenever one has room.
+
+        Among the nodes that fit, the one with the fewest free CPUs is used, so
+        larger holes stay available for larger runs. Asking for more CPUs than
+        are free returns what is left.
+        """
+        with self._lock:
+            free = {node: self._free_on(node) for node in self._order}
+            fitting = [node for node, cpus in free.items() if len(cpus) >= count]
+            if fitting:
+                node = min(fitting, key=lambda n: (len(free[n]), n))
+                chosen = free[node][:count]
+            else:
+                chosen = []
+                for node in sorted(free, key=lambda n: (-len(free[n]), n)):
+                    chosen.extend(free[node][: count - len(chosen)])
+                if len(chosen) < count:
+                    logger.warning("Requested %s CPUs but only %s are free", count, len(chosen))
+            self._free.difference_update(chosen)
+            return sorted(chosen)
+
+    def release(self, cpus: Iterable[int]) -> None:
+        with self._lock:
+            self._free.update(cpus)
+
+    def nodes_of(self, cpus: Iterable[int]) -> list[int]:
+        wanted = set(cpus)
+        return sorted(node for node, owned in self._order.items() if wanted.intersection(owned))
+
+
+@contextlib.contextmanager
+def pinned_thread(cpus: Sequence[int]) -> Iterator[None]:
+    """Temporarily restrict the calling thread to `cpus`.
+
+    On Linux the affinity set with pid 0 only applies to the calling thread and
+    is inherited by processes it forks, so a child started inside this block is
+    pinned from its first instruction without a preexec hook.
+    """
+    if not cpus:
+        yield
+        return
+    previous = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, cpus)
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
@@ -0,0 +1,112 @@
+"""
+Event-count calibration towards a target event-loop duration.
+
+With a fixed NUMBER_OF_EVENTS, light combinations finish in seconds (dominated
+by initialisation) while heavy ones take hours. Calibration runs a short probe
+of every (simulation file, parameters) combination, measures the time per
+event and sets NUMBER_OF_EVENTS so that the event loop lasts about
+`target_seconds`, within [min_events, max_events].
+
+Configured per benchmark in params.yaml and enabled with `simulate --calibrate-events`:
+
+    simulate:
+      calibrate_events:
+        target_seconds: 600
+        probe_events: 20
+        min_events: 100
+        max_events: 100000
+
+Probe logs and the chosen counts live in <run_dir>/calibration/ and are reused
+by later invocations on the same run dir (unless everything is rerun). Failed
+probes are probed again with `--rerun-failed`, like failed runs.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+EVENTS_PARAMETER = "NUMBER_OF_EVENTS"
+
+CALIBRATION_DIR = "calibration"
+CALIBRATION_NAME = "calibration.json"
+
+
+@dataclass(frozen=True)
+class EventCalibration:
+    target_seconds: float = 600.0
+    probe_events: int = 20
+    min_events: int = 100
+    max_events: int = 100_000
+
+
+def parse_event_calibration(value: Any) -> EventCalibration:
+    """Build an EventCalibration from `simulate.calibrate_events` in params.yaml."""
+    if value is None:
+        return EventCalibration()
+    if not isinstance(value, dict):
+        raise TypeError("params.yaml: simulate.calibrate_events must be a mapping")
+    defaults = EventCalibration()
+    calibration = EventCalibration(
+        target_seconds=float(value.get("target_seconds", defaults.target_seconds)),
+        probe_events=int(value.get("probe_events", defaults.probe_events)),
+        min_events=int(value.get("min_events", defaults.min_events)),
+        max_events=int(value.get("max_events", defaults.max_events)),
+    )
+    if calibration.target_seconds <= 0 or calibration.probe_events < 1:
+        raise ValueError(
+            "params.yaml: simulate.calibrate_events needs target_seconds > 0 and probe_events >= 1"
+        )
+    if not 1 <= calibration.min_events <= calibration.max_events:
+        raise ValueError("params.yaml: simulate.calibrate_events needs 1 <= min_events <= max_events")
+    return calibration
+
+
+def seconds_per_event(
+    performance: dict[str, float], *, events: int, execution_time: float | None = None
+) -> float | None:
+    """Event-loop time per event of a probe run.
+
+    Prefers the measured event loop time, which excludes initialisation; the
+    whole wall time is only a (pessimistic) fallback.
+    """
+    loop_ns = performance.get("event_loop_time")
+    if loop_ns is not None and loop_ns > 0:
+        return loop_ns * 1e-9 / events
+    per_event = performance.get("time_per_event")
+    if per_event is not None and per_event > 0:
+        return per_event
+    if execution_time is not None and execution_time > 0:
+        return execution_time / events
+    return None
+
+
+def calibrated_events(per_event: float, calibration: EventCalibration) -> int:
+    events = math.ceil(calibration.target_seconds / per_event)
+    return max(calibration.min_events, min(calibration.max_events, events))
+
+
+def calibration_key(simulation_file: str | Path, parameters: dict[str, Any]) -> str:
+    """Identity of a calibrated combination: simulation file and parameters other than the event count."""
+    others = {k: v for k, v in parameters.items() if k != EVENTS_PARAMETER}
+    return json.dumps([Path(simulation_file).name, others], sort_keys=True)
+
+
+def load_calibration(run_dir: Path) -> dict[str, dict[str, Any]]:
+    path = run_dir / CALIBRATION_DIR / CALIBRATION_NAME
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_calibration(run_dir: Path, results: dict[str, dict[str, Any]]) -> None:
+    path = run_dir / CALIBRATION_DIR / CALIBRATION_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(results, indent=2, sort_keys=True))
+    tmp.replace(path)
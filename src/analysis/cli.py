@@ -3,17 +3,36 @@ from __future__ import annotations
 import argparse
 import logging
 import os
+from collections.abc import Sequence
 from dataclasses import dataclass
 from pathlib import Path
 
+from analysis.affinity import PIN_MODES, SMT_POLICIES, PinningPolicy
+from analysis.calibration import parse_event_calibration
+from analysis.crossover import parse_crossover_search
 from analysis.git_tools import get_commit
+from analysis.jobqueue import QUEUE_NAME, JobQueue, spawn_workers
+from analysis.limits import parse_run_limits
+from analysis.logio import LOG_COMPRESSIONS
 from analysis.manifest import ManifestOptions, write_run_manifest
+from analysis.noise import NoiseProbe, parse_noise_probe
+from analysis.ordering import ORDER_POLICIES
+from analysis.pagecache import DEFAULT_THREADS
+from analysis.pairing import PAIR_ORDERS, parse_pair_order
+from analysis.preflight import parse_preflight
+from analysis.repeats import parse_repeat_policy
+from analysis.resultcache import ResultCache, stack_identity
+from analysis.profiler import PROFILE_TOOLS, PROFILES_DIR, collect_profiles, parse_profile_options
 from analysis.params import LoadedParams, load_params
 from analysis.run_id import compute_run_ids
 from analysis.paths import RunPaths
 from analysis.extract import extract_run
-from analysis.report import generate_performance_report
-from analysis.simulate import SimulateConfig, run_simulations
+from analysis.report import NODE_NOISE_MODES, generate_performance_report, generate_profile_report
+from analysis.runenv import LAUNCH_MODES
+from analysis.scaling import extract_scaling, parse_scaling_study
+from analysis.simulate import SWEEP_MODES, RunOptions, Scheduling, SimulateConfig, run_simulations
+from analysis.watchdog import parse_watchdog_limits
+from analysis.wrappers import parse_wrapper
 
 
 def _setup_logging(verbosity: int) -> None:
@@ -120,12 +139,19 @@ def cmd_extract(args: argparse.Namespace, ctx: CliContext) -> int:
         paths = RunPaths(benchmark=bench, run_id=ids.run_id, repo_root=ctx.repo_root)
 
         # Performance always
-        extract_run(
+        performance_csv = extract_run(
             benchmark=bench,
             run_dir=paths.run_dir,
             out_dir=paths.derived_dir,
             extract_type="performance",
         )
+        # Speedup/efficiency/knee when the run was a scaling study.
+        extract_scaling(
+            run_dir=paths.run_dir,
+            performance_csv=performance_csv,
+            out_dir=paths.derived_dir,
+            parameters=list(cfg.get("parameters") or {}),
+        )
 
         # Physics if requested
         if not args.no_physics:
@@ -139,6 +165,9 @@ def cmd_extract(args: argparse.Namespace, ctx: CliContext) -> int:
             except Exception:
                 logger.exception("Physics extraction failed for benchmark=%s", bench)
 
+        # Folded profiles, for the report's differential flamegraphs.
+        collect_profiles(run_dir=paths.run_dir, out_dir=paths.derived_dir)
+
     return 0
 
 
@@ -179,6 +208,11 @@ def cmd_simulate(args: argparse.Namespace, ctx: CliContext) -> int:
             "(check --executable, GAUSSINO_EXECUTABLE, or params.yaml gaussino_executable)"
         )
 
+    result_cache: ResultCache | None = None
+    if not args.no_result_cache:
+        cache_root = Path(args.result_cache) if args.result_cache else ctx.repo_root / ".cache" / "results"
+        result_cache = ResultCache(cache_root, stack=stack_identity(_stack_root(ctx.repo_root)))
+
     for bench in ctx.params.benchmarks_selected:
         cfg = ctx.params.get_benchmark(bench)
         ids = compute_run_ids(benchmark=bench, repo_sha=ctx.commit, params_for_hash=cfg)
@@ -189,6 +223,9 @@ def cmd_simulate(args: argparse.Namespace, ctx: CliContext) -> int:
         parameters = cfg.get("parameters", {})
         if not isinstance(parameters, dict):
             raise TypeError(f"params.yaml: benchmarks.{bench}.parameters must be a mapping")
+        settings = cfg.get("simulate") or {}
+        if not isinstance(settings, dict):
+            raise TypeError(f"params.yaml: benchmarks.{bench}.simulate must be a mapping")
 
         sim_cfg = SimulateConfig(
             benchmark=bench,
@@ -197,6 +234,46 @@ def cmd_simulate(args: argparse.Namespace, ctx: CliContext) -> int:
             simulation_files=simulation_files,
             run_dir=paths.run_dir,
             parameters=parameters,
+            scheduling=Scheduling(
+                parallel=args.parallel,
+                core_budget=args.core_budget,
+                order=args.order,
+                pinning=PinningPolicy(mode=args.pin_cpus, smt=args.smt),
+                workers=args.workers,
+                detach=args.detach,
+            ),
+            rerun=args.rerun,
+            repeats=parse_repeat_policy(settings.get("repeats")),
+            crossover=(
+                parse_crossover_search(settings.get("crossover"), parameters=parameters)
+                if args.mode == "crossover"
+                else None
+            ),
+            scaling=parse_scaling_study(settings.get("scaling")) if args.mode == "scaling" else None,
+            calibration=(
+                parse_event_calibration(settings.get("calibrate_events"))
+                if args.calibrate_events
+                else None
+            ),
+            run_options=RunOptions(
+                sample_interval=args.sample_resources,
+                stream_extract=("performance",) if args.stream_logs else (),
+                scratch_root=Path(args.scratch_root) if args.scratch_root else None,
+                watchdog=parse_watchdog_limits(
+                    settings, timeout=args.timeout, stall_timeout=args.stall_timeout
+                ),
+                launch=args.launch,
+                wrapper=parse_wrapper(settings.get("wrapper")),
+                profile=parse_profile_options(settings.get("profile"), tool=args.profile),
+                limits=parse_run_limits(settings.get("limits")),
+                log_compression=args.compress_logs,
+                env_cache_dir=ctx.repo_root / ".cache" / "gaussino-env",
+            ),
+            preflight=None if args.no_preflight else parse_preflight(settings.get("preflight")),
+            warm_cache=args.warm_cache,
+            result_cache=result_cache,
+            noise_probe=parse_noise_probe(settings.get("noise_probe")) if args.noise_probe else None,
+            pair_order=parse_pair_order(settings.get("pair_order"), mode=args.pair_order),
         )
 
         run_simulations(cfg=sim_cfg)
@@ -204,6 +281,47 @@ def cmd_simulate(args: argparse.Namespace, ctx: CliContext) -> int:
     return 0
 
 
+def _open_queue(ctx: CliContext, bench: str) -> tuple[Path, JobQueue | None]:
+    cfg = ctx.params.get_benchmark(bench)
+    ids = compute_run_ids(benchmark=bench, repo_sha=ctx.commit, params_for_hash=cfg)
+    run_dir = RunPaths(benchmark=bench, run_id=ids.run_id, repo_root=ctx.repo_root).run_dir
+    queue_path = run_dir / QUEUE_NAME
+    return run_dir, JobQueue(queue_path) if queue_path.exists() else None
+
+
+def cmd_status(args: argparse.Namespace, ctx: CliContext) -> int:
+    for bench in ctx.params.benchmarks_selected:
+        run_dir, queue = _open_queue(ctx, bench)
+        if queue is None:
+            print(f"{bench}: no job queue in {run_dir}")
+            continue
+        queue.requeue_orphans()
+        counts = queue.counts()
+        print(
+            f"{bench}: " + " ".join(f"{state}={n}" for state, n in counts.items())
+            + f" workers={len(queue.live_workers())}/{queue.setting('workers', 0)}"
+        )
+        queue.close()
+    return 0
+
+
+def cmd_workers(args: argparse.Namespace, ctx: CliContext) -> int:
+    for bench in ctx.params.benchmarks_selected:
+        run_dir, queue = _open_queue(ctx, bench)
+        if queue is None:
+            raise FileNotFoundError(f"No job queue in {run_dir}; start the sweep with `simulate --workers N`")
+        target = int(queue.setting("workers", 0))
+        if args.add:
+            queue.set_setting("workers", target + args.add)
+            spawn_workers(run_dir, args.add)
+        if args.drain:
+            drained = queue.request_drain(args.drain)
+            queue.set_setting("workers", max(0, int(queue.setting("workers", 0)) - drained))
+            logger.info("benchmark=%s: %s workers will exit after their current job", bench, drained)
+        queue.close()
+    return 0
+
+
 def cmd_report(args: argparse.Namespace, ctx: CliContext) -> int:
     for bench in ctx.params.benchmarks_selected:
         cfg = ctx.params.get_benchmark(bench)
@@ -214,12 +332,21 @@ def cmd_report(args: argparse.Namespace, ctx: CliContext) -> int:
         if not perf_csv.exists():
             raise FileNotFoundError(f"Missing performance-results.csv: {perf_csv}")
 
-        generate_performance_report(performance_csv=perf_csv, out_dir=paths.reports_dir)
+        settings = cfg.get("simulate") or {}
+        probe = parse_noise_probe(settings.get("noise_probe")) if isinstance(settings, dict) else None
+        generate_performance_report(
+            performance_csv=perf_csv,
+            out_dir=paths.reports_dir,
+            node_noise=args.node_noise,
+            noise_threshold=(probe or NoiseProbe()).threshold,
+            parameters=list(cfg.get("parameters") or {}),
+        )
+        generate_profile_report(profiles_dir=paths.derived_dir / PROFILES_DIR, out_dir=paths.reports_dir)
 
     return 0
 
 
-def main() -> int:
+def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser(prog="analysis")
     parser.add_argument("-v", "--verbose", action="count", default=0)
 
@@ -251,14 +378,203 @@ def main() -> int:
     p_sim.add_argument("--params", default="params.yaml")
     p_sim.add_argument("--repo-root", default=str(_repo_root_default()))
     p_sim.add_argument("--executable", default="")
+    p_sim.add_argument(
+        "--parallel",
+        action="store_true",
+        help="Run simulations concurrently within a core budget",
+    )
+    p_sim.add_argument(
+        "--core-budget",
+        type=int,
+        default=None,
+        help="Cores available to --parallel (default: CPUs visible to this process)",
+    )
+    rerun = p_sim.add_mutually_exclusive_group()
+    rerun.add_argument(
+        "--force",
+        dest="rerun",
+        action="store_const",
+        const="all",
+        help="Rerun every simulation, ignoring results already in the run dir",
+    )
+    rerun.add_argument(
+        "--rerun-failed",
+        dest="rerun",
+        action="store_const",
+        const="failed",
+        help="Resume the sweep and also rerun simulations recorded as failed",
+    )
+    p_sim.set_defaults(rerun="missing")
+    p_sim.add_argument(
+        "--mode",
+        choices=SWEEP_MODES,
+        default="grid",
+        help="Run the parameter grid, bisect for the AdePT/Geant4 break-even point "
+        "(params.yaml simulate.crossover), or run a thread-scaling study (simulate.scaling)",
+    )
+    p_sim.add_argument(
+        "--calibrate-events",
+        action="store_true",
+        help="Choose NUMBER_OF_EVENTS per combination from a short probe run, "
+        "aiming at a target event-loop time (params.yaml simulate.calibrate_events)",
+    )
+    p_sim.add_argument(
+        "--pair-order",
+        choices=PAIR_ORDERS,
+        default=None,
+        help="Run the AdePT and Geant4 job of each combination back to back in a seeded random "
+        "order, or in ABBA blocks over repeats (overrides params.yaml simulate.pair_order.mode)",
+    )
+    p_sim.add_argument(
+        "--noise-probe",
+        action="store_true",
+        help="Microbenchmark the node's CPU and memory before and after the sweep, and every N runs "
+        "(params.yaml simulate.noise_probe)",
+    )
+    p_sim.add_argument(
+        "--order",
+        choices=ORDER_POLICIES,
+        default="grid",
+        help="Job ordering policy, using durations predicted from earlier runs of the benchmark",
+    )
+    p_sim.add_argument(
+        "--sample-resources",
+        type=float,
+        nargs="?",
+        const=1.0,
+        default=None,
+        metavar="SECONDS",
+        help="Sample RSS/CPU/context switches of each Gaussino process tree (default interval: 1s)",
+    )
+    p_sim.add_argument(
+        "--stream-logs",
+        action="store_true",
+        help="Parse performance metrics while the log is written and store them in the metadata",
+    )
+    p_sim.add_argument(
+        "--compress-logs",
+        choices=LOG_COMPRESSIONS,
+        default=None,
+        help="Write each log compressed as it is produced (extraction reads it back streaming)",
+    )
+    p_sim.add_argument(
+        "--scratch-root",
+        default="",
+        help="Where per-run scratch directories are created (default: <run_dir>/.scratch)",
+    )
+    p_sim.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Kill a run after this wall time (overrides params.yaml simulate.timeout)",
+    )
+    p_sim.add_argument(
+        "--stall-timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Kill a run whose log and CPU use stay idle this long "
+        "(overrides params.yaml simulate.stall_timeout)",
+    )
+    p_sim.add_argument(
+        "--launch",
+        choices=LAUNCH_MODES,
+        default="run-env",
+        help="Start each run through `run env` (run-env), or gaudirun.py directly with the "
+        "environment cached under .cache/gaussino-env (cached); verify first checks the "
+        "cache against a fresh `run env`",
+    )
+    p_sim.add_argument(
+        "--profile",
+        choices=PROFILE_TOOLS,
+        default=None,
+        help="Record a sampling profile of each run as folded stacks next to its log "
+        "(overrides params.yaml simulate.profile.tool)",
+    )
+    p_sim.add_argument(
+        "--pin-cpus",
+        choices=PIN_MODES,
+        default="off",
+        help="Give each run its own CPU set, packed per NUMA node (numa)",
+    )
+    p_sim.add_argument(
+        "--smt",
+        choices=SMT_POLICIES,
+        default="spread",
+        help="How pinned runs use SMT siblings: one thread per core first (spread), "
+        "both siblings of a core (pack), or never the second sibling (avoid)",
+    )
+    p_sim.add_argument(
+        "--warm-cache",
+        type=int,
+        nargs="?",
+        const=DEFAULT_THREADS,
+        default=None,
+        metavar="THREADS",
+        help="Before the first run, read the G4*DATA directories of the Gaussino environment "
+        f"into the page cache with parallel readers (default: {DEFAULT_THREADS} threads)",
+    )
+    p_sim.add_argument(
+        "--result-cache",
+        default=None,
+        metavar="DIR",
+        help="Content-addressed cache of finished runs shared across run_ids "
+        "(default: .cache/results in the repository)",
+    )
+    p_sim.add_argument(
+        "--no-result-cache",
+        action="store_true",
+        help="Neither reuse nor store results in the result cache",
+    )
+    p_sim.add_argument(
+        "--no-preflight",
+        action="store_true",
+        help="Skip the smoke run of every simulation file with a tiny event count "
+        "before the sweep (params.yaml simulate.preflight)",
+    )
+    p_sim.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Queue the jobs in the run dir (jobs.sqlite) and run them in N local worker "
+        "processes, which survive a restart of this command",
+    )
+    p_sim.add_argument(
+        "--detach",
+        action="store_true",
+        help="With --workers: return once the jobs are queued (follow them with `status`)",
+    )
     p_sim.set_defaults(func=cmd_simulate)
 
+    p_status = sub.add_parser("status", help="Show queued/running/done job counts of queued sweeps")
+    p_status.add_argument("--params", default="params.yaml")
+    p_status.add_argument("--repo-root", default=str(_repo_root_default()))
+    p_status.set_defaults(func=cmd_status)
+
+    p_workers = sub.add_parser("workers", help="Add or drain queue workers of a running sweep")
+    p_workers.add_argument("--params", default="params.yaml")
+    p_workers.add_argument("--repo-root", default=str(_repo_root_default()))
+    p_workers.add_argument("--add", type=int, default=0, metavar="N", help="Start N more workers")
+    p_workers.add_argument(
+        "--drain", type=int, default=0, metavar="N", help="Let N workers exit after their current job"
+    )
+    p_workers.set_defaults(func=cmd_workers)
+
     p_report = sub.add_parser("report", help="Generate plots + metrics from extracted CSVs")
     p_report.add_argument("--params", default="params.yaml")
     p_report.add_argument("--repo-root", default=str(_repo_root_default()))
+    p_report.add_argument(
+        "--node-noise",
+        choices=NODE_NOISE_MODES,
+        default="flag",
+        help="Flag runs taken while the noise probes saw a degraded node, or also normalize "
+        "their timings by the node speed",
+    )
     p_report.set_defaults(func=cmd_report)
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     _setup_logging(args.verbose)
 
     ctx = _build_context(params_path=Path(getattr(args, "params", "params.yaml")), repo_root=Path(getattr(args, "repo_root", _repo_root_default())))
@@ -0,0 +1,157 @@
+"""
+Adaptive search for the AdePT/Geant4 break-even point.
+
+Instead of a dense grid, both simulation files run at the ends of a range of
+one parameter (PARTICLES_PER_EVENT by default); the range is then bisected in
+log space on the AdePT/Geant4 throughput ratio until the point where the
+ratio crosses 1 is bracketed within `tolerance` (the ratio of the bracket's
+upper to lower end). The search is done separately for every combination of
+the remaining grid parameters.
+
+Configured per benchmark in params.yaml and enabled with `simulate --mode crossover`:
+
+    simulate:
+      crossover:
+        parameter: PARTICLES_PER_EVENT
+        low: 1                 # defaults to the smallest grid value
+        high: 1000             # defaults to the largest grid value
+        tolerance: 1.25        # stop once high/low of the bracket is <= 1.25
+        max_probes: 12         # probe points per combination, ends included
+        metric: throughput
+"""
+
+from __future__ import annotations
+
+import itertools
+import math
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+ADEPT_STEM = "adept_simulation"
+REFERENCE_STEM = "geant4_simulation"
+
+
+@dataclass(frozen=True)
+class CrossoverSearch:
+    parameter: str
+    low: float
+    high: float
+    tolerance: float = 1.25
+    max_probes: int = 12
+    metric: str = "throughput"
+    # Round probe points to integers (event and particle counts).
+    integer: bool = True
+
+
+def parse_crossover_search(value: Any, *, parameters: Mapping[str, Any]) -> CrossoverSearch:
+    """Build a CrossoverSearch from `simulate.crossover`, defaulting the range to the grid."""
+    if value is None:
+        value = {}
+    if not isinstance(value, dict):
+        raise TypeError("params.yaml: simulate.crossover must be a mapping")
+
+    parameter = str(value.get("parameter", "PARTICLES_PER_EVENT"))
+    grid = parameters.get(parameter, [])
+    grid_values = [float(v) for v in grid] if isinstance(grid, list) else []
+    low = float(value.get("low", min(grid_values, default=0)))
+    high = float(value.get("high", max(grid_values, default=0)))
+    if not 0 < low < high:
+        raise ValueError(
+            f"params.yaml: simulate.crossover needs 0 < low < high for {parameter} "
+            "(set low/high or list at least two positive values in the grid)"
+        )
+
+    tolerance = float(value.get("tolerance", 1.25))
+    if tolerance <= 1:
+        raise ValueError("params.yaml: simulate.crossover.tolerance must be > 1")
+    max_probes = int(value.get("max_probes", 12))
+    if max_probes < 2:
+        raise ValueError("params.yaml: simulate.crossover.max_probes must be >= 2")
+
+    integer = bool(value.get("integer", all(float(v).is_integer() for v in (low, high))))
+    return CrossoverSearch(
+        parameter=parameter,
+        low=int(low) if integer else low,
+        high=int(high) if integer else high,
+        tolerance=tolerance,
+        max_probes=max_probes,
+        metric=str(value.get("metric", "throughput")),
+        integer=integer,
+    )
+
+
+def next_probe(lo: float, hi: float, *, integer: bool) -> float | None:
+    """Geometric midpoint of (lo, hi), or None if no new point fits in between."""
+    mid = math.sqrt(lo * hi)
+    if integer:
+        mid = round(mid)
+    if not lo < mid < hi:
+        return None
+    return mid
+
+
+def find_bracket(ratios: Mapping[float, float | None]) -> tuple[float, float] | None:
+    """Adjacent probe points between which the AdePT/reference ratio crosses 1.
+
+    Points without a ratio (failed runs) are skipped. With several crossings the
+    first one, going up the range, is returned.
+    """
+    points = sorted((x, r) for x, r in ratios.items() if r is not None and r > 0)
+    for (x0, r0), (x1, r1) in itertools.pairwise(points):
+        if (r0 >= 1) != (r1 >= 1):
+            return x0, x1
+    return None
+
+
+def estimate_crossover(x0: float, r0: float, x1: float, r1: float) -> float:
+    """Where log(ratio) reaches 0, interpolating linearly in log(x)."""
+    l0, l1 = math.log(r0), math.log(r1)
+    if l0 == l1:
+        return math.sqrt(x0 * x1)
+    t = l0 / (l0 - l1)
+    return math.exp(math.log(x0) + t * (math.log(x1) - math.log(x0)))
+
+
+def is_resolved(lo: float, hi: float, *, tolerance: float) -> bool:
+    return hi / lo <= tolerance
+
+
+@dataclass
+class CrossoverState:
+    """Probe points and AdePT/reference ratios for one combination of the other parameters."""
+
+    search: CrossoverSearch
+    group: dict[str, Any]
+    ratios: dict[float, float | None] = field(default_factory=dict)
+
+    def initial_points(self) -> list[float]:
+        return [self.search.low, self.search.high]
+
+    def propose(self) -> float | None:
+        """Next point to probe, or None once the search is over."""
+        if len(self.ratios) >= self.search.max_probes:
+            return None
+        bracket = find_bracket(self.ratios)
+        if bracket is None or is_resolved(*bracket, tolerance=self.search.tolerance):
+            return None
+        return next_probe(*bracket, integer=self.search.integer)
+
+    def summary(self) -> dict[str, Any]:
+        bracket = find_bracket(self.ratios)
+        result: dict[str, Any] = {
+            "parameters": self.group,
+            "parameter": self.search.parameter,
+            "metric": self.search.metric,
+            "points": [{"value": x, "ratio": r} for x, r in sorted(self.ratios.items())],
+            "bracket": list(bracket) if bracket else None,
+            "estimate": None,
+            "resolved": False,
+        }
+        if bracket:
+            lo, hi = bracket
+            r_lo, r_hi = self.ratios[lo], self.ratios[hi]
+            assert r_lo is not None and r_hi is not None
+            result["estimate"] = estimate_crossover(lo, r_lo, hi, r_hi)
+            result["resolved"] = is_resolved(lo, hi, tolerance=self.search.tolerance)
+        return result
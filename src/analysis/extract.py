@@ -1,19 +1,20 @@
 from __future__ import annotations
 
 import csv
-import json
 import logging
 from collections.abc import Mapping, Sequence
 from pathlib import Path
 from typing import Any
 
 from analysis.extractors import get_extractor
+from analysis.journal import load_simulation_metadata
+from analysis.logio import extract_log
+from analysis.noise import NODE_SCORE_FIELDS, node_scores
 
 logger = logging.getLogger(__name__)
 
-
-def _load_json(json_path: Path) -> dict[str, Any]:
-    return json.loads(json_path.read_text())
+# Run-level fields copied to the CSV when the simulate stage recorded them.
+OPTIONAL_RUN_FIELDS = ("repeat", "seed", "pair_position")
 
 
 def _resolve_log_path(*, run_dir: Path, log_path_value: str) -> Path:
@@ -33,22 +34,18 @@ def extract_run(
     """Extract results for one run directory.
 
     Contract:
-    - Inputs: run_dir contains simulation_metadata.json and referenced log files.
+    - Inputs: run_dir contains simulation_metadata.json (or the simulate stage's
+      simulation_journal.jsonl) and referenced log files.
     - Output: out_dir/{extract_type}-results.csv
     """
 
-    simulation_metadata_path = run_dir / "simulation_metadata.json"
-    if not simulation_metadata_path.exists():
-        raise FileNotFoundError(
-            f"Missing simulation metadata: {simulation_metadata_path}"
-        )
-
-    simulation_metadata = _load_json(simulation_metadata_path)
+    simulation_metadata = load_simulation_metadata(run_dir)
     run_entries = simulation_metadata.get("runs", [])
     if not isinstance(run_entries, list):
         raise TypeError("simulation_metadata.json: 'runs' must be a list")
 
     extractor = get_extractor(benchmark, extract_type)
+    noise_probes = simulation_metadata.get("noise_probes") or []
 
     extracted_rows: list[dict[str, Any]] = []
     for run_entry in run_entries:
@@ -60,19 +57,33 @@ def extract_run(
             continue
 
         log_path = _resolve_log_path(run_dir=run_dir, log_path_value=str(log_path_value))
-        if not log_path.exists():
+
+        # Results parsed while the simulation ran spare a full re-read of the log.
+        streamed = run_entry.get("streamed_results")
+        if isinstance(streamed, dict) and extract_type in streamed:
+            results = streamed[extract_type]
+        elif not log_path.exists():
             logger.warning("Log file not found: %s", log_path)
             continue
+        else:
+            results = extract_log(log_path, extractor)
 
-        log_data = log_path.read_text(errors="replace")
+        # Wrapper counters (perf stat, time -v) describe the run as a whole.
+        counters = run_entry.get("counters")
+        if isinstance(results, Mapping) and isinstance(counters, dict):
+            results = {**results, **{f"counter_{k}": v for k, v in counters.items()}}
 
         extracted_rows.append(
             {
                 "log_file": str(log_path),
                 "execution_time": run_entry.get("execution_time"),
                 "with_adept": run_entry.get("with_adept"),
+                "run_fields": {
+                    **{k: run_entry[k] for k in OPTIONAL_RUN_FIELDS if k in run_entry},
+                    **node_scores(noise_probes, run_entry),
+                },
                 "parameters": run_entry.get("parameters", {}),
-                "results": extractor(log_data),
+                "results": results,
             }
         )
 
@@ -90,8 +101,10 @@ def _export_to_csv(rows: list[dict[str, Any]], csv_path: Path) -> None:
     # Determine dynamic columns.
     parameter_keys: set[str] = set()
     result_keys: set[str] = set()
+    run_field_keys: set[str] = set()
 
     for row in rows:
+        run_field_keys.update(row.get("run_fields", {}))
         parameters = row.get("parameters", {})
         if isinstance(parameters, dict):
             parameter_keys.update(parameters.keys())
@@ -108,6 +121,7 @@ def _export_to_csv(rows: list[dict[str, Any]], csv_path: Path) -> None:
 
     header = (
         ["log_file", "execution_time", "with_adept"]
+        + [k for k in OPTIONAL_RUN_FIELDS + NODE_SCORE_FIELDS if k in run_field_keys]
         + sorted(parameter_keys)
         + sorted(result_keys)
     )
@@ -121,6 +135,7 @@ def _export_to_csv(rows: list[dict[str, Any]], csv_path: Path) -> None:
                 "log_file": row.get("log_file"),
                 "execution_time": row.get("execution_time"),
                 "with_adept": row.get("with_adept"),
+                **row.get("run_fields", {}),
             }
 
             parameters = row.get("parameters", {})
@@ -4,7 +4,71 @@ Collection of log file extractor functions for different physics benchmarks.
 
 import re
 from collections.abc import Callable
-from typing import Final
+from typing import Final, Protocol
+
+_PERFORMANCE_PATTERNS: Final[dict[str, re.Pattern[str]]] = {
+    "event_loop_time": re.compile(r"Measured event loop time \[ns\]: ([\d.e+-]+)"),
+    "time_per_event": re.compile(r"Time per event \[s\]: ([\d.e+-]+)"),
+    "throughput": re.compile(r"Throughput \[1/s\]: ([\d.e+-]+)"),
+}
+
+# Keys produced by `performance_extractor` on a complete log.
+PERFORMANCE_METRICS: Final[tuple[str, ...]] = tuple(_PERFORMANCE_PATTERNS)
+
+
+class LogAccumulator(Protocol):
+    """Incremental form of an extractor: fed one log line at a time."""
+
+    def feed(self, line: str) -> None: ...
+
+    def result(self) -> list[dict] | dict: ...
+
+
+class PerformanceAccumulator:
+    """
+    Incremental counterpart of `performance_extractor`.
+
+    Keeps the first match of every pattern, like `re.search` over the whole log.
+    """
+
+    def __init__(self) -> None:
+        self._results: dict[str, float] = {}
+
+    def feed(self, line: str) -> None:
+        # Cheap pre-filter: every performance line looks like "<label> [<unit>]: <value>".
+        if "]: " not in line or len(self._results) == len(_PERFORMANCE_PATTERNS):
+            return
+        for key, pattern in _PERFORMANCE_PATTERNS.items():
+            if key in self._results:
+                continue
+            match = pattern.search(line)
+            if match:
+                self._results[key] = float(match.group(1))
+
+    def result(self) -> dict[str, float]:
+        return dict(self._results)
+
+
+class LineRecordAccumulator:
+    """Collects one record per matching line, using a line parser."""
+
+    def __init__(self, parse_line: Callable[[str], dict | None]) -> None:
+        self._parse_line = parse_line
+        self._results: list[dict] = []
+
+    def feed(self, line: str) -> None:
+        record = self._parse_line(line)
+        if record is not None:
+            self._results.append(record)
+
+    def result(self) -> list[dict]:
+        return self._results
+
+
+def _accumulate(accumulator: LogAccumulator, log_data: str) -> list[dict] | dict:
+    for line in log_data.splitlines():
+        accumulator.feed(line)
+    return accumulator.result()
 
 
 def performance_extractor(log_data: str) -> dict[str, float]:
@@ -17,69 +81,62 @@ def performance_extractor(log_data: str) -> dict[str, float]:
     Returns:
         A dictionary containing the extracted performance metrics.
     """
-    patterns = {
-        "event_loop_time": r"Measured event loop time \[ns\]: ([\d.e+-]+)",
-        "time_per_event": r"Time per event \[s\]: ([\d.e+-]+)",
-        "throughput": r"Throughput \[1/s\]: ([\d.e+-]+)",
+    return _accumulate(PerformanceAccumulator(), log_data)  # type: ignore[return-value]
+
+
+_B4_PATTERN: Final = re.compile(
+    r"Edep:\s*([\d.eE+-]+)\s*([a-zA-Z]+)\s*track length:\s*([\d.eE+-]+)\s*([a-zA-Z]+)\s+"
+    r"sensitive detector:\s*(B4Calorimeter_Layer_AbsorberSDet|B4Calorimeter_Layer_GapSDet)\s+"
+    r"layer number:\s*(-?\d+)\s*eventID:\s*(\d+)"
+)
+
+_B2_PATTERN: Final = re.compile(
+    r"SUCCESS\s*\[\s*Worker\s*#(\d+)\s*\]\s*#Hits=\s*(\d+)\s*Energy=\s*([\d.eE+-]+)\[(\w+)\]\s*#Particles=\s*(\d+)\s*in\s*(ExternalDetectorEmbedder_Chamber_\d+SDet)\s*for\s*event\s*with\s*id:\s*(\d+)"
+)
+
+
+def _parse_b4_line(line: str) -> dict | None:
+    m = _B4_PATTERN.search(line)
+    if not m:
+        return None
+    return {
+        "edep_value": float(m.group(1)),
+        "edep_unit": m.group(2),
+        "track_length_value": float(m.group(3)),
+        "track_length_unit": m.group(4),
+        "detector": m.group(5),
+        "layer_number": int(m.group(6)),
+        "event_id": int(m.group(7)),
+    }
+
+
+def _parse_b2_line(line: str) -> dict | None:
+    m = _B2_PATTERN.search(line)
+    if not m:
+        return None
+    return {
+        "worker_id": int(m.group(1)),
+        "number_of_hits": int(m.group(2)),
+        "energy_value": float(m.group(3)),
+        "energy_unit": m.group(4),
+        "number_of_particles": int(m.group(5)),
+        "detector": m.group(6),
+        "event_id": int(m.group(7)),
     }
-    results = {}
-    for key, pattern in patterns.items():
-        match = re.search(pattern, log_data)
-        if match:
-            results[key] = float(match.group(1))
-    return results
 
 
 def b4layeredcalorimeter_physics_extractor(log_data: str) -> list[dict]:
     """
     Extracts physics results from B4LayeredCalorimeter log data.
     """
-    pattern = re.compile(
-        r"Edep:\s*([\d.eE+-]+)\s*([a-zA-Z]+)\s*track length:\s*([\d.eE+-]+)\s*([a-zA-Z]+)\s+"
-        r"sensitive detector:\s*(B4Calorimeter_Layer_AbsorberSDet|B4Calorimeter_Layer_GapSDet)\s+"
-        r"layer number:\s*(-?\d+)\s*eventID:\s*(\d+)"
-    )
-    results = []
-    for line in log_data.splitlines():
-        m = pattern.search(line)
-        if m:
-            results.append(
-                {
-                    "edep_value": float(m.group(1)),
-                    "edep_unit": m.group(2),
-                    "track_length_value": float(m.group(3)),
-                    "track_length_unit": m.group(4),
-                    "detector": m.group(5),
-                    "layer_number": int(m.group(6)),
-                    "event_id": int(m.group(7)),
-                }
-            )
-    return results
+    return _accumulate(LineRecordAccumulator(_parse_b4_line), log_data)  # type: ignore[return-value]
 
 
 def b2chambertracker_physics_extractor(log_data: str) -> list[dict]:
     """
     Extracts physics results from B2ChamberTracker log data.
     """
-    pattern = re.compile(
-        r"SUCCESS\s*\[\s*Worker\s*#(\d+)\s*\]\s*#Hits=\s*(\d+)\s*Energy=\s*([\d.eE+-]+)\[(\w+)\]\s*#Particles=\s*(\d+)\s*in\s*(ExternalDetectorEmbedder_Chamber_\d+SDet)\s*for\s*event\s*with\s*id:\s*(\d+)"
-    )
-    results = []
-    for line in log_data.splitlines():
-        m = pattern.search(line)
-        if m:
-            results.append(
-                {
-                    "worker_id": int(m.group(1)),
-                    "number_of_hits": int(m.group(2)),
-                    "energy_value": float(m.group(3)),
-                    "energy_unit": m.group(4),
-                    "number_of_particles": int(m.group(5)),
-                    "detector": m.group(6),
-                    "event_id": int(m.group(7)),
-                }
-            )
-    return results
+    return _accumulate(LineRecordAccumulator(_parse_b2_line), log_data)  # type: ignore[return-value]
 
 
 Extractor = Callable[[str], list[dict] | dict]
@@ -92,6 +149,13 @@ EXTRACTORS: Final[dict[tuple[str, str], Extractor]] = {
     ("calo_challenge", "performance"): performance_extractor,
 }
 
+# Incremental versions of the registered extractors, for line-by-line consumers.
+ACCUMULATORS: Final[dict[Extractor, Callable[[], LogAccumulator]]] = {
+    performance_extractor: PerformanceAccumulator,
+    b4layeredcalorimeter_physics_extractor: lambda: LineRecordAccumulator(_parse_b4_line),
+    b2chambertracker_physics_extractor: lambda: LineRecordAccumulator(_parse_b2_line),
+}
+
 
 def get_extractor(benchmark: str, extractor_type: str) -> Extractor:
     """
@@ -113,3 +177,26 @@ def get_extractor(benchmark: str, extractor_type: str) -> Extractor:
         raise ValueError(
             f"Extractor of type {extractor_type} for benchmark {benchmark}  was not found"
         ) from err
+
+
+def get_accumulator(benchmark: str, extractor_type: str) -> LogAccumulator:
+    """
+    Creates a fresh incremental accumulator for a registered extractor.
+
+    Args:
+        benchmark: The benchmark id (e.g., 'b4_layered_calorimeter').
+        extractor_type: The type of data to extract ('performance' or 'physics').
+
+    Returns:
+        An accumulator to be fed log lines; its result matches the extractor's.
+
+    Raises:
+        ValueError if the extractor is not found or has no incremental form
+    """
+    extractor = get_extractor(benchmark, extractor_type)
+    try:
+        return ACCUMULATORS[extractor]()
+    except KeyError as err:
+        raise ValueError(
+            f"Extractor of type {extractor_type} for benchmark {benchmark} has no incremental form"
+        ) from err
@@ -0,0 +1,174 @@
+"""
+Synthetic stand-in for `stack/Gaussino/run`, for measuring and testing the
+pipeline without a Gaussino stack or a GPU.
+
+It accepts the same command lines as the real wrapper:
+
+    fake-gaussino env K=V ... gaudirun.py <options files> <simulation file>
+    fake-gaussino env env -0            (environment capture, see analysis.runenv)
+
+and honours the environment variables used by benchmarks/*: NUMBER_OF_EVENTS,
+NUMBER_OF_THREADS, PARTICLES_PER_EVENT and RUN_NUMBER. The simulation file's
+stem selects AdePT or Geant4, and its directory selects the benchmark. Output
+mimics a real log: initialisation lines, B4 `Edep:` or B2 `#Hits=` lines per
+event, and the performance lines read by analysis.extractors. A placeholder ROOT
+file is written to the working directory.
+
+The duration of the event loop follows a simple cost model, in work units per
+event:
+- Geant4: PARTICLES_PER_EVENT
+- AdePT: FAKE_GAUSSINO_ADEPT_OVERHEAD + PARTICLES_PER_EVENT / FAKE_GAUSSINO_ADEPT_SPEEDUP
+The units are multiplied by FAKE_GAUSSINO_SECONDS_PER_UNIT and divided over
+the threads. The default cost model gives a crossover near 20 particles.
+
+Knobs, all optional:
+- FAKE_GAUSSINO_MODE: "sleep" (default) or "burn" (busy loop on one core).
+- FAKE_GAUSSINO_SECONDS_PER_UNIT: default 1e-5; 0 skips the wait entirely.
+- FAKE_GAUSSINO_ADEPT_OVERHEAD: default 20.
+- FAKE_GAUSSINO_ADEPT_SPEEDUP: default 20.
+- FAKE_GAUSSINO_HIT_LINES: hit lines per event (default 20 for B4, 4 for B2).
+- FAKE_GAUSSINO_LOG_SCALE: multiplier on the hit lines, for log-volume tests.
+- FAKE_GAUSSINO_EXIT_CODE: exit status to return (default 0).
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import TextIO
+
+B4_DETECTORS = ("B4Calorimeter_Layer_AbsorberSDet", "B4Calorimeter_Layer_GapSDet")
+B4_LAYERS = 50
+B2_CHAMBERS = 5
+
+DEFAULT_HIT_LINES = {"b4_layered_calorimeter": 20, "b2_chamber_tracker": 4}
+
+
+def _number(env: Mapping[str, str], name: str, default: float) -> float:
+    try:
+        return float(env.get(name, default))
+    except ValueError:
+        return default
+
+
+def _int(env: Mapping[str, str], name: str, default: int) -> int:
+    return int(_number(env, name, default))
+
+
+def event_work_units(env: Mapping[str, str], *, with_adept: bool) -> float:
+    particles = _number(env, "PARTICLES_PER_EVENT", 100)
+    if not with_adept:
+        return particles
+    overhead = _number(env, "FAKE_GAUSSINO_ADEPT_OVERHEAD", 20)
+    speedup = _number(env, "FAKE_GAUSSINO_ADEPT_SPEEDUP", 20)
+    return overhead + particles / speedup
+
+
+def _spend(seconds: float, *, mode: str) -> None:
+    if seconds <= 0:
+        return
+    if mode == "burn":
+        deadline = time.perf_counter() + seconds
+        x = 0
+        while time.perf_counter() < deadline:
+            x += 1
+    else:
+        time.sleep(seconds)
+
+
+def _write_hits(out: TextIO, rng: random.Random, *, benchmark: str, event: int, lines: int) -> None:
+    if benchmark == "b4_layered_calorimeter":
+        for i in range(lines):
+            detector = B4_DETECTORS[i % 2]
+            out.write(
+                f"{detector:<32} INFO Edep: {rng.expovariate(1.0):.6g} MeV "
+                f"track length: {rng.expovariate(0.2):.6g} mm sensitive detector: {detector} "
+                f"layer number: {rng.randrange(B4_LAYERS)} eventID: {event}\n"
+            )
+    elif benchmark == "b2_chamber_tracker":
+        for i in range(lines):
+            out.write(
+                f"ExternalDetectorEmbedder         SUCCESS [ Worker #{i % 4} ] "
+                f"#Hits= {rng.randint(1, 50)} Energy= {rng.expovariate(0.5):.6g}[MeV] "
+                f"#Particles= {rng.randint(1, 10)} in ExternalDetectorEmbedder_Chamber_"
+                f"{i % B2_CHAMBERS + 1}SDet for event with id: {event}\n"
+            )
+
+
+def simulate(env: Mapping[str, str], args: Sequence[str], *, out: TextIO) -> int:
+    """Fake `gaudirun.py <options> <simulation file>`: write a log to `out`."""
+    sim_files = [Path(a) for a in args if a.endswith(".py") and "simulation" in Path(a).stem]
+    sim_file = sim_files[-1] if sim_files else Path("geant4_simulation.py")
+    benchmark = sim_file.resolve().parent.name
+    with_adept = sim_file.stem.startswith("adept")
+
+    events = max(1, _int(env, "NUMBER_OF_EVENTS", 10))
+    threads = max(1, _int(env, "NUMBER_OF_THREADS", 1))
+    seed = _int(env, "RUN_NUMBER", 1)
+    rng = random.Random(f"{sim_file.stem}-{seed}")
+    mode = env.get("FAKE_GAUSSINO_MODE", "sleep")
+    seconds_per_unit = _number(env, "FAKE_GAUSSINO_SECONDS_PER_UNIT", 1e-5)
+    hit_lines = round(
+        _number(env, "FAKE_GAUSSINO_HIT_LINES", DEFAULT_HIT_LINES.get(benchmark, 0))
+        * _number(env, "FAKE_GAUSSINO_LOG_SCALE", 1)
+    )
+
+    out.write("ApplicationMgr       INFO Application Manager Configured successfully\n")
+    out.write(f"GiGaMT               INFO Simulating with {'AdePT' if with_adept else 'Geant4'}\n")
+    out.write(f"HiveSlimEventLoopMgr INFO Using {threads} threads, {events} events\n")
+    out.write("ApplicationMgr       INFO Application Manager Initialized successfully\n")
+
+    event_seconds = seconds_per_unit * event_work_units(env, with_adept=with_adept) / threads
+    loop_start = time.perf_counter()
+    for event in range(events):
+        _spend(event_seconds, mode=mode)
+        _write_hits(out, rng, benchmark=benchmark, event=event, lines=hit_lines)
+    loop_seconds = max(time.perf_counter() - loop_start, 1e-9)
+
+    out.write(f"GaussinoPerf         INFO Measured event loop time [ns]: {loop_seconds * 1e9:.6e}\n")
+    out.write(f"GaussinoPerf         INFO Time per event [s]: {loop_seconds / events:.6e}\n")
+    out.write(f"GaussinoPerf         INFO Throughput [1/s]: {events / loop_seconds:.6e}\n")
+    out.write("ApplicationMgr       INFO Application Manager Terminated successfully\n")
+    out.flush()
+
+    Path(f"{sim_file.stem}.root").write_bytes(b"fake-gaussino\0" + str(events).encode())
+    return _int(env, "FAKE_GAUSSINO_EXIT_CODE", 0)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    env = dict(os.environ)
+    if args and args[0] == "env":
+        args = args[1:]
+        while args and "=" in args[0] and not args[0].startswith("="):
+            key, _, value = args.pop(0).partition("=")
+            env[key] = value
+
+    if not args:
+        sys.stdout.write("".join(f"{k}={v}\n" for k, v in env.items()))
+        return 0
+    if Path(args[0]).name == "gaudirun.py":
+        # Large logs: avoid a flush per line.
+        with open(sys.stdout.fileno(), "w", buffering=1 << 20, closefd=False) as out:
+            return simulate(env, args[1:], out=out)
+    os.execvpe(args[0], args, env)
+    return 127  # pragma: no cover - execvpe does not return
+
+
+def write_launcher(path: Path, *, python: str = sys.executable) -> Path:
+    """Write an executable script usable as `--executable` that runs this module."""
+    src = Path(__file__).resolve().parents[1]
+    path.write_text(
+        "#!/bin/sh\n"
+        f'PYTHONPATH="{src}${{PYTHONPATH:+:$PYTHONPATH}}" exec "{python}" -m analysis.fakegaussino "$@"\n'
+    )
+    path.chmod(0o755)
+    return path
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,144 @@
+"""
+Flamegraph SVGs from folded stacks, including differential flamegraphs.
+
+A differential flamegraph is drawn with the frame widths of a baseline profile
+(Geant4) and coloured by how the share of samples in each frame changes in a
+second profile (AdePT): blue frames lose time, red frames gain time. Frames
+that AdePT offloads to the GPU show up as wide blue towers.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+WIDTH = 1200
+FRAME_HEIGHT = 16
+FONT_SIZE = 11
+# Frames narrower than this (in pixels) are not drawn.
+MIN_WIDTH = 0.3
+
+
+@dataclass
+class Frame:
+    name: str
+    value: int = 0
+    children: dict[str, Frame] = field(default_factory=dict)
+
+
+def build_tree(stacks: Mapping[str, int]) -> Frame:
+    root = Frame("all")
+    for stack, count in stacks.items():
+        root.value += count
+        node = root
+        for name in stack.split(";"):
+            node = node.children.setdefault(name, Frame(name))
+            node.value += count
+    return root
+
+
+def inclusive_shares(stacks: Mapping[str, int]) -> dict[tuple[str, ...], float]:
+    """Fraction of all samples spent in (or below) every stack prefix."""
+    total = sum(stacks.values())
+    shares: dict[tuple[str, ...], float] = {}
+    if not total:
+        return shares
+    for stack, count in stacks.items():
+        frames = tuple(stack.split(";"))
+        for depth in range(1, len(frames) + 1):
+            shares[frames[:depth]] = shares.get(frames[:depth], 0.0) + count / total
+    return shares
+
+
+def _depth(frame: Frame) -> int:
+    return 1 + max((_depth(c) for c in frame.children.values()), default=0)
+
+
+def _plain_color(name: str) -> str:
+    # Deterministic warm palette, like the classic flamegraph.pl "hot" scheme.
+    h = sum(ord(c) * (i + 1) for i, c in enumerate(name))
+    return f"rgb({205 + h % 50},{80 + (h // 50) % 120},{(h // 7) % 55})"
+
+
+def _diff_color(delta: float, scale: float) -> str:
+    """White for no change, saturating to red (gain) or blue (loss) at `scale`."""
+    strength = min(1.0, abs(delta) / scale) if scale > 0 else 0.0
+    fade = int(255 * (1 - strength))
+    return f"rgb(255,{fade},{fade})" if delta > 0 else f"rgb({fade},{fade},255)"
+
+
+def render_flamegraph(
+    stacks: Mapping[str, int],
+    *,
+    title: str,
+    compare: Mapping[str, int] | None = None,
+) -> str:
+    """SVG flamegraph of `stacks`; coloured by the change towards `compare` when given."""
+    root = build_tree(stacks)
+    depth = _depth(root)
+    height = (depth + 3) * FRAME_HEIGHT
+    total = max(root.value, 1)
+
+    deltas: dict[tuple[str, ...], float] = {}
+    scale = 0.0
+    if compare is not None:
+        base_shares = inclusive_shares(stacks)
+        other_shares = inclusive_shares(compare)
+        deltas = {path: other_shares.get(path, 0.0) - share for path, share in base_shares.items()}
+        scale = max((abs(d) for d in deltas.values()), default=0.0)
+
+    parts = [
+        (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH}" height="{height}" '
+            f'font-family="Verdana" font-size="{FONT_SIZE}">'
+        ),
+        '<rect width="100%" height="100%" fill="#f8f8f8"/>',
+        (
+            f'<text x="{WIDTH / 2}" y="{FRAME_HEIGHT}" text-anchor="middle" font-size="{FONT_SIZE + 3}">'
+            f"{escape(title)}</text>"
+        ),
+    ]
+
+    def draw(frame: Frame, path: tuple[str, ...], x: float, level: int) -> None:
+        width = WIDTH * frame.value / total
+        if width < MIN_WIDTH:
+            return
+        y = height - (level + 1) * FRAME_HEIGHT
+        share = frame.value / total
+        label = f"{frame.name} ({frame.value} samples, {100 * share:.2f}%"
+        if compare is not None and path:
+            delta = deltas.get(path, 0.0)
+            label += f", {100 * delta:+.2f} pts"
+            color = _diff_color(delta, scale)
+        else:
+            color = _plain_color(frame.name)
+        label += ")"
+        parts.append(
+            f'<g><title>{escape(label)}</title>'
+            f'<rect x="{x:.2f}" y="{y}" width="{width:.2f}" height="{FRAME_HEIGHT - 1}" '
+            f'fill="{color}" rx="2"/>'
+        )
+        chars = int(width / (FONT_SIZE * 0.6))
+        if chars >= 3:
+            text = frame.name if len(frame.name) <= chars else frame.name[: chars - 2] + ".."
+            parts.append(f'<text x="{x + 3:.2f}" y="{y + FRAME_HEIGHT - 4}">{escape(text)}</text>')
+        parts.append("</g>")
+
+        child_x = x
+        for child in sorted(frame.children.values(), key=lambda c: c.name):
+            draw(child, path + (child.name,), child_x, level + 1)
+            child_x += WIDTH * child.value / total
+
+    draw(root, (), 0.0, 0)
+    parts.append("</svg>")
+    return "\n".join(parts) + "\n"
+
+
+def write_flamegraph(
+    path: Path, stacks: Mapping[str, int], *, title: str, compare: Mapping[str, int] | None = None
+) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(render_flamegraph(stacks, title=title, compare=compare))
+    return path
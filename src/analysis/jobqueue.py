@@ -0,0 +1,293 @@
+"""
+SQLite job queue of a run dir, drained by worker processes on the same node.
+
+`simulate --workers N` enqueues the sweep's jobs into `<run_dir>/jobs.sqlite`
+and starts N workers (`python -m analysis.worker <run_dir>`). Each worker
+claims one job at a time in an immediate transaction, runs it and writes the
+run entry back to the queue and to the run journal. Workers run in their own
+session, so they survive the CLI being interrupted or restarted; a restarted
+`simulate` enqueues only what is still missing and waits for the queue again.
+
+Capacity can change while a sweep runs (`analysis workers --add/--drain`):
+- the `workers` setting is the number of workers the waiting CLI keeps alive;
+- a drain request makes the next worker looking for a job exit instead.
+
+A job whose worker died (no such process any more) goes back to the queue,
+up to MAX_ATTEMPTS claims.
+With a core budget (`simulate --parallel`), a job is only claimed while its
+NUMBER_OF_THREADS fits in the cores left by the running jobs.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+QUEUE_NAME = "jobs.sqlite"
+WORKER_LOG_DIR = "workers"
+
+# Claims of a job whose worker died before the job is given up as failed.
+MAX_ATTEMPTS = 3
+
+# How often workers look for claimable jobs and the CLI checks on the queue [s].
+POLL_INTERVAL = 1.0
+
+JOB_STATES = ("queued", "running", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    position INTEGER NOT NULL,
+    cost INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    worker_pid INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    claimed_at REAL,
+    finished_at REAL,
+    entry TEXT
+);
+CREATE TABLE IF NOT EXISTS workers (
+    pid INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def pid_alive(pid: int) -> bool:
+    """Whether a process with this pid exists on this node and is not a zombie."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return True
+    return stat[stat.rfind(")") + 2 :][:1] != "Z"
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    id: int
+    key: str
+    payload: dict[str, Any]
+
+
+class JobQueue:
+    def __init__(self, path: Path, *, timeout: float = 60.0) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE takes the write lock up front, so two workers never claim the same job.
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    # Settings shared by the CLI and the workers.
+
+    def set_setting(self, name: str, value: Any) -> None:
+        self._conn.execute(
+            "INSERT INTO settings (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+            (name, json.dumps(value)),
+        )
+
+    def setting(self, name: str, default: Any = None) -> Any:
+        row = self._conn.execute("SELECT value FROM settings WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    # Jobs.
+
+    def enqueue(self, jobs: Iterable[tuple[str, int, dict[str, Any]]]) -> int:
+        """Queue (key, cost, payload) jobs, in order. Returns how many were (re)queued.
+
+        A job already running keeps running; a finished one is queued again, as
+        the caller decided it has to run. Queued jobs that are not in `jobs` are
+        dropped (left over from an older grid).
+        """
+        jobs = list(jobs)
+        keys = {key for key, _, _ in jobs}
+        with self._transaction() as conn:
+            stale = [
+                key
+                for (key,) in conn.execute("SELECT key FROM jobs WHERE state = 'queued'")
+                if key not in keys
+            ]
+            conn.executemany("DELETE FROM jobs WHERE key = ?", [(key,) for key in stale])
+            start = conn.execute("SELECT COALESCE(MAX(position), 0) FROM jobs").fetchone()[0] + 1
+            queued = 0
+            for position, (key, cost, payload) in enumerate(jobs, start=start):
+                row = conn.execute("SELECT state FROM jobs WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[0] == "running":
+                    continue
+                conn.execute(
+                    "INSERT INTO jobs (key, position, cost, payload) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET position = excluded.position, "
+                    "cost = excluded.cost, payload = excluded.payload, state = 'queued', "
+                    "worker_pid = NULL, claimed_at = NULL, finished_at = NULL, entry = NULL",
+                    (key, position, max(1, int(cost)), json.dumps(payload)),
+                )
+                queued += 1
+        return queued
+
+    def claim(self, pid: int, *, budget: int | None = None) -> ClaimedJob | None:
+        """Atomically take the first queued job that fits in the free cores, if any."""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, key, cost, payload FROM jobs WHERE state = 'queued' ORDER BY position"
+            ).fetchall()
+            if not rows:
+                return None
+            if budget is not None:
+                used = conn.execute(
+                    "SELECT COALESCE(SUM(MIN(cost, ?)), 0) FROM jobs WHERE state = 'running'", (budget,)
+                ).fetchone()[0]
+                # A job larger than the whole budget is clamped so it runs alone.
+                rows = [row for row in rows if min(row[2], budget) <= budget - used]
+                if not rows:
+                    return None
+            job_id, key, _, payload = rows[0]
+            conn.execute(
+                "UPDATE jobs SET state = 'running', worker_pid = ?, claimed_at = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (pid, time.time(), job_id),
+            )
+        return ClaimedJob(id=job_id, key=key, payload=json.loads(payload))
+
+    def finish(self, job_id: int, *, success: bool, entry: dict[str, Any]) -> None:
+        self._conn.execute(
+            "UPDATE jobs SET state = ?, finished_at = ?, entry = ? WHERE id = ?",
+            ("done" if success else "failed", time.time(), json.dumps(entry), job_id),
+        )
+
+    def requeue_orphans(self) -> int:
+        """Put jobs of workers that no longer exist back into the queue.
+
+        A job that already took down MAX_ATTEMPTS workers is marked failed instead.
+        """
+        with self._transaction() as conn:
+            orphans = [
+                (job_id, attempts)
+                for job_id, pid, attempts in conn.execute(
+                    "SELECT id, worker_pid, attempts FROM jobs WHERE state = 'running'"
+                )
+                if pid is None or not pid_alive(pid)
+            ]
+            conn.executemany(
+                "UPDATE jobs SET state = ?, worker_pid = NULL, claimed_at = NULL WHERE id = ?",
+                [("failed" if attempts >= MAX_ATTEMPTS else "queued", job_id) for job_id, attempts in orphans],
+            )
+            dead = [pid for (pid,) in conn.execute("SELECT pid FROM workers") if not pid_alive(pid)]
+            conn.executemany("DELETE FROM workers WHERE pid = ?", [(pid,) for pid in dead])
+        if orphans:
+            logger.warning("Requeued %s jobs of workers that died", len(orphans))
+        return len(orphans)
+
+    def counts(self, keys: Iterable[str] | None = None) -> dict[str, int]:
+        """Number of jobs per state (of `keys` only, when given)."""
+        counts = dict.fromkeys(JOB_STATES, 0)
+        if keys is None:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        else:
+            wanted = set(keys)
+            states = self._conn.execute("SELECT key, state FROM jobs").fetchall()
+            rows = [(state, 1) for key, state in states if key in wanted]
+        for state, n in rows:
+            counts[state] = counts.get(state, 0) + n
+        return counts
+
+    def entries(self, keys: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """Run entries written back by the workers, by job key."""
+        wanted = set(keys)
+        return {
+            key: json.loads(entry)
+            for key, entry in self._conn.execute("SELECT key, entry FROM jobs WHERE entry IS NOT NULL")
+            if key in wanted
+        }
+
+    # Workers.
+
+    def register_worker(self, pid: int) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO workers (pid, started_at) VALUES (?, ?)", (pid, time.time())
+        )
+
+    def unregister_worker(self, pid: int) -> None:
+        self._conn.execute("DELETE FROM workers WHERE pid = ?", (pid,))
+
+    def live_workers(self) -> list[int]:
+        return [pid for (pid,) in self._conn.execute("SELECT pid FROM workers") if pid_alive(pid)]
+
+    def request_drain(self, count: int) -> int:
+        """Ask up to `count` live workers to exit before their next job. Returns the number asked."""
+        with self._transaction():
+            pending = self.setting("drain", 0)
+            count = max(0, min(count, len(self.live_workers()) - pending))
+            self.set_setting("drain", pending + count)
+        return count
+
+    def take_drain(self) -> bool:
+        """Consume one drain request; True means the calling worker should exit."""
+        with self._transaction():
+            pending = self.setting("drain", 0)
+            if pending <= 0:
+                return False
+            self.set_setting("drain", pending - 1)
+        return True
+
+
+def spawn_workers(run_dir: Path, count: int) -> list[subprocess.Popen]:
+    """Start `count` detached workers on the run dir's queue, logging to `<run_dir>/workers/`."""
+    log_dir = run_dir / WORKER_LOG_DIR
+    log_dir.mkdir(parents=True, exist_ok=True)
+    src = str(Path(__file__).resolve().parents[1])
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (src, env.get("PYTHONPATH")) if p)
+
+    started: list[subprocess.Popen] = []
+    for _ in range(count):
+        log_path = log_dir / f"worker-{os.getpid()}-{time.time_ns()}.log"
+        with log_path.open("ab") as log:
+            started.append(
+                subprocess.Popen(
+                    [sys.executable, "-m", "analysis.worker", str(run_dir)],
+                    env=env,
+                    stdin=subprocess.DEVNULL,
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    # Own session: the worker outlives the CLI and its terminal.
+                    start_new_session=True,
+                )
+            )
+    logger.info("Started %s workers on %s", count, run_dir)
+    return started
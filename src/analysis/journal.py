@@ -0,0 +1,162 @@
+"""
+Append-only journal of simulation run records.
+
+The simulate stage appends one JSON line per finished run and fsyncs it, so a
+crash loses at most the run in flight. `compact_journal` folds the journal into
+the `simulation_metadata.json` shape consumed by the rest of the pipeline, and
+`load_simulation_metadata` reads whichever of the two forms is present.
+
+Record kinds:
+- {"kind": "sweep", "fields": {...}}: top-level metadata fields (timestamp, benchmark, ...)
+- {"kind": "run", "entry": {...}}: one run entry; a later record for the same
+  run (same simulation file, parameters and repeat) replaces an earlier one.
+
+Several processes may append to the same journal (queue workers, see
+analysis.jobqueue); appends are serialised with an flock on `<journal>.lock`.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import os
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_NAME = "simulation_journal.jsonl"
+METADATA_NAME = "simulation_metadata.json"
+
+
+def entry_key(entry: dict[str, Any]) -> str:
+    """Identity of a run entry: which simulation file ran with which parameters (and repeat)."""
+    key: list[Any] = [str(entry.get("simulation_file")), entry.get("parameters", {})]
+    # Entries without a repeat index (or repeat 0) identify the same run.
+    if entry.get("repeat"):
+        key.append(entry["repeat"])
+    return json.dumps(key, sort_keys=True)
+
+
+def _dumps(record: dict[str, Any]) -> str:
+    return json.dumps(record, separators=(",", ":"))
+
+
+class RunJournal:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Exclusive lock against appends from other processes (not re-entrant)."""
+        with self.path.with_name(f"{self.path.name}.lock").open("a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def start(self, *, sweep: dict[str, Any], entries: Iterable[dict[str, Any]] = ()) -> None:
+        """Atomically replace the journal with a sweep header and carried-over entries.
+
+        Hold `locked()` around reading the previous entries and this call when
+        other processes may be appending.
+        """
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        with tmp.open("w") as f:
+            f.write(_dumps({"kind": "sweep", "fields": sweep}) + "\n")
+            for entry in entries:
+                f.write(_dumps({"kind": "run", "entry": entry}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def append(self, record: dict[str, Any]) -> None:
+        line = _dumps(record) + "\n"
+        with self.locked(), self.path.open("a") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record_run(self, entry: dict[str, Any]) -> None:
+        self.append({"kind": "run", "entry": entry})
+
+    def record_sweep(self, **fields: Any) -> None:
+        self.append({"kind": "sweep", "fields": fields})
+
+
+def read_journal(path: Path) -> list[dict[str, Any]]:
+    """Read journal records, skipping a torn or corrupt line (e.g. after a crash)."""
+    records: list[dict[str, Any]] = []
+    with path.open() as f:
+        for lineno, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("Skipping unreadable journal line %s:%s", path, lineno)
+                continue
+            if isinstance(record, dict):
+                records.append(record)
+    return records
+
+
+def replay_journal(
+    records: Iterable[dict[str, Any]], *, order: Sequence[str] = ()
+) -> dict[str, Any]:
+    """Fold journal records into the simulation_metadata.json shape.
+
+    Runs whose key is listed in `order` come first, in that order; the rest keep
+    the order in which they first appeared in the journal.
+    """
+    metadata: dict[str, Any] = {}
+    runs: dict[str, dict[str, Any]] = {}
+    for record in records:
+        kind = record.get("kind")
+        if kind == "sweep" and isinstance(record.get("fields"), dict):
+            metadata.update(record["fields"])
+        elif kind == "run" and isinstance(record.get("entry"), dict):
+            entry = record["entry"]
+            runs[entry_key(entry)] = entry
+
+    ordered = [runs.pop(key) for key in order if key in runs]
+    metadata["runs"] = ordered + list(runs.values())
+    return metadata
+
+
+def write_metadata(path: Path, metadata: dict[str, Any]) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(metadata, indent=2))
+    os.replace(tmp, path)
+
+
+def compact_journal(run_dir: Path, *, order: Sequence[str] = ()) -> Path:
+    """Write simulation_metadata.json from the run dir's journal."""
+    metadata_path = run_dir / METADATA_NAME
+    metadata = replay_journal(read_journal(run_dir / JOURNAL_NAME), order=order)
+    write_metadata(metadata_path, metadata)
+    return metadata_path
+
+
+def load_simulation_metadata(run_dir: Path) -> dict[str, Any]:
+    """Load run metadata from the journal if there is one, else from simulation_metadata.json.
+
+    The journal is authoritative: it is complete even if a sweep died before
+    compaction.
+    """
+    journal_path = run_dir / JOURNAL_NAME
+    if journal_path.exists():
+        return replay_journal(read_journal(journal_path))
+
+    metadata_path = run_dir / METADATA_NAME
+    if not metadata_path.exists():
+        raise FileNotFoundError(f"Missing simulation metadata: {metadata_path}")
+    data = json.loads(metadata_path.read_text())
+    if not isinstance(data, dict):
+        raise TypeError(f"{METADATA_NAME}: root must be a mapping")
+    return data
@@ -0,0 +1,58 @@
+"""
+Exec shim that applies per-run limits inside the child, before Gaussino starts:
+
+    python -I limitexec.py [--data BYTES] [--as BYTES] [--cpu SECONDS] [--cpu-grace SECONDS] [--cgroup DIR] -- command...
+
+It moves itself into the cgroup, sets RLIMIT_DATA / RLIMIT_AS / RLIMIT_CPU and execs the
+command, so everything the command starts inherits the limits. Doing this in
+the child avoids preexec_fn, which is unsafe in the threaded scheduler.
+
+Runs as a script (with -I, in whatever environment the run uses), so it only
+uses the standard library.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import resource
+import sys
+from collections.abc import Sequence
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="limitexec", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--data", type=int, default=None)
+    parser.add_argument("--as", dest="address_space", type=int, default=None)
+    parser.add_argument("--cpu", type=int, default=None)
+    parser.add_argument("--cpu-grace", type=int, default=10)
+    parser.add_argument("--cgroup", default=None)
+    parser.add_argument("command", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        parser.error("missing command")
+
+    if args.cgroup:
+        try:
+            with open(os.path.join(args.cgroup, "cgroup.procs"), "w") as f:
+                f.write(str(os.getpid()))
+        except OSError as err:
+            print(f"# limitexec: could not join cgroup {args.cgroup}: {err}", file=sys.stderr)
+    if args.data is not None:
+        resource.setrlimit(resource.RLIMIT_DATA, (args.data, args.data))
+    if args.address_space is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (args.address_space, args.address_space))
+    if args.cpu is not None:
+        # SIGXCPU at the soft limit, SIGKILL at the hard one.
+        resource.setrlimit(resource.RLIMIT_CPU, (args.cpu, args.cpu + args.cpu_grace))
+
+    try:
+        os.execvp(command[0], command)
+    except OSError as err:
+        print(f"# limitexec: cannot execute {command[0]}: {err}", file=sys.stderr)
+    return 127
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,290 @@
+"""
+Per-run memory and CPU limits, so that one runaway run cannot push the node
+into swap and slow every other measurement.
+
+Configured per benchmark in params.yaml:
+
+    simulate:
+      limits:
+        memory: 16G           # cgroup v2 memory.max of the run (RSS + page cache); swap disabled
+        data: 16G             # RLIMIT_DATA of every process of the run (heap and private writable maps)
+        address_space: 32G    # RLIMIT_AS of every process of the run; not usable with AdePT
+        cpu_time: 36000       # RLIMIT_CPU of every process [CPU seconds, all its threads]
+        cpus: threads         # cgroup v2 cpu.max quota in cores; "threads" = NUMBER_OF_THREADS
+        cgroup: /sys/fs/cgroup/bench.slice   # parent of the per-run groups (needed by memory, cpus)
+
+Rlimits are set in the child by analysis/limitexec.py. `memory` and `cpus` need
+a cgroup v2 sub-group per run, created under `limits.cgroup`: a group delegated
+to us (writable, with the memory and cpu controllers available) without
+processes of its own, since cgroup v2 only lets such a group enable controllers
+for its children. The sweep refuses to start when it is missing or unusable;
+the calling session's own cgroup is never reorganised. Such a group is e.g. an
+empty sub-group of a systemd unit started with Delegate=yes.
+
+RLIMIT_RSS is not enforced by Linux, so `memory` is the only real RSS limit.
+`address_space` counts every reserved virtual range: CUDA (and so AdePT)
+reserves far more address space than it ever touches, so under RLIMIT_AS
+AdePT runs fail at start-up. Use `memory` or `data` for them: RLIMIT_DATA does
+not count the inaccessible reservations.
+
+Runs that hit a limit are recorded with status "oom" (cgroup OOM kill, or an
+allocation failure under RLIMIT_DATA/RLIMIT_AS) or "cpu_limit" (SIGXCPU/SIGKILL
+from RLIMIT_CPU).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import re
+import resource
+import signal
+import sys
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from analysis.logio import read_log_tail
+
+logger = logging.getLogger(__name__)
+
+LIMIT_EXEC = Path(__file__).resolve().with_name("limitexec.py")
+
+# Seconds between SIGXCPU (soft CPU limit) and SIGKILL (hard limit).
+CPU_KILL_GRACE = 10
+
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:i?B)?\s*$", re.IGNORECASE)
+_SIZE_FACTORS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+# What a host allocation failure under RLIMIT_DATA/RLIMIT_AS looks like in a
+# Gaussino log. A bare "out of memory" is left out: AdePT reports a full GPU as
+# "CUDA error: out of memory", which no host limit causes.
+_ALLOCATION_FAILURE = re.compile(r"std::bad_alloc|Cannot allocate memory|MemoryError|virtual memory exhausted", re.IGNORECASE)
+# Lines about device memory, never a host limit.
+_DEVICE_ERROR = re.compile(r"\bCUDA\b|\bcuda[A-Z]\w*|\bGPU\b|\bdevice\b", re.IGNORECASE)
+LOG_TAIL_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class RunLimits:
+    memory: int | None = None
+    data: int | None = None
+    address_space: int | None = None
+    cpu_time: int | None = None
+    # Cores, or "threads" for the run's NUMBER_OF_THREADS.
+    cpus: float | str | None = None
+    cgroup: str | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return any(
+            v is not None for v in (self.memory, self.data, self.address_space, self.cpu_time, self.cpus)
+        )
+
+    @property
+    def needs_cgroup(self) -> bool:
+        return self.memory is not None or self.cpus is not None
+
+    def cpu_quota(self, threads: int) -> float | None:
+        if self.cpus == "threads":
+            return float(threads)
+        return None if self.cpus is None else float(self.cpus)
+
+
+def parse_size(value: Any) -> int:
+    """Bytes from an integer or a size such as "512M" or "16GiB" (binary multiples)."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        size = value
+    else:
+        match = _SIZE.match(str(value))
+        if match is None:
+            raise ValueError(f"not a size: {value!r}")
+        size = int(float(match.group(1)) * _SIZE_FACTORS[match.group(2).upper()])
+    if size <= 0:
+        raise ValueError(f"size must be positive: {value!r}")
+    return size
+
+
+def parse_run_limits(value: Any) -> RunLimits:
+    """Build RunLimits from `simulate.limits` in params.yaml."""
+    if value is None:
+        return RunLimits()
+    if not isinstance(value, dict):
+        raise TypeError("params.yaml: simulate.limits must be a mapping")
+    sizes: dict[str, int | None] = {}
+    for key in ("memory", "data", "address_space"):
+        try:
+            sizes[key] = parse_size(value[key]) if value.get(key) is not None else None
+        except ValueError as err:
+            raise ValueError(f"params.yaml: simulate.limits.{key}: {err}") from None
+
+    cpu_time = value.get("cpu_time")
+    if cpu_time is not None and (isinstance(cpu_time, bool) or not isinstance(cpu_time, int) or cpu_time < 1):
+        raise ValueError("params.yaml: simulate.limits.cpu_time must be a positive number of CPU seconds")
+    cpus = value.get("cpus")
+    if cpus is not None and cpus != "threads" and (
+        isinstance(cpus, bool) or not isinstance(cpus, (int, float)) or cpus <= 0
+    ):
+        raise ValueError('params.yaml: simulate.limits.cpus must be a positive number of cores or "threads"')
+    cgroup = value.get("cgroup")
+    return RunLimits(
+        memory=sizes["memory"],
+        data=sizes["data"],
+        address_space=sizes["address_space"],
+        cpu_time=cpu_time,
+        cpus=cpus,
+        cgroup=str(cgroup) if cgroup else None,
+    )
+
+
+def _enable_controllers(parent: Path, controllers: list[str]) -> None:
+    enabled = (parent / "cgroup.subtree_control").read_text().split()
+    missing = [c for c in controllers if c not in enabled]
+    if missing:
+        (parent / "cgroup.subtree_control").write_text(" ".join(f"+{c}" for c in missing))
+
+
+def _controllers(limits: RunLimits) -> list[str]:
+    return (["memory"] if limits.memory is not None else []) + (["cpu"] if limits.cpus is not None else [])
+
+
+def cgroup_parent_problem(parent: Path, controllers: list[str]) -> str | None:
+    """Why `parent` cannot hold the per-run groups; None when it can."""
+    try:
+        procs = (parent / "cgroup.procs").read_text().split()
+        available = (parent / "cgroup.controllers").read_text().split()
+    except OSError as err:
+        return f"not a cgroup v2 group ({err})"
+    if procs:
+        return "it has processes of its own; use an empty group delegated to this user"
+    missing = [c for c in controllers if c not in available]
+    if missing:
+        return f"controllers {missing} are not delegated to it"
+    if not os.access(parent, os.W_OK) or not os.access(parent / "cgroup.subtree_control", os.W_OK):
+        return "it is not writable by this user"
+    return None
+
+
+def check_cgroup_parent(limits: RunLimits) -> None:
+    """Raise ValueError unless the `memory`/`cpus` limits have a usable `limits.cgroup`."""
+    if not limits.needs_cgroup:
+        return
+    if limits.cgroup is None:
+        raise ValueError(
+            "params.yaml: simulate.limits.memory and simulate.limits.cpus need simulate.limits.cgroup, "
+            "a cgroup v2 group delegated to this user without processes of its own"
+        )
+    problem = cgroup_parent_problem(Path(limits.cgroup), _controllers(limits))
+    if problem is not None:
+        raise ValueError(f"params.yaml: simulate.limits.cgroup {limits.cgroup} cannot hold the runs: {problem}")
+
+
+def create_run_cgroup(limits: RunLimits, *, name: str, threads: int) -> Path | None:
+    """Create and configure the cgroup of one run; None (with a warning) when that is not possible."""
+    if limits.cgroup is None:
+        logger.warning("No simulate.limits.cgroup for the memory/cpus limits; applying rlimits only")
+        return None
+    parent = Path(limits.cgroup)
+    group = parent / name
+    try:
+        _enable_controllers(parent, _controllers(limits))
+        group.mkdir()
+        if limits.memory is not None:
+            (group / "memory.max").write_text(str(limits.memory))
+            (group / "memory.swap.max").write_text("0")
+        quota = limits.cpu_quota(threads)
+        if quota is not None:
+            period = 100_000
+            (group / "cpu.max").write_text(f"{int(quota * period)} {period}")
+    except OSError as err:
+        logger.warning("Cannot set up a cgroup under %s (%s); applying rlimits only", parent, err)
+        remove_cgroup(group)
+        return None
+    return group
+
+
+def cgroup_events(group: Path) -> dict[str, int]:
+    """Counters of the group's memory.events (e.g. oom_kill)."""
+    events: dict[str, int] = {}
+    try:
+        lines = (group / "memory.events").read_text().splitlines()
+    except OSError:
+        return events
+    for line in lines:
+        name, _, count = line.partition(" ")
+        if count.strip().isdigit():
+            events[name] = int(count)
+    return events
+
+
+def remove_cgroup(group: Path, *, attempts: int = 10) -> None:
+    """Remove a run's cgroup once its processes are gone."""
+    for _ in range(attempts):
+        try:
+            group.rmdir()
+            return
+        except FileNotFoundError:
+            return
+        except OSError:
+            # Still populated for a moment after the last process exits, or a
+            # plain directory with the interface files in it (not cgroupfs).
+            for child in group.glob("*"):
+                with contextlib.suppress(OSError):
+                    child.unlink()
+            time.sleep(0.05)
+    logger.warning("Could not remove cgroup %s", group)
+
+
+def limit_exec_prefix(limits: RunLimits, *, cgroup: Path | None) -> list[str]:
+    """Command prefix applying `limits` inside the child (see analysis/limitexec.py)."""
+    prefix = [sys.executable, "-I", str(LIMIT_EXEC)]
+    if limits.data is not None:
+        prefix += ["--data", str(limits.data)]
+    if limits.address_space is not None:
+        prefix += ["--as", str(limits.address_space)]
+    if limits.cpu_time is not None:
+        prefix += ["--cpu", str(limits.cpu_time), "--cpu-grace", str(CPU_KILL_GRACE)]
+    if cgroup is not None:
+        prefix += ["--cgroup", str(cgroup)]
+    return prefix + ["--"]
+
+
+def _killed_by(returncode: int, signum: int) -> bool:
+    # Directly (negative return code) or as reported by a shell wrapper (128 + signal).
+    return returncode in (-signum, 128 + signum)
+
+
+def _log_tail(log_path: Path) -> str:
+    try:
+        return read_log_tail(log_path, LOG_TAIL_BYTES)
+    except OSError:
+        return ""
+
+
+def classify_limit_exit(
+    returncode: int,
+    *,
+    limits: RunLimits,
+    events: Mapping[str, int],
+    rusage: Any = None,
+    log_path: Path | None = None,
+) -> str | None:
+    """"oom" or "cpu_limit" when the run ended because it hit one of `limits`, else None."""
+    if returncode == 0:
+        return None
+    if events.get("oom_kill", 0) > 0:
+        return "oom"
+    if limits.cpu_time is not None:
+        if _killed_by(returncode, signal.SIGXCPU):
+            return "cpu_limit"
+        cpu = (rusage.ru_utime + rusage.ru_stime) if isinstance(rusage, resource.struct_rusage) else 0.0
+        if _killed_by(returncode, signal.SIGKILL) and cpu >= limits.cpu_time:
+            return "cpu_limit"
+    if (limits.data is not None or limits.address_space is not None) and log_path is not None:
+        for line in _log_tail(log_path).splitlines():
+            if _ALLOCATION_FAILURE.search(line) and not _DEVICE_ERROR.search(line):
+                return "oom"
+    return None
@@ -0,0 +1,190 @@
+"""
+Log capture and reading.
+
+Logs may be written compressed as they are produced (`simulate --compress-logs
+gzip|zstd`): B4 physics logs print one line per layer per event and otherwise
+make runs/ huge for DVC. The compression follows from the file suffix (.gz,
+.zst), and every reader goes through `open_log`, which decompresses on the fly.
+Extraction streams the lines through the extractors' accumulators, so a log is
+never decompressed to disk or held in memory as a whole.
+
+Appending (e.g. the trailer written after the run) adds a new gzip member or
+zstd frame; both formats read concatenated members as one stream. zstd needs
+Python 3.14 (compression.zstd) or the zstandard package.
+"""
+
+from __future__ import annotations
+
+import collections
+import gzip
+import io
+import logging
+import threading
+import time
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+from typing import IO, Any
+
+from analysis.extractors import ACCUMULATORS, Extractor, LogAccumulator
+
+logger = logging.getLogger(__name__)
+
+LOG_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+LOG_COMPRESSIONS = tuple(LOG_SUFFIXES)
+
+# Compressed output is flushed at least this often, so a growing log stays
+# visible to the watchdog and readable after a crash.
+FLUSH_INTERVAL = 5.0
+
+
+def log_compression(path: Path) -> str | None:
+    """Compression of a log file, from its suffix."""
+    for compression, suffix in LOG_SUFFIXES.items():
+        if path.name.endswith(suffix):
+            return compression
+    return None
+
+
+def _zstd() -> Any:
+    try:
+        from compression import zstd  # type: ignore[import-not-found]  # Python >= 3.14
+
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard  # type: ignore[import-not-found]
+
+        return zstandard
+    except ImportError:
+        raise RuntimeError("zstd logs need Python 3.14 or the zstandard package") from None
+
+
+def open_log_writer(path: Path, *, append: bool = False) -> IO[bytes]:
+    """Binary writer of a log, compressing according to its suffix."""
+    mode = "ab" if append else "wb"
+    compression = log_compression(path)
+    if compression == "gzip":
+        return gzip.open(path, mode, compresslevel=6)
+    if compression == "zstd":
+        return _zstd().open(path, mode)
+    return path.open(mode)
+
+
+def open_log(path: Path) -> IO[str]:
+    """Text reader of a log, decompressing on the fly according to its suffix."""
+    compression = log_compression(path)
+    if compression == "gzip":
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    if compression == "zstd":
+        zstd = _zstd()
+        if zstd.__name__ == "compression.zstd":
+            return zstd.open(path, "rt", encoding="utf-8", errors="replace")
+        # zstandard.open() would stop at the end of the first frame.
+        reader = zstd.ZstdDecompressor().stream_reader(path.open("rb"), read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8", errors="replace")
+    return path.open(encoding="utf-8", errors="replace")
+
+
+def _raw_lines(path: Path) -> Iterator[str]:
+    with open_log(path) as f:
+        try:
+            yield from f
+        except EOFError:
+            # The run was killed before the compressor wrote its end marker.
+            logger.warning("Compressed log %s ends early; reading what was flushed", path)
+
+
+def iter_log_lines(path: Path) -> Iterator[str]:
+    """Lines of a log without their line endings, like `str.splitlines`."""
+    for line in _raw_lines(path):
+        yield line.rstrip("\r\n")
+
+
+def read_log(path: Path) -> str:
+    return "".join(_raw_lines(path))
+
+
+def read_log_tail(path: Path, nbytes: int) -> str:
+    """About the last `nbytes` characters of a log."""
+    if log_compression(path) is None:
+        with path.open("rb") as f:
+            f.seek(0, 2)
+            f.seek(max(0, f.tell() - nbytes))
+            return f.read().decode(errors="replace")
+    # A compressed stream cannot seek from the end: keep a rolling window.
+    window: collections.deque[str] = collections.deque()
+    size = 0
+    for line in _raw_lines(path):
+        window.append(line)
+        size += len(line)
+        while size - len(window[0]) >= nbytes:
+            size -= len(window.popleft())
+    return "".join(window)
+
+
+def extract_log(path: Path, extractor: Extractor) -> list[dict] | dict:
+    """Run `extractor` over a (possibly compressed) log, streaming it line by line."""
+    factory = ACCUMULATORS.get(extractor)
+    if factory is None:
+        # No incremental form: the extractor needs the whole text.
+        return extractor(read_log(path))
+    accumulator = factory()
+    for line in iter_log_lines(path):
+        accumulator.feed(line)
+    return accumulator.result()
+
+
+class LogPump:
+    """Copy a child's output into a log file while feeding it to extractors.
+
+    Runs in a daemon thread; `join()` returns the accumulated results keyed like
+    the `accumulators` mapping once the child closes its output. With a
+    `flush_interval` the sink is flushed after a line once that many seconds
+    passed since the last flush (0: after every line); without one it is only
+    flushed when closed.
+    """
+
+    def __init__(
+        self,
+        source: IO[bytes],
+        sink: IO[bytes],
+        accumulators: Mapping[str, LogAccumulator],
+        *,
+        flush_interval: float | None = None,
+    ) -> None:
+        self.source = source
+        self.sink = sink
+        self.accumulators = dict(accumulators)
+        self.flush_interval = flush_interval
+        self.lines = 0
+        self._error: Exception | None = None
+        self._thread = threading.Thread(target=self._loop, name="log-pump", daemon=True)
+
+    def start(self) -> LogPump:
+        self._thread.start()
+        return self
+
+    def _loop(self) -> None:
+        last_flush = time.monotonic()
+        try:
+            for raw in iter(self.source.readline, b""):
+                self.sink.write(raw)
+                self.lines += 1
+                if self.flush_interval is not None and time.monotonic() - last_flush >= self.flush_interval:
+                    self.sink.flush()
+                    last_flush = time.monotonic()
+                if self.accumulators:
+                    line = raw.decode("utf-8", errors="replace")
+                    for accumulator in self.accumulators.values():
+                        accumulator.feed(line)
+        except Exception as err:  # noqa: BLE001 - a thread cannot raise; join() re-raises it
+            self._error = err
+        finally:
+            self.source.close()
+
+    def join(self) -> dict[str, Any]:
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return {name: acc.result() for name, acc in self.accumulators.items()}
@@ -0,0 +1,124 @@
+"""
+Machine-noise probes around sweeps.
+
+A throughput that moves by 8% between two days may come from the stack or from
+the node (thermal throttling, a noisy neighbour, memory bandwidth taken by
+another job). With `simulate --noise-probe`, a short fixed microbenchmark runs
+before the sweep, after it and optionally after every N runs:
+- cpu_score: SHA-256 over an in-cache buffer [MB/s];
+- memory_score: copies of a buffer larger than the last-level cache [MB/s].
+Each score is the median of a few rounds. Both kernels take well under a second.
+
+The probes are recorded in the sweep metadata under "noise_probes". Every run
+records when it started ("started_at"). `extract` attributes each run the mean
+scores of the probes around it (node_cpu_score, node_memory_score), and the
+report flags or normalizes runs taken while the node was measurably slower
+than its best probe. Configured per benchmark in params.yaml:
+
+    simulate:
+      noise_probe:
+        every: 20          # also probe after every 20 runs (default: before and after only)
+        rounds: 5
+        threshold: 0.05    # the report flags runs on a node >5% slower than its best probe
+"""
+
+from __future__ import annotations
+
+import hashlib
+import statistics
+import time
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+CPU_BLOCK_BYTES = 1 << 20
+CPU_ROUND_BYTES = 64 << 20
+MEMORY_BYTES = 128 << 20
+
+# Per-run columns added to the extracted CSVs.
+NODE_SCORE_FIELDS = ("node_cpu_score", "node_memory_score")
+
+
+@dataclass(frozen=True)
+class NoiseProbe:
+    # Runs between two probes during the sweep; None probes before and after only.
+    every: int | None = None
+    rounds: int = 5
+    # Relative slowdown against the best probe from which runs are flagged.
+    threshold: float = 0.05
+
+
+def parse_noise_probe(value: Any) -> NoiseProbe | None:
+    """Build a NoiseProbe from `simulate.noise_probe` in params.yaml (None when disabled)."""
+    if value is None or value is True:
+        return NoiseProbe()
+    if value is False:
+        return None
+    if not isinstance(value, dict):
+        raise TypeError("params.yaml: simulate.noise_probe must be a boolean or a mapping")
+    defaults = NoiseProbe()
+    every = value.get("every")
+    probe = NoiseProbe(
+        every=int(every) if every is not None else None,
+        rounds=int(value.get("rounds", defaults.rounds)),
+        threshold=float(value.get("threshold", defaults.threshold)),
+    )
+    if probe.every is not None and probe.every < 1:
+        raise ValueError("params.yaml: simulate.noise_probe.every must be >= 1")
+    if probe.rounds < 1:
+        raise ValueError("params.yaml: simulate.noise_probe.rounds must be >= 1")
+    if not 0 < probe.threshold < 1:
+        raise ValueError("params.yaml: simulate.noise_probe.threshold must be between 0 and 1")
+    return probe
+
+
+def _cpu_round(block: bytes) -> float:
+    digest = hashlib.sha256()
+    start = time.perf_counter()
+    for _ in range(CPU_ROUND_BYTES // len(block)):
+        digest.update(block)
+    return CPU_ROUND_BYTES / 1e6 / (time.perf_counter() - start)
+
+
+def _memory_round(src: bytearray, dst: bytearray) -> float:
+    start = time.perf_counter()
+    dst[:] = src
+    return len(src) / 1e6 / (time.perf_counter() - start)
+
+
+def run_noise_probe(*, label: str, rounds: int = 5) -> dict[str, Any]:
+    """Run the microbenchmark once; returns the probe record for the metadata."""
+    block = bytes(range(256)) * (CPU_BLOCK_BYTES // 256)
+    src, dst = bytearray(b"\x01") * MEMORY_BYTES, bytearray(MEMORY_BYTES)
+    # Touch the destination once so page faults are not timed.
+    dst[:] = src
+    started_at = time.time()
+    cpu = [_cpu_round(block) for _ in range(rounds)]
+    memory = [_memory_round(src, dst) for _ in range(rounds)]
+    return {
+        "label": label,
+        "time": round(started_at, 3),
+        "cpu_score": statistics.median(cpu),
+        "memory_score": statistics.median(memory),
+    }
+
+
+def node_scores(probes: Sequence[Mapping[str, Any]], run: Mapping[str, Any]) -> dict[str, float]:
+    """Mean scores of the probes just before and just after a run.
+
+    Empty when the run did not record its start or no probe precedes it (e.g.
+    a run restored from another run dir).
+    """
+    started = run.get("started_at")
+    if not isinstance(started, (int, float)) or not probes:
+        return {}
+    ended = started + float(run.get("execution_time") or 0.0)
+    timed = sorted((p for p in probes if isinstance(p.get("time"), (int, float))), key=lambda p: p["time"])
+    before = [p for p in timed if p["time"] <= started]
+    if not before:
+        return {}
+    around = [before[-1]] + [p for p in timed if p["time"] >= ended][:1]
+    return {
+        field: statistics.fmean(float(p[field.removeprefix("node_")]) for p in around)
+        for field in NODE_SCORE_FIELDS
+    }
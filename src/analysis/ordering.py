@@ -0,0 +1,126 @@
+"""
+Job ordering policies for simulation sweeps.
+
+Durations are predicted from earlier runs of the same benchmark (any run_id
+under runs/<benchmark>/). Combinations never seen before fall back to a linear
+model in PARTICLES_PER_EVENT x NUMBER_OF_EVENTS, fitted per simulation file on
+the same history.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import statistics
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from analysis.journal import load_simulation_metadata
+
+logger = logging.getLogger(__name__)
+
+ORDER_POLICIES = ("grid", "longest-first", "shortest-first", "interleaved")
+
+
+def _history_key(simulation_file: str | Path, parameters: dict[str, Any]) -> str:
+    # Keyed by file name so history survives a moved checkout.
+    return json.dumps([Path(simulation_file).name, parameters], sort_keys=True)
+
+
+def work_units(parameters: dict[str, Any]) -> float:
+    """Amount of simulated work: particles per event times number of events."""
+    units = 1.0
+    for name in ("PARTICLES_PER_EVENT", "NUMBER_OF_EVENTS"):
+        try:
+            units *= float(parameters.get(name, 1))
+        except (TypeError, ValueError):
+            pass
+    return max(units, 1.0)
+
+
+@dataclass
+class DurationModel:
+    # Measured durations per (simulation file name, parameters).
+    observed: dict[str, list[float]] = field(default_factory=dict)
+    # Seconds per work unit, per simulation file name.
+    rates: dict[str, float] = field(default_factory=dict)
+    default_rate: float = 1.0
+
+    def predict(self, simulation_file: str | Path, parameters: dict[str, Any]) -> float:
+        durations = self.observed.get(_history_key(simulation_file, parameters))
+        if durations:
+            return statistics.median(durations)
+        rate = self.rates.get(Path(simulation_file).name, self.default_rate)
+        return rate * work_units(parameters)
+
+
+def fit_duration_model(entries: Sequence[dict[str, Any]]) -> DurationModel:
+    model = DurationModel()
+    rates: dict[str, list[float]] = {}
+    for entry in entries:
+        duration = entry.get("execution_time")
+        parameters = entry.get("parameters")
+        sim = entry.get("simulation_file")
+        if entry.get("success") is not True or not isinstance(duration, (int, float)):
+            continue
+        if not isinstance(parameters, dict) or not sim:
+            continue
+        model.observed.setdefault(_history_key(sim, parameters), []).append(float(duration))
+        rates.setdefault(Path(sim).name, []).append(float(duration) / work_units(parameters))
+
+    model.rates = {name: statistics.median(values) for name, values in rates.items()}
+    if model.rates:
+        model.default_rate = statistics.median(model.rates.values())
+    return model
+
+
+def load_history(benchmark_runs_dir: Path) -> list[dict[str, Any]]:
+    """Collect run entries from every run dir of a benchmark."""
+    entries: list[dict[str, Any]] = []
+    if not benchmark_runs_dir.is_dir():
+        return entries
+    for run_dir in sorted(p for p in benchmark_runs_dir.iterdir() if p.is_dir()):
+        try:
+            runs = load_simulation_metadata(run_dir).get("runs", [])
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError, TypeError):
+            # A torn metadata file, or one of an older layout.
+            logger.warning("Skipping unreadable history in %s", run_dir)
+            continue
+        if isinstance(runs, list):
+            entries.extend(r for r in runs if isinstance(r, dict))
+    return entries
+
+
+def order_jobs[T](items: Sequence[T], *, policy: str, duration: Callable[[T], float]) -> list[T]:
+    """Reorder `items` according to `policy` using predicted durations.
+
+    - grid: keep the expansion order.
+    - longest-first: minimises makespan when jobs run concurrently.
+    - shortest-first: quickest feedback from a fresh sweep.
+    - interleaved: alternate longest and shortest, spreading long jobs over the sweep.
+    """
+    if policy not in ORDER_POLICIES:
+        raise ValueError(f"order policy must be one of {ORDER_POLICIES}, got {policy!r}")
+    if policy == "grid":
+        return list(items)
+
+    # Python's sort is stable, so ties keep the grid order.
+    longest = sorted(items, key=duration, reverse=True)
+    if policy == "longest-first":
+        return longest
+    if policy == "shortest-first":
+        return sorted(items, key=duration)
+
+    out: list[T] = []
+    lo, hi = 0, len(longest) - 1
+    while lo <= hi:
+        out.append(longest[lo])
+        if lo != hi:
+            out.append(longest[hi])
+        lo += 1
+        hi -= 1
+    return out
@@ -0,0 +1,116 @@
+"""
+Page-cache warming of the Geant4 data sets before timing runs.
+
+The first run of a sweep otherwise pays cold reads of G4EMLOW, G4PARTICLEXS
+and the other data sets (over CVMFS), which makes its execution_time an
+outlier. With `simulate --warm-cache`, every directory named by a `G4*DATA`
+variable of the Gaussino runtime environment is read once, with several
+threads in parallel, right before the first job that actually runs (not at all
+when every job is resumed or restored from the result cache). Each file is announced with
+POSIX_FADV_WILLNEED and then read through, since readahead hints alone are not
+honoured by every filesystem (FUSE in particular).
+
+The sweep metadata records under "page_cache" whether warming happened, and
+the bytes, files and time it took.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import time
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DATASET_VARIABLE = re.compile(r"^G4\w*DATA$")
+
+DEFAULT_THREADS = 8
+CHUNK_SIZE = 1 << 20
+
+
+@dataclass
+class WarmResult:
+    warmed: bool
+    directories: list[str] = field(default_factory=list)
+    files: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    # Files that could not be read (permission, vanished, I/O error).
+    errors: int = 0
+
+    def to_metadata(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def dataset_dirs(env: Mapping[str, str]) -> list[Path]:
+    """Existing directories named by `G4*DATA` variables, without duplicates."""
+    dirs: list[Path] = []
+    for name in sorted(env):
+        if not DATASET_VARIABLE.match(name):
+            continue
+        path = Path(env[name])
+        if path.is_dir() and path not in dirs:
+            dirs.append(path)
+        elif not path.is_dir():
+            logger.warning("%s=%s is not a directory; not warming it", name, path)
+    return dirs
+
+
+def _files(dirs: Sequence[Path]) -> list[Path]:
+    files: list[Path] = []
+    for directory in dirs:
+        for root, _, names in os.walk(directory):
+            files.extend(Path(root) / name for name in names)
+    return files
+
+
+def _read_file(path: Path) -> int:
+    """Pull one file into the page cache; returns the bytes read."""
+    buffer = bytearray(CHUNK_SIZE)
+    total = 0
+    with path.open("rb", buffering=0) as f:
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        except (AttributeError, OSError):  # pragma: no cover - non-Linux or unsupported fs
+            pass
+        while n := f.readinto(buffer):
+            total += n
+    return total
+
+
+def warm_page_cache(dirs: Sequence[Path], *, threads: int = DEFAULT_THREADS) -> WarmResult:
+    """Read every file below `dirs` with `threads` parallel readers."""
+    if not dirs:
+        return WarmResult(warmed=False)
+    start = time.perf_counter()
+    files = _files(dirs)
+    result = WarmResult(warmed=True, directories=[str(d) for d in dirs], files=len(files))
+
+    def read(path: Path) -> int | None:
+        try:
+            return _read_file(path)
+        except OSError as err:
+            logger.debug("Could not warm %s: %s", path, err)
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as pool:
+        for n in pool.map(read, files):
+            if n is None:
+                result.errors += 1
+            else:
+                result.bytes += n
+    result.seconds = time.perf_counter() - start
+    logger.info(
+        "Warmed %.1f MB of Geant4 data (%s files in %s directories) in %.1f s",
+        result.bytes / 1e6,
+        result.files,
+        len(dirs),
+        result.seconds,
+    )
+    return result
@@ -0,0 +1,202 @@
+"""
+Randomized AdePT/Geant4 pairs with drift correction.
+
+In grid order the AdePT run of a combination always precedes its Geant4 run,
+so thermal or background-load drift biases every speedup ratio the same way.
+With a pair order, the two runs of a combination (and repeat) run back to back
+and their order is chosen by a seeded RNG:
+- random: each pair independently;
+- abba: randomly for the first repeat, then alternating, so repeats form
+  ABBA blocks.
+
+The seed is recorded in the sweep metadata ("pair_order"), and every run
+records whether it ran first or second in its pair ("pair_position"). Each pair
+is one scheduling unit: its two runs never overlap in a concurrent sweep and a
+noise probe never falls between them. Queue workers claim runs one at a time,
+so pair orders are not supported with them. Set per benchmark in params.yaml or
+with `simulate --pair-order`:
+
+    simulate:
+      pair_order:
+        mode: abba
+        seed: 1234          # default: drawn at random (and recorded)
+
+Under linear drift the second run of a pair is slowed by about the same factor
+in every pair, so log(AdePT / Geant4) = log(ratio) +/- drift depending on which
+ran second. The report estimates that drift from pairs of both orientations
+and removes it from the paired ratios; in ABBA blocks it cancels exactly.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import random
+import secrets
+import statistics
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import pandas as pd
+
+PAIR_ORDERS = ("fixed", "random", "abba")
+
+# Metric whose AdePT/Geant4 ratio the report computes per pair.
+PAIRED_METRIC = "time_per_event"
+
+
+@dataclass(frozen=True)
+class PairOrder:
+    mode: str = "fixed"
+    seed: int | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "fixed"
+
+    def to_metadata(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def parse_pair_order(value: Any, *, mode: str | None = None) -> PairOrder:
+    """Build a PairOrder from `simulate.pair_order` in params.yaml; `mode` (from the CLI) wins."""
+    if value is None:
+        value = {}
+    elif isinstance(value, str):
+        value = {"mode": value}
+    elif not isinstance(value, dict):
+        raise TypeError("params.yaml: simulate.pair_order must be a mode or a mapping (mode, seed)")
+    order = PairOrder(mode=mode or value.get("mode", "fixed"), seed=value.get("seed"))
+    if order.mode not in PAIR_ORDERS:
+        raise ValueError(f"params.yaml: simulate.pair_order.mode must be one of {PAIR_ORDERS}")
+    if order.seed is not None and (isinstance(order.seed, bool) or not isinstance(order.seed, int)):
+        raise ValueError("params.yaml: simulate.pair_order.seed must be an integer")
+    return order
+
+
+def with_seed(order: PairOrder) -> PairOrder:
+    """`order` with a random seed drawn if it has none, so that it can be recorded."""
+    if not order.enabled or order.seed is not None:
+        return order
+    return PairOrder(mode=order.mode, seed=secrets.randbits(32))
+
+
+def order_pairs[T](
+    items: Sequence[T],
+    *,
+    order: PairOrder,
+    combination: Callable[[T], Any],
+    repeat: Callable[[T], int],
+    is_adept: Callable[[T], bool],
+) -> list[tuple[T, int | None]]:
+    """Put the AdePT and Geant4 item of every (combination, repeat) back to back.
+
+    Returns the items with their position in the pair (0: first, 1: second).
+    Pairs follow the first appearance of their combination, then the repeat.
+    Items without a partner keep their place among the pairs, with position None.
+    """
+    if not order.enabled:
+        return [(item, None) for item in items]
+
+    groups: dict[tuple[str, int], list[T]] = {}
+    first_seen: dict[str, int] = {}
+    for item in items:
+        combo = json.dumps(combination(item), sort_keys=True, default=str)
+        first_seen.setdefault(combo, len(first_seen))
+        groups.setdefault((combo, repeat(item)), []).append(item)
+
+    out: list[tuple[T, int | None]] = []
+    for (combo, rep), group in sorted(groups.items(), key=lambda kv: (first_seen[kv[0][0]], kv[0][1])):
+        adept = [item for item in group if is_adept(item)]
+        others = [item for item in group if not is_adept(item)]
+        if len(adept) != 1 or len(others) != 1:
+            out.extend((item, None) for item in group)
+            continue
+        if order.mode == "abba":
+            adept_first = random.Random(f"{order.seed}:{combo}").random() < 0.5
+            adept_first = adept_first if rep % 2 == 0 else not adept_first
+        else:
+            adept_first = random.Random(f"{order.seed}:{combo}:{rep}").random() < 0.5
+        pair = adept + others if adept_first else others + adept
+        out.extend(zip(pair, (0, 1)))
+    return out
+
+
+def pair_units[T](items: Sequence[T], *, position: Callable[[T], int | None]) -> list[list[T]]:
+    """Group items ordered by order_pairs into scheduling units.
+
+    The first and second run of a pair form one unit, to be run back to back;
+    every other item is a unit of its own.
+    """
+    units: list[list[T]] = []
+    for item in items:
+        if position(item) == 1 and units and len(units[-1]) == 1 and position(units[-1][0]) == 0:
+            units[-1].append(item)
+        else:
+            units.append([item])
+    return units
+
+
+def paired_ratio_table(
+    df: pd.DataFrame, *, parameters: Sequence[str], metric: str = PAIRED_METRIC
+) -> tuple[pd.DataFrame, dict[str, Any]]:
+    """Drift-corrected AdePT/Geant4 ratios of `metric` per parameter combination.
+
+    `df` is the performance CSV and `parameters` the names of its parameter
+    columns. Returns one row per combination and a summary with the estimated
+    drift (relative slowdown of the second run of a pair).
+    """
+    params = [c for c in parameters if c in df.columns]
+    keys = params + (["repeat"] if "repeat" in df.columns else [])
+    runs = df[df["pair_position"].notna() & df[metric].notna()]
+    pairs = pd.merge(
+        runs[runs["with_adept"] == True][[*keys, metric, "pair_position"]],
+        runs[runs["with_adept"] == False][[*keys, metric]],
+        on=keys,
+        suffixes=("_adept", "_geant4"),
+    )
+    pairs = pairs[(pairs[f"{metric}_adept"] > 0) & (pairs[f"{metric}_geant4"] > 0)]
+    if pairs.empty:
+        return pd.DataFrame(), {"metric": metric, "pairs": 0}
+
+    log_ratio = (pairs[f"{metric}_adept"] / pairs[f"{metric}_geant4"]).map(math.log)
+    # +1 when AdePT ran second (and so absorbed the drift of the pair).
+    orientation = pairs["pair_position"].map(lambda p: 1 if p == 1 else -1)
+    pairs = pairs.assign(log_ratio=log_ratio, orientation=orientation)
+
+    def half_difference(sub: pd.DataFrame) -> float | None:
+        later = sub.loc[sub["orientation"] == 1, "log_ratio"]
+        earlier = sub.loc[sub["orientation"] == -1, "log_ratio"]
+        if later.empty or earlier.empty:
+            return None
+        return (later.mean() - earlier.mean()) / 2
+
+    # Within combinations when some have pairs of both orientations, else over all pairs.
+    grouped = pairs.groupby(params, dropna=False) if params else [((), pairs)]
+    within = [d for _, sub in grouped if (d := half_difference(sub)) is not None]
+    drift = statistics.fmean(within) if within else half_difference(pairs)
+    corrected = drift is not None
+    pairs["corrected_log_ratio"] = pairs["log_ratio"] - pairs["orientation"] * (drift or 0.0)
+
+    rows: list[dict[str, Any]] = []
+    grouped = pairs.groupby(params, dropna=False) if params else [((), pairs)]
+    for key, sub in grouped:
+        values = key if isinstance(key, tuple) else (key,)
+        rows.append(
+            {
+                **dict(zip(params, values)),
+                "pairs": len(sub),
+                "adept_first": int((sub["orientation"] == -1).sum()),
+                "raw_ratio": math.exp(sub["log_ratio"].mean()),
+                "ratio": math.exp(sub["corrected_log_ratio"].mean()),
+            }
+        )
+    summary = {
+        "metric": metric,
+        "pairs": len(pairs),
+        "drift_corrected": corrected,
+        "drift_per_pair": math.exp(drift) - 1 if drift is not None else None,
+        "geomean_ratio": math.exp(pairs["corrected_log_ratio"].mean()),
+    }
+    return pd.DataFrame(rows), summary
@@ -0,0 +1,184 @@
+"""
+End-to-end benchmark of the pipeline's own overhead, using the fake Gaussino.
+
+Each scale gets a throw-away workspace (a git repo with a generated
+params.yaml and the benchmark's simulation files). The manifest, simulate,
+extract and report stages run in it against analysis.fakegaussino. The fake's
+event loop takes no time, so only the pipeline itself is measured, and its log
+volume is multiplied by the scale:
+
+    python -m analysis.pipeline_bench --scales 1 10 100 --out bench.json
+
+At scale 1 with the default 5000 events, logs have the size of today's
+B4/B2 runs. Lower --events for a quick check; `--compress-logs gzip` measures
+the sweep with compressed logs (log_bytes is then the compressed size).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from analysis.cli import main as cli_main
+from analysis.fakegaussino import write_launcher
+from analysis.logio import LOG_COMPRESSIONS, LOG_SUFFIXES
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("manifest", "simulate", "extract", "report")
+
+
+@contextmanager
+def _environ(**values: str) -> Iterator[None]:
+    previous = {k: os.environ.get(k) for k in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def prepare_workspace(
+    workspace: Path,
+    *,
+    benchmark: str,
+    events: int,
+    particles: Sequence[int],
+    source_root: Path,
+) -> Path:
+    """Create a git repo with a params.yaml driving the fake Gaussino. Returns params.yaml."""
+    bench_dir = workspace / "benchmarks" / benchmark
+    source = source_root / "benchmarks" / benchmark
+    if source.is_dir():
+        shutil.copytree(source, bench_dir)
+    else:
+        bench_dir.mkdir(parents=True)
+    for name in ("adept_simulation.py", "geant4_simulation.py"):
+        if not (bench_dir / name).exists():
+            (bench_dir / name).write_text("# placeholder for the fake Gaussino\n")
+
+    executable = write_launcher(workspace / "fake-gaussino")
+    params = {
+        "benchmarks_selected": [benchmark],
+        "gaussino_executable": str(executable),
+        "benchmarks": {
+            benchmark: {
+                "options_files": [],
+                "simulation_files": [
+                    f"benchmarks/{benchmark}/adept_simulation.py",
+                    f"benchmarks/{benchmark}/geant4_simulation.py",
+                ],
+                "parameters": {
+                    "PARTICLES_PER_EVENT": list(particles),
+                    "NUMBER_OF_THREADS": [1],
+                    "NUMBER_OF_EVENTS": [events],
+                },
+            }
+        },
+    }
+    params_path = workspace / "params.yaml"
+    params_path.write_text(yaml.safe_dump(params, sort_keys=False))
+
+    git = ["git", "-c", "user.name=bench", "-c", "user.email=bench@localhost"]
+    subprocess.run(git + ["init", "-q"], cwd=workspace, check=True)
+    subprocess.run(git + ["add", "-A"], cwd=workspace, check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "pipeline benchmark"], cwd=workspace, check=True)
+    return params_path
+
+
+def _log_bytes(path: Path) -> int:
+    """Size of every run log under `path`, plain or compressed."""
+    patterns = ["*.log", *(f"*.log{suffix}" for suffix in LOG_SUFFIXES.values())]
+    return sum(p.stat().st_size for pattern in patterns for p in path.rglob(pattern) if p.is_file())
+
+
+def run_pipeline_benchmark(
+    *,
+    workdir: Path,
+    scales: Sequence[float],
+    events: int = 5000,
+    benchmark: str = "b4_layered_calorimeter",
+    particles: Sequence[int] = (1, 1000),
+    source_root: Path | None = None,
+    compress_logs: str | None = None,
+) -> list[dict[str, Any]]:
+    """Time every pipeline stage at each log-volume scale."""
+    source_root = source_root or Path.cwd()
+    results: list[dict[str, Any]] = []
+    for scale in scales:
+        workspace = workdir / f"scale-{scale:g}"
+        params_path = prepare_workspace(
+            workspace, benchmark=benchmark, events=events, particles=particles, source_root=source_root
+        )
+        common = ["--params", str(params_path), "--repo-root", str(workspace)]
+        commands = {
+            "manifest": ["manifest", *common, "--out-root", str(workspace / "manifests"), "--no-patches"],
+            "simulate": ["simulate", *common, *(["--compress-logs", compress_logs] if compress_logs else [])],
+            "extract": ["extract", *common],
+            "report": ["report", *common],
+        }
+        with _environ(FAKE_GAUSSINO_LOG_SCALE=f"{scale:g}", FAKE_GAUSSINO_SECONDS_PER_UNIT="0"):
+            for stage in STAGES:
+                start = time.perf_counter()
+                cli_main(commands[stage])
+                seconds = time.perf_counter() - start
+                results.append(
+                    {
+                        "scale": scale,
+                        "stage": stage,
+                        "seconds": seconds,
+                        "log_bytes": _log_bytes(workspace / "runs"),
+                    }
+                )
+                logger.info("scale=%g %s: %.2f s", scale, stage, seconds)
+    return results
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="analysis.pipeline_bench", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--benchmark", default="b4_layered_calorimeter")
+    parser.add_argument("--particles", type=int, nargs="+", default=[1, 1000])
+    parser.add_argument("--compress-logs", choices=LOG_COMPRESSIONS, default=None)
+    parser.add_argument("--workdir", default="", help="Keep workspaces here (default: a temp dir)")
+    parser.add_argument("--out", default="", help="Write the timings as JSON")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    with tempfile.TemporaryDirectory(prefix="pipeline-bench-") as tmp:
+        results = run_pipeline_benchmark(
+            workdir=Path(args.workdir) if args.workdir else Path(tmp),
+            scales=args.scales,
+            events=args.events,
+            benchmark=args.benchmark,
+            particles=args.particles,
+            compress_logs=args.compress_logs,
+        )
+
+    print(f"{'scale':>7} {'stage':<10} {'seconds':>10} {'log MB':>10}")
+    for row in results:
+        print(f"{row['scale']:>7g} {row['stage']:<10} {row['seconds']:>10.2f} {row['log_bytes'] / 1e6:>10.1f}")
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
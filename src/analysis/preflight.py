@@ -0,0 +1,106 @@
+"""
+Preflight smoke run before a sweep.
+
+A wrong options path or a broken stack otherwise only shows up once the first
+full-size run has failed, sometimes only at extraction. Before the first job of
+the sweep starts (not at all when every job is resumed or restored from the
+result cache), `simulate` checks that every options and simulation file exists,
+then runs each simulation file once with a tiny event count and one particle
+(the other parameters take their first grid value). Every smoke run must exit
+cleanly and write the performance lines read by `performance_extractor`; with
+`expect_root` it must also write a ROOT file (otherwise a missing one is only
+logged, as for every run). Otherwise the sweep is aborted with a PreflightError.
+
+On by default from the CLI (`simulate --no-preflight` skips it); configured per
+benchmark in params.yaml:
+
+    simulate:
+      preflight:
+        events: 2
+        expect_root: false
+
+`preflight: false` disables it for a benchmark. Smoke-run logs are kept in
+<run_dir>/preflight/.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from analysis.extractors import PERFORMANCE_METRICS, performance_extractor
+from analysis.logio import extract_log
+
+PREFLIGHT_DIR = "preflight"
+
+# Parameters forced to tiny values in the smoke run.
+SMOKE_PARAMETERS = {"PARTICLES_PER_EVENT": 1, "NUMBER_OF_THREADS": 1}
+EVENTS_PARAMETER = "NUMBER_OF_EVENTS"
+
+
+class PreflightError(RuntimeError):
+    """The preflight checks failed; the sweep was not started."""
+
+
+@dataclass(frozen=True)
+class PreflightCheck:
+    events: int = 2
+    # Every smoke run must leave a .root file behind.
+    expect_root: bool = False
+
+
+def parse_preflight(value: Any) -> PreflightCheck | None:
+    """Build a PreflightCheck from `simulate.preflight` in params.yaml (None when disabled)."""
+    if value is None or value is True:
+        return PreflightCheck()
+    if value is False:
+        return None
+    if not isinstance(value, dict):
+        raise TypeError("params.yaml: simulate.preflight must be a boolean or a mapping")
+    defaults = PreflightCheck()
+    check = PreflightCheck(
+        events=int(value.get("events", defaults.events)),
+        expect_root=bool(value.get("expect_root", defaults.expect_root)),
+    )
+    if check.events < 1:
+        raise ValueError("params.yaml: simulate.preflight.events must be >= 1")
+    return check
+
+
+def smoke_parameters(parameters: Mapping[str, list[Any]], check: PreflightCheck) -> dict[str, Any]:
+    """First grid value of every parameter, with the smoke-run sizes forced."""
+    smoke = {name: values[0] for name, values in parameters.items() if values}
+    smoke.update({name: value for name, value in SMOKE_PARAMETERS.items() if name in parameters})
+    smoke[EVENTS_PARAMETER] = check.events
+    return smoke
+
+
+def missing_inputs(paths: Sequence[Path]) -> list[str]:
+    return [f"missing input file: {path}" for path in paths if not path.is_file()]
+
+
+def smoke_run_problems(
+    *,
+    success: bool,
+    log_path: Path | None,
+    root_files: Sequence[Path],
+    check: PreflightCheck,
+) -> list[str]:
+    """What is wrong with a finished smoke run (empty when it passed)."""
+    if log_path is None:
+        return ["could not be started"]
+    problems: list[str] = []
+    if not success:
+        problems.append(f"failed (see {log_path})")
+    try:
+        performance = extract_log(log_path, performance_extractor)
+    except OSError:
+        performance = {}
+    missing = [metric for metric in PERFORMANCE_METRICS if metric not in performance]
+    if missing:
+        problems.append(f"log lacks the performance lines for {', '.join(missing)} (see {log_path})")
+    if check.expect_root and not root_files:
+        problems.append("wrote no .root file")
+    return problems
@@ -0,0 +1,306 @@
+"""
+Sampling profiles of Gaussino runs, stored as collapsed ("folded") stacks.
+
+Tools:
+- perf: the command line is wrapped in `perf record -g`; `perf script` output
+  is folded once the run is over and the raw perf.data removed.
+- stack-sampler: a local stand-in for hosts without perf. A thread attaches
+  `eu-stack` (or `gdb`) to every process of the run's tree at a fixed interval;
+  without either debugger it records per-thread scheduler states and kernel
+  wait channels, which still shows where threads block.
+- auto: perf when it is on PATH, the stand-in otherwise.
+
+Configured per benchmark in params.yaml (the CLI `--profile` overrides the tool):
+
+    simulate:
+      profile:
+        tool: auto
+        frequency: 99            # perf sampling rate [Hz]
+        interval: 0.5            # stand-in sampling period [s]
+        only:                    # profile only these combinations (all if omitted)
+          PARTICLES_PER_EVENT: [1000]
+
+Every profiled run gets `<base>.folded` next to its log: one "frame;frame;... count"
+line per distinct stack, outermost frame first.
+"""
+
+from __future__ import annotations
+
+import collections
+import json
+import logging
+import re
+import shutil
+import subprocess
+import threading
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from analysis.journal import load_simulation_metadata
+from analysis.sampler import PROC, process_tree
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOOLS = ("off", "auto", "perf", "stack-sampler")
+
+PROFILES_DIR = "profiles"
+PROFILES_INDEX = "profiles.json"
+
+_DEBUGGER_FRAME = re.compile(r"^#\d+\s+(?:0x[0-9a-fA-F]+\s+(?:in\s+)?)?(?P<frame>.+)$")
+_PERF_OFFSET = re.compile(r"\+0x[0-9a-fA-F]+$")
+
+
+@dataclass(frozen=True)
+class ProfileOptions:
+    tool: str = "off"
+    frequency: int = 99
+    interval: float = 0.5
+    # Parameter values a run must match to be profiled; empty profiles every run.
+    only: dict[str, list[Any]] = field(default_factory=dict)
+
+    @property
+    def enabled(self) -> bool:
+        return self.tool != "off"
+
+    def selects(self, parameters: Mapping[str, Any]) -> bool:
+        return all(
+            str(parameters.get(name)) in {str(v) for v in values} for name, values in self.only.items()
+        )
+
+
+def parse_profile_options(value: Any, *, tool: str | None = None) -> ProfileOptions:
+    """Build ProfileOptions from `simulate.profile` in params.yaml; `tool` overrides its tool."""
+    if value is None:
+        value = {}
+    if not isinstance(value, dict):
+        raise TypeError("params.yaml: simulate.profile must be a mapping")
+    only = value.get("only") or {}
+    if not isinstance(only, dict):
+        raise TypeError("params.yaml: simulate.profile.only must be a mapping")
+
+    options = ProfileOptions(
+        tool=tool or str(value.get("tool", "off")),
+        frequency=int(value.get("frequency", 99)),
+        interval=float(value.get("interval", 0.5)),
+        only={str(k): v if isinstance(v, list) else [v] for k, v in only.items()},
+    )
+    if options.tool not in PROFILE_TOOLS:
+        raise ValueError(f"params.yaml: simulate.profile.tool must be one of {PROFILE_TOOLS}")
+    if options.frequency < 1 or options.interval <= 0:
+        raise ValueError("params.yaml: simulate.profile needs frequency >= 1 and interval > 0")
+    return options
+
+
+def resolve_tool(tool: str) -> str:
+    if tool == "auto":
+        return "perf" if shutil.which("perf") else "stack-sampler"
+    return tool
+
+
+def perf_record_prefix(data_path: Path, *, frequency: int) -> list[str]:
+    return ["perf", "record", "-F", str(frequency), "-g", "-o", str(data_path), "--"]
+
+
+def fold_perf_script(text: str) -> collections.Counter[str]:
+    """Collapse `perf script` output into folded stacks (like stackcollapse-perf.pl)."""
+    stacks: collections.Counter[str] = collections.Counter()
+    comm: str | None = None
+    frames: list[str] = []
+
+    def flush() -> None:
+        if comm is not None:
+            stacks[";".join([comm, *reversed(frames)])] += 1
+
+    for line in text.splitlines():
+        if not line.strip():
+            flush()
+            comm, frames = None, []
+        elif not line[0].isspace():
+            # Sample header: "<comm> <pid>[/<tid>] [<cpu>] <time>: <period> <event>:"
+            comm = line.split()[0]
+        elif comm is not None:
+            parts = line.strip().split(maxsplit=1)
+            symbol = parts[1] if len(parts) > 1 else parts[0]
+            symbol = symbol.rsplit(" (", 1)[0]
+            frames.append(_PERF_OFFSET.sub("", symbol))
+    flush()
+    return stacks
+
+
+def parse_debugger_stacks(text: str) -> list[list[str]]:
+    """Per-thread stacks (innermost frame first) from `eu-stack -p` or gdb `thread apply all bt`."""
+    threads: list[list[str]] = []
+    current: list[str] | None = None
+    for line in text.splitlines():
+        if line.startswith(("TID ", "Thread ")):
+            current = []
+            threads.append(current)
+            continue
+        match = _DEBUGGER_FRAME.match(line.strip())
+        if match is None:
+            continue
+        if current is None:
+            current = []
+            threads.append(current)
+        frame = match.group("frame")
+        for separator in (" from ", " at ", " ("):
+            frame = frame.split(separator)[0]
+        current.append(frame.strip())
+    return [frames for frames in threads if frames]
+
+
+def _debugger_command() -> Callable[[int], list[str]] | None:
+    if shutil.which("eu-stack"):
+        return lambda pid: ["eu-stack", "-p", str(pid)]
+    if shutil.which("gdb"):
+        return lambda pid: ["gdb", "-p", str(pid), "-batch", "-nx", "-ex", "thread apply all bt"]
+    return None
+
+
+def _read(path: Path) -> str:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return ""
+
+
+def _thread_state_stacks(pid: int, *, proc: Path = PROC) -> list[list[str]]:
+    """Fallback without a debugger: state and wait channel of every thread."""
+    stacks: list[list[str]] = []
+    try:
+        tasks = sorted((proc / str(pid) / "task").iterdir())
+    except OSError:
+        return stacks
+    for task in tasks:
+        stat = _read(task / "stat")
+        state = stat[stat.rfind(")") + 2 :].split(" ", 1)[0] if stat else "?"
+        wchan = _read(task / "wchan")
+        frame = "running" if state == "R" else f"{state}:{wchan}" if wchan and wchan != "0" else state
+        stacks.append([frame, _read(task / "comm") or task.name])
+    return stacks
+
+
+class StackSampler:
+    """Periodically samples the stacks of every process in a tree (stand-in for perf)."""
+
+    def __init__(
+        self,
+        pid: int,
+        *,
+        interval: float,
+        debugger: Callable[[int], list[str]] | None = None,
+        proc: Path = PROC,
+    ) -> None:
+        self.pid = pid
+        self.interval = interval
+        self.proc = proc
+        self._debugger = debugger if debugger is not None else _debugger_command()
+        self.stacks: collections.Counter[str] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=f"stack-sampler-{pid}", daemon=True)
+
+    def start(self) -> StackSampler:
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _process_stacks(self, pid: int) -> list[list[str]]:
+        if self._debugger is not None:
+            try:
+                out = subprocess.run(
+                    self._debugger(pid), capture_output=True, text=True, timeout=30, check=False
+                ).stdout
+            except (OSError, subprocess.TimeoutExpired):
+                out = ""
+            stacks = parse_debugger_stacks(out)
+            if stacks:
+                return stacks
+        return _thread_state_stacks(pid, proc=self.proc)
+
+    def sample_once(self) -> None:
+        for sample in process_tree(self.pid, proc=self.proc):
+            comm = _read(self.proc / str(sample.pid) / "comm") or str(sample.pid)
+            for frames in self._process_stacks(sample.pid):
+                self.stacks[";".join([comm, *reversed(frames)])] += 1
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.sample_once()
+            self._stop.wait(self.interval)
+
+
+def write_folded(path: Path, stacks: Mapping[str, int]) -> None:
+    path.write_text("".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items())))
+
+
+def read_folded(path: Path) -> collections.Counter[str]:
+    stacks: collections.Counter[str] = collections.Counter()
+    for line in path.read_text(errors="replace").splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack and count.isdigit():
+            stacks[stack] += int(count)
+    return stacks
+
+
+def fold_perf_data(data_path: Path) -> collections.Counter[str]:
+    proc = subprocess.run(
+        ["perf", "script", "-i", str(data_path)], capture_output=True, text=True, check=False
+    )
+    if proc.returncode != 0:
+        logger.warning("perf script failed for %s: %s", data_path, proc.stderr.strip())
+    return fold_perf_script(proc.stdout)
+
+
+def collect_profiles(*, run_dir: Path, out_dir: Path) -> Path | None:
+    """Copy the folded profiles of a run dir to `out_dir/profiles` with an index.
+
+    Returns the index path, or None when no run was profiled.
+    """
+    runs = load_simulation_metadata(run_dir).get("runs", [])
+    index: list[dict[str, Any]] = []
+    profiles_dir = out_dir / PROFILES_DIR
+    for entry in runs if isinstance(runs, list) else []:
+        profile = entry.get("profile") if isinstance(entry, dict) else None
+        if not isinstance(profile, dict) or not profile.get("folded"):
+            continue
+        source = run_dir / profile["folded"]
+        if not source.exists():
+            logger.warning("Folded profile not found: %s", source)
+            continue
+        profiles_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source, profiles_dir / source.name)
+        index.append(
+            {
+                "simulation": Path(str(entry.get("simulation_file"))).stem,
+                "parameters": entry.get("parameters", {}),
+                "repeat": entry.get("repeat", 0),
+                "tool": profile.get("tool"),
+                "folded": source.name,
+            }
+        )
+    if not index:
+        return None
+    index_path = profiles_dir / PROFILES_INDEX
+    index_path.write_text(json.dumps(index, indent=2))
+    logger.info("Wrote %s", index_path)
+    return index_path
+
+
+def load_profile_index(profiles_dir: Path) -> list[dict[str, Any]]:
+    path = profiles_dir / PROFILES_INDEX
+    if not path.exists():
+        return []
+    data = json.loads(path.read_text())
+    return [d for d in data if isinstance(d, dict)] if isinstance(data, list) else []
+
+
+def merge_stacks(stacks: Sequence[Mapping[str, int]]) -> collections.Counter[str]:
+    merged: collections.Counter[str] = collections.Counter()
+    for s in stacks:
+        merged.update(s)
+    return merged
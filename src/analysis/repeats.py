@@ -0,0 +1,108 @@
+"""
+Repeated sampling of one (simulation file, parameters) combination.
+
+Configured per benchmark in params.yaml under `simulate.repeats`, either as a
+plain count (fixed mode) or as a mapping:
+
+    simulate:
+      repeats:
+        mode: adaptive        # or "fixed"
+        min: 3                # repeats always run
+        max: 10               # hard cap in adaptive mode
+        target_rel_ci: 0.05   # stop once the CI half-width is within 5% of the mean
+        confidence: 0.95
+        metric: throughput    # key produced by performance_extractor
+
+Each repeat runs with its own seed, exported to Gaussino as RUN_NUMBER.
+"""
+
+from __future__ import annotations
+
+import math
+import statistics
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+REPEAT_MODES = ("fixed", "adaptive")
+
+SEED_ENV_VAR = "RUN_NUMBER"
+
+
+@dataclass(frozen=True)
+class RepeatPolicy:
+    mode: str = "fixed"
+    min_repeats: int = 1
+    max_repeats: int = 1
+    target_rel_ci: float = 0.05
+    confidence: float = 0.95
+    metric: str = "throughput"
+    base_seed: int = 1
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_repeats > 1
+
+    def seed(self, repeat: int) -> int:
+        return self.base_seed + repeat
+
+
+def parse_repeat_policy(value: Any) -> RepeatPolicy:
+    """Build a RepeatPolicy from the `simulate.repeats` value in params.yaml."""
+    if value is None:
+        return RepeatPolicy()
+    if isinstance(value, bool) or not isinstance(value, (int, dict)):
+        raise TypeError("params.yaml: simulate.repeats must be an integer or a mapping")
+    if isinstance(value, int):
+        if value < 1:
+            raise ValueError("params.yaml: simulate.repeats must be >= 1")
+        return RepeatPolicy(min_repeats=value, max_repeats=value)
+
+    mode = value.get("mode", "fixed")
+    if mode not in REPEAT_MODES:
+        raise ValueError(f"params.yaml: simulate.repeats.mode must be one of {REPEAT_MODES}")
+
+    min_repeats = int(value.get("min", 2 if mode == "adaptive" else 1))
+    max_repeats = int(value.get("max", min_repeats if mode == "fixed" else 10))
+    if mode == "fixed":
+        max_repeats = min_repeats
+    if min_repeats < 1 or max_repeats < min_repeats:
+        raise ValueError("params.yaml: simulate.repeats needs 1 <= min <= max")
+
+    confidence = float(value.get("confidence", 0.95))
+    if not 0 < confidence < 1:
+        raise ValueError("params.yaml: simulate.repeats.confidence must be in (0, 1)")
+
+    return RepeatPolicy(
+        mode=mode,
+        min_repeats=min_repeats,
+        max_repeats=max_repeats,
+        target_rel_ci=float(value.get("target_rel_ci", 0.05)),
+        confidence=confidence,
+        metric=str(value.get("metric", "throughput")),
+        base_seed=int(value.get("base_seed", 1)),
+    )
+
+
+def relative_ci_halfwidth(values: Sequence[float], *, confidence: float) -> float:
+    """Half-width of the Student-t confidence interval of the mean, relative to the mean."""
+    from scipy import stats
+
+    n = len(values)
+    if n < 2:
+        return math.inf
+    mean = statistics.fmean(values)
+    if mean == 0:
+        return math.inf
+    sem = statistics.stdev(values) / math.sqrt(n)
+    t = stats.t.ppf((1 + confidence) / 2, n - 1)
+    return float(t * sem / abs(mean))
+
+
+def needs_more(values: Sequence[float], *, runs: int, policy: RepeatPolicy) -> bool:
+    """Whether a combination with `runs` repeats so far (metric `values`) needs another one."""
+    if runs < policy.min_repeats:
+        return True
+    if policy.mode != "adaptive" or runs >= policy.max_repeats:
+        return False
+    return relative_ci_halfwidth(values, confidence=policy.confidence) > policy.target_rel_ci
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 import logging
+from collections.abc import Sequence
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -13,10 +14,21 @@ matplotlib.use("Agg")
 import matplotlib.pyplot as plt  # noqa: E402
 import pandas as pd  # noqa: E402
 
+from analysis.crossover import ADEPT_STEM, REFERENCE_STEM
+from analysis.flamegraph import write_flamegraph
+from analysis.noise import NoiseProbe
+from analysis.pairing import PAIRED_METRIC, paired_ratio_table
+from analysis.profiler import load_profile_index, merge_stacks, read_folded
+
 logger = logging.getLogger(__name__)
 
 
 PERF_VARS = ["time_per_event", "execution_time", "throughput", "event_loop_time"]
+# Variables that grow on a slower node (the others, i.e. throughput, shrink).
+TIME_VARS = {"time_per_event", "execution_time", "event_loop_time"}
+
+# What the report does with the node scores of noise probes (see analysis.noise).
+NODE_NOISE_MODES = ("off", "flag", "normalize")
 
 
 @dataclass(frozen=True)
@@ -25,7 +37,17 @@ class ReportOutputs:
     plots_dir: Path
 
 
-def generate_performance_report(*, performance_csv: Path, out_dir: Path) -> ReportOutputs:
+def generate_performance_report(
+    *,
+    performance_csv: Path,
+    out_dir: Path,
+    node_noise: str = "flag",
+    noise_threshold: float = NoiseProbe.threshold,
+    parameters: Sequence[str] = (),
+) -> ReportOutputs:
+    """Metrics and plots of a performance CSV; `parameters` names its parameter columns."""
+    if node_noise not in NODE_NOISE_MODES:
+        raise ValueError(f"node_noise must be one of {NODE_NOISE_MODES}, got {node_noise!r}")
     out_dir.mkdir(parents=True, exist_ok=True)
     plots_dir = out_dir / "plots"
     plots_dir.mkdir(parents=True, exist_ok=True)
@@ -37,6 +59,9 @@ def generate_performance_report(*, performance_csv: Path, out_dir: Path) -> Repo
         "n_rows": int(df.shape[0]),
     }
 
+    if node_noise != "off" and "node_cpu_score" in df.columns:
+        df = _apply_node_noise(df, mode=node_noise, threshold=noise_threshold, metrics=metrics, out_dir=out_dir)
+
     if "with_adept" in df.columns and "time_per_event" in df.columns:
         with_df = df[df["with_adept"] == True]  # noqa: E712
         without_df = df[df["with_adept"] == False]  # noqa: E712
@@ -47,6 +72,15 @@ def generate_performance_report(*, performance_csv: Path, out_dir: Path) -> Repo
         if not without_df.empty:
             metrics["time_per_event_without_adept_mean"] = float(without_df["time_per_event"].mean())
 
+    # Drift-corrected AdePT/Geant4 ratios when the sweep ran in a pair order.
+    if "pair_position" in df.columns and PAIRED_METRIC in df.columns and "with_adept" in df.columns:
+        table, summary = paired_ratio_table(df, parameters=parameters)
+        if not table.empty:
+            table.to_csv(out_dir / "paired-ratios.csv", index=False)
+            metrics[f"{PAIRED_METRIC}_paired_ratio_geomean"] = summary["geomean_ratio"]
+            metrics["pair_drift"] = summary["drift_per_pair"]
+            logger.info("Wrote %s", out_dir / "paired-ratios.csv")
+
     # Plots: for each variable, one figure grouped by with_adept.
     for var in PERF_VARS:
         if var not in df.columns:
@@ -60,6 +94,45 @@ def generate_performance_report(*, performance_csv: Path, out_dir: Path) -> Repo
     return ReportOutputs(metrics_path=metrics_path, plots_dir=plots_dir)
 
 
+def _apply_node_noise(
+    df: pd.DataFrame, *, mode: str, threshold: float, metrics: dict, out_dir: Path
+) -> pd.DataFrame:
+    """Flag (and with mode="normalize", correct) runs taken while the node was slow.
+
+    A run's node speed is the geometric mean of its CPU and memory probe scores,
+    each relative to the best-scoring run. Runs more than `threshold` below 1
+    are flagged in node-noise.csv; normalizing scales the timings by the node
+    speed (throughput by its inverse). Runs without scores are left alone.
+    """
+    speed = (
+        df["node_cpu_score"] / df["node_cpu_score"].max()
+        * df["node_memory_score"] / df["node_memory_score"].max()
+    ) ** 0.5
+    if speed.isna().all():
+        return df
+    degraded = speed < 1 - threshold
+    df = df.assign(node_speed=speed, node_degraded=degraded)
+    metrics["node_speed_min"] = float(speed.min())
+    metrics["node_degraded_runs"] = int(degraded.sum())
+
+    columns = ["log_file", "node_cpu_score", "node_memory_score", "node_speed", "node_degraded"]
+    df.loc[speed.notna(), [c for c in columns if c in df.columns]].to_csv(out_dir / "node-noise.csv", index=False)
+    if degraded.any():
+        logger.warning(
+            "%s runs ran on a node more than %.0f%% slower than its best probe (see node-noise.csv)",
+            int(degraded.sum()),
+            threshold * 100,
+        )
+
+    if mode == "normalize":
+        factor = speed.fillna(1.0)
+        for var in PERF_VARS:
+            if var in df.columns:
+                df[var] = df[var] * factor if var in TIME_VARS else df[var] / factor
+        metrics["node_normalized"] = True
+    return df
+
+
 def _plot_perf(*, df: pd.DataFrame, var: str, out_path: Path) -> None:
     x = None
     if "PARTICLES_PER_EVENT" in df.columns:
@@ -93,3 +166,39 @@ def _plot_perf(*, df: pd.DataFrame, var: str, out_path: Path) -> None:
     fig.tight_layout()
     fig.savefig(out_path, dpi=150)
     plt.close(fig)
+
+
+def generate_profile_report(*, profiles_dir: Path, out_dir: Path) -> list[Path]:
+    """Differential flamegraphs of AdePT vs Geant4 for every profiled parameter set.
+
+    Frame widths follow the Geant4 profile; colours show how each frame's share
+    of samples changes with AdePT (blue: less time, red: more). Repeats of the
+    same parameters are merged.
+    """
+    by_params: dict[str, dict[str, list[Path]]] = {}
+    for item in load_profile_index(profiles_dir):
+        key = json.dumps(item.get("parameters", {}), sort_keys=True)
+        by_params.setdefault(key, {}).setdefault(str(item.get("simulation")), []).append(
+            profiles_dir / str(item["folded"])
+        )
+
+    written: list[Path] = []
+    flamegraphs_dir = out_dir / "flamegraphs"
+    for key, sims in by_params.items():
+        if ADEPT_STEM not in sims or REFERENCE_STEM not in sims:
+            continue
+        adept = merge_stacks([read_folded(p) for p in sims[ADEPT_STEM]])
+        geant4 = merge_stacks([read_folded(p) for p in sims[REFERENCE_STEM]])
+        parameters = json.loads(key)
+        slug = "_".join(f"{k}={v}" for k, v in parameters.items()) or "default"
+        written.append(
+            write_flamegraph(
+                flamegraphs_dir / f"diff_{slug}.svg",
+                geant4,
+                title=f"Geant4 -> AdePT: {slug}",
+                compare=adept,
+            )
+        )
+    if written:
+        logger.info("Wrote %s differential flamegraphs to %s", len(written), flamegraphs_dir)
+    return written
@@ -0,0 +1,187 @@
+"""
+Content-addressed cache of simulation results, shared across run_ids.
+
+A run_id hashes the whole benchmark config, so adding one value to a
+parameter list creates a new run dir where every combination would run again.
+The cache keys each run by a fingerprint of what determines its result:
+- benchmark name;
+- content of the simulation file and of every options file;
+- parameter values, including the repeat's seed;
+- the content of the executable (not its path, so that checkouts in
+  different places share results);
+- the stack identity (commit of every stack repository, and a hash of its
+  uncommitted changes);
+- the measurement options that decide what the entry records besides the
+  result (resource sampling, streamed extractors, wrapper, profiler, limits,
+  CPU pinning), so that e.g. a `--sample-resources` sweep never restores an
+  entry without resource samples.
+
+After a successful run, its log, ROOT files and other outputs are hard-linked
+(or copied across filesystems) into `<cache>/<fp[:2]>/<fp>/` together with its
+metadata entry. A later sweep with the same fingerprint links them into its
+own run dir instead of launching the run. Queue workers store their runs too.
+The cache sits under .cache/results by default (`simulate --result-cache DIR`
+to share one between checkouts, `--no-result-cache` to bypass it).
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import shutil
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any
+
+from analysis.git_tools import describe_repo, get_diff
+
+logger = logging.getLogger(__name__)
+
+ENTRY_NAME = "entry.json"
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stack_identity(stack_root: Path) -> dict[str, Any]:
+    """Commit (and hash of uncommitted changes) of every repository directly under `stack_root`."""
+    identity: dict[str, Any] = {}
+    if not stack_root.is_dir():
+        return identity
+    for child in sorted(p for p in stack_root.iterdir() if p.is_dir()):
+        status = describe_repo(child)
+        if not status.is_git_repo:
+            continue
+        repo: dict[str, Any] = {"commit": status.commit}
+        if status.is_dirty:
+            diff = (get_diff(child, staged=True) or "") + (get_diff(child, staged=False) or "")
+            repo["changes"] = hashlib.sha256(diff.encode()).hexdigest()
+        identity[child.name] = repo
+    return identity
+
+
+def entry_files(entry: Mapping[str, Any]) -> list[str]:
+    """Paths (relative to the run dir) of every file a run entry refers to."""
+    files: list[str] = []
+    if entry.get("output_path"):
+        files.append(str(entry["output_path"]))
+    files.extend(str(p) for p in entry.get("root_files") or [])
+    resources = entry.get("resources")
+    if isinstance(resources, dict) and resources.get("timeseries"):
+        files.append(str(resources["timeseries"]))
+    profile = entry.get("profile")
+    if isinstance(profile, dict) and profile.get("folded"):
+        files.append(str(profile["folded"]))
+    if entry.get("wrapper_output"):
+        files.append(str(entry["wrapper_output"]))
+    return files
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Cross-device (EXDEV) or a filesystem without hard links.
+        partial = dst.with_name(f".{dst.name}.partial")
+        shutil.copy2(src, partial)
+        os.replace(partial, dst)
+
+
+class ResultCache:
+    def __init__(self, root: Path, *, stack: Mapping[str, Any]) -> None:
+        self.root = root
+        self.stack = dict(stack)
+        self._digests: dict[Path, str] = {}
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-serialisable form, handed to queue workers."""
+        return {"root": str(self.root), "stack": self.stack}
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> ResultCache:
+        return cls(Path(data["root"]), stack=data.get("stack", {}))
+
+    def _digest(self, path: Path) -> str:
+        path = Path(os.path.realpath(path))
+        if path not in self._digests:
+            self._digests[path] = _sha256_file(path)
+        return self._digests[path]
+
+    def fingerprint(
+        self,
+        *,
+        benchmark: str,
+        executable: Path,
+        options_files: Sequence[Path],
+        simulation_file: Path,
+        parameters: Mapping[str, Any],
+        measurement: Mapping[str, Any] | None = None,
+    ) -> str:
+        key = {
+            "benchmark": benchmark,
+            # Content only, so that checkouts in different places share results.
+            "executable": self._digest(executable),
+            "options_files": [self._digest(p) for p in options_files],
+            "simulation_file": self._digest(simulation_file),
+            "parameters": {str(k): str(v) for k, v in parameters.items()},
+            "stack": self.stack,
+            "measurement": dict(measurement or {}),
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+    def _dir(self, fingerprint: str) -> Path:
+        return self.root / fingerprint[:2] / fingerprint
+
+    def restore(self, fingerprint: str, run_dir: Path) -> dict[str, Any] | None:
+        """Link a cached result into `run_dir` and return its entry; None on a miss."""
+        cached = self._dir(fingerprint)
+        try:
+            entry = json.loads((cached / ENTRY_NAME).read_text())
+        except (OSError, json.JSONDecodeError):
+            return None
+        if not isinstance(entry, dict):
+            return None
+        files = entry_files(entry)
+        if not all((cached / f).is_file() for f in files):
+            logger.warning("Ignoring incomplete result cache entry %s", cached)
+            return None
+        for name in files:
+            _link_or_copy(cached / name, run_dir / name)
+        source = entry.pop("result_cache", {})
+        entry["result_cache"] = {"fingerprint": fingerprint, "source": source.get("source")}
+        return entry
+
+    def store(self, fingerprint: str, entry: Mapping[str, Any], run_dir: Path) -> None:
+        """Add a finished run to the cache (first writer wins)."""
+        final = self._dir(fingerprint)
+        if final.exists():
+            return
+        final.parent.mkdir(parents=True, exist_ok=True)
+        tmp = final.with_name(f".{final.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        try:
+            tmp.mkdir()
+            for name in entry_files(entry):
+                _link_or_copy(run_dir / name, tmp / name)
+            cached = {k: v for k, v in entry.items() if k != "result_cache"}
+            cached["result_cache"] = {
+                "source": str(run_dir),
+                "stored_at": datetime.datetime.now(datetime.UTC).isoformat(),
+            }
+            (tmp / ENTRY_NAME).write_text(json.dumps(cached, indent=2))
+            os.rename(tmp, final)
+        except OSError as err:
+            # Losing the race against another writer of the same fingerprint is fine.
+            if not final.exists():
+                logger.warning("Could not add %s to the result cache: %s", entry.get("output_path"), err)
+            shutil.rmtree(tmp, ignore_errors=True)
@@ -0,0 +1,229 @@
+"""
+Cached Gaussino runtime environment.
+
+`stack/Gaussino/run env ...` rebuilds the whole LbEnv/LCG environment for
+every run, which costs seconds per launch. The environment it produces is
+captured once (`run env env -0`) and cached under .cache/gaussino-env/, keyed by
+a fingerprint of the executable, the stack it belongs to and the variables of
+the calling environment that LbEnv reads (FINGERPRINT_VARIABLES). Runs can then
+start `gaudirun.py` directly with it.
+
+Only what `run env` changes is written to the cache: the variables it sets and
+the ones it removes. The rest is taken from the calling environment at launch,
+as `run env` itself would, so credentials in the caller's environment are never
+persisted.
+
+Launch modes:
+- run-env: every run goes through `run env` (no cache).
+- cached: runs use the cached environment, capturing it first if needed.
+- verify: like cached, but first compares the environment a fresh `run env`
+  yields with the cached one, and falls back to run-env if they differ.
+
+Every run records how it was launched ("launch": run-env, cached or verify),
+and the sweep metadata records the outcome of a verification ("launch").
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+from collections.abc import Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+LAUNCH_MODES = ("run-env", "cached", "verify")
+
+# Variables that legitimately differ between two launches of the same environment.
+VOLATILE_VARIABLES = frozenset({"_", "OLDPWD", "PWD", "SHLVL"})
+
+# Calling-environment variables the LbEnv/`run env` setup depends on; anything
+# else (editor, terminal, tokens, ...) must not invalidate the cache.
+FINGERPRINT_VARIABLES = frozenset(
+    {
+        "BINARY_TAG",
+        "CMAKE_PREFIX_PATH",
+        "CMTCONFIG",
+        "CMTPROJECTPATH",
+        "CMTUSERCONTEXT",
+        "HOME",
+        "LD_LIBRARY_PATH",
+        "LHCBRELEASES",
+        "MYSITEROOT",
+        "PATH",
+        "PYTHONHOME",
+        "PYTHONPATH",
+        "ROOT_INCLUDE_PATH",
+        "User_release_area",
+        "VO_LHCB_SW_DIR",
+    }
+)
+FINGERPRINT_PREFIXES = ("GAUDI", "GAUSSINO", "LBENV", "LB_", "LCG_")
+
+
+def _stat_signature(path: Path) -> list[object]:
+    try:
+        st = path.stat()
+    except OSError:
+        return [path.name, None]
+    return [path.name, st.st_size, st.st_mtime_ns]
+
+
+def stack_fingerprint(executable: Path, *, environ: Mapping[str, str] | None = None) -> str:
+    """Hash of what the `run env` output depends on.
+
+    Covers the executable, the top-level entries of the project and stack
+    directories (a rebuild or a new stack setup touches them), and the
+    variables of the calling environment the wrapper reads.
+    """
+    environ = os.environ if environ is None else environ
+    exe = Path(os.path.realpath(executable))
+    parts: dict[str, object] = {"executable": str(exe), "stat": _stat_signature(exe)}
+    for directory in (exe.parent, exe.parent.parent):
+        try:
+            entries = sorted(directory.iterdir())
+        except OSError:
+            entries = []
+        parts[str(directory)] = [_stat_signature(p) for p in entries]
+    parts["environ"] = sorted(
+        (k, v) for k, v in environ.items() if k in FINGERPRINT_VARIABLES or k.startswith(FINGERPRINT_PREFIXES)
+    )
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()[:20]
+
+
+def parse_env0(data: bytes) -> dict[str, str]:
+    """Parse NUL-separated `env -0` output."""
+    env: dict[str, str] = {}
+    for item in data.split(b"\0"):
+        if not item:
+            continue
+        key, sep, value = item.decode(errors="surrogateescape").partition("=")
+        if sep:
+            env[key] = value
+    return env
+
+
+def capture_environment(executable: Path) -> dict[str, str]:
+    """The environment `run env` sets up, as seen by the command it runs."""
+    proc = subprocess.run(
+        [os.path.abspath(executable), "env", "env", "-0"],
+        capture_output=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"Capturing the Gaussino environment failed (exit code {proc.returncode}): "
+            f"{proc.stderr.decode(errors='replace').strip()}"
+        )
+    return parse_env0(proc.stdout)
+
+
+def environment_changes(caller: Mapping[str, str], env: Mapping[str, str]) -> dict[str, Any]:
+    """What `run env` did to the caller's environment: {"set": {...}, "unset": [...]}."""
+    return {
+        "set": {k: v for k, v in env.items() if caller.get(k) != v},
+        "unset": sorted(k for k in caller if k not in env),
+    }
+
+
+def apply_environment_changes(caller: Mapping[str, str], changes: Mapping[str, Any]) -> dict[str, str]:
+    env = {k: v for k, v in caller.items() if k not in set(changes["unset"])}
+    env.update(changes["set"])
+    return env
+
+
+def _is_changes(data: Any) -> bool:
+    return (
+        isinstance(data, dict)
+        and isinstance(data.get("set"), dict)
+        and isinstance(data.get("unset"), list)
+    )
+
+
+def load_or_capture(executable: Path, *, cache_dir: Path) -> tuple[dict[str, str], Path]:
+    """Cached environment for `executable`, capturing (and caching) it on a miss."""
+    path = cache_dir / f"{stack_fingerprint(executable)}.json"
+    try:
+        changes = json.loads(path.read_text())
+        if _is_changes(changes):
+            logger.info("Using cached Gaussino environment %s", path)
+            return apply_environment_changes(os.environ, changes), path
+    except (OSError, json.JSONDecodeError):
+        pass
+
+    logger.info("Capturing Gaussino environment from %s", executable)
+    caller = dict(os.environ)
+    env = capture_environment(executable)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump(environment_changes(caller, env), f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+    return env, path
+
+
+def environment_diff(expected: Mapping[str, str], actual: Mapping[str, str]) -> list[str]:
+    """Names of variables that differ between two environments (volatile ones excluded)."""
+    names = (set(expected) | set(actual)) - VOLATILE_VARIABLES
+    return sorted(name for name in names if expected.get(name) != actual.get(name))
+
+
+def resolve_gaudirun(env: Mapping[str, str]) -> str | None:
+    return shutil.which("gaudirun.py", path=env.get("PATH", ""))
+
+
+@dataclass(frozen=True)
+class LaunchEnv:
+    """How runs are launched: with `env` directly, or through `run env` when it is None."""
+
+    mode: str = "run-env"
+    env: dict[str, str] | None = None
+    # With mode "verify": variables in which a fresh `run env` differed from the
+    # cached environment (empty when they matched); None when not compared.
+    differing: tuple[str, ...] | None = None
+
+    @property
+    def launch(self) -> str:
+        """How each run is started, as recorded in its metadata entry."""
+        if self.env is None:
+            return "run-env"
+        return "verify" if self.mode == "verify" else "cached"
+
+    def to_metadata(self) -> dict[str, Any]:
+        verification = None
+        if self.differing is not None:
+            verification = {"matches": not self.differing, "differing": list(self.differing)}
+        return {"mode": self.mode, "launch": self.launch, "verification": verification}
+
+
+def resolve_launch_env(executable: Path, *, mode: str, cache_dir: Path) -> LaunchEnv:
+    """How to launch runs: with the cached environment directly, or through `run env`."""
+    if mode not in LAUNCH_MODES:
+        raise ValueError(f"launch mode must be one of {LAUNCH_MODES}, got {mode!r}")
+    if mode == "run-env":
+        return LaunchEnv()
+
+    env, path = load_or_capture(executable, cache_dir=cache_dir)
+    if resolve_gaudirun(env) is None:
+        logger.warning("gaudirun.py is not on the cached PATH (%s); launching through run env", path)
+        return LaunchEnv(mode=mode)
+
+    if mode == "verify":
+        differing = environment_diff(capture_environment(executable), env)
+        if differing:
+            logger.warning(
+                "Cached environment %s differs from a fresh `run env` in %s; launching through run env",
+                path,
+                ", ".join(differing),
+            )
+            return LaunchEnv(mode=mode, differing=tuple(differing))
+        logger.info("Cached environment %s matches a fresh `run env`", path)
+        return LaunchEnv(mode=mode, env=env, differing=())
+    return LaunchEnv(mode=mode, env=env)
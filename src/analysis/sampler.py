@@ -0,0 +1,235 @@
+"""
+Background sampler of /proc statistics for a whole process tree.
+
+Gaussino is started through wrapper scripts (`run env ... gaudirun.py`), so the
+interesting work happens in descendants of the process we launch. The sampler
+polls every process in the tree and aggregates memory, CPU and context-switch
+counters; exact totals for the tree are taken from `wait4` once it exits.
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import os
+import resource
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+PROC = Path("/proc")
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = resource.getpagesize()
+
+
+@dataclass(frozen=True)
+class ProcSample:
+    pid: int
+    ppid: int
+    rss_bytes: int
+    cpu_user: float
+    cpu_system: float
+    num_threads: int
+
+
+@dataclass(frozen=True)
+class TreeSample:
+    timestamp: float
+    rss_bytes: int
+    cpu_user: float
+    cpu_system: float
+    voluntary_ctxt_switches: int
+    involuntary_ctxt_switches: int
+    num_processes: int
+    num_threads: int
+
+
+def read_proc_stat(pid: int, *, proc: Path = PROC) -> ProcSample | None:
+    """Parse /proc/<pid>/stat. Returns None if the process is gone."""
+    try:
+        raw = (proc / str(pid) / "stat").read_text()
+    except OSError:
+        return None
+    # The command name is in parentheses and may contain spaces.
+    fields = raw[raw.rfind(")") + 2 :].split()
+    try:
+        return ProcSample(
+            pid=pid,
+            ppid=int(fields[1]),
+            cpu_user=int(fields[11]) / _CLK_TCK,
+            cpu_system=int(fields[12]) / _CLK_TCK,
+            num_threads=int(fields[17]),
+            rss_bytes=int(fields[21]) * _PAGE_SIZE,
+        )
+    except (IndexError, ValueError):
+        return None
+
+
+def read_ctxt_switches(pid: int, *, proc: Path = PROC) -> tuple[int, int]:
+    """Sum voluntary/involuntary context switches over all threads of a process."""
+    voluntary = involuntary = 0
+    try:
+        tasks = list((proc / str(pid) / "task").iterdir())
+    except OSError:
+        return 0, 0
+    for task in tasks:
+        try:
+            lines = (task / "status").read_text().splitlines()
+        except OSError:
+            continue
+        for line in lines:
+            if line.startswith("voluntary_ctxt_switches:"):
+                voluntary += int(line.split()[1])
+            elif line.startswith("nonvoluntary_ctxt_switches:"):
+                involuntary += int(line.split()[1])
+    return voluntary, involuntary
+
+
+def process_tree(root_pid: int, *, proc: Path = PROC) -> list[ProcSample]:
+    """Return stat samples for `root_pid` and all of its live descendants."""
+    by_parent: dict[int, list[ProcSample]] = {}
+    root: ProcSample | None = None
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        sample = read_proc_stat(int(entry.name), proc=proc)
+        if sample is None:
+            continue
+        if sample.pid == root_pid:
+            root = sample
+        by_parent.setdefault(sample.ppid, []).append(sample)
+
+    if root is None:
+        return []
+
+    tree = [root]
+    queue = [root_pid]
+    while queue:
+        for child in by_parent.get(queue.pop(), []):
+            tree.append(child)
+            queue.append(child.pid)
+    return tree
+
+
+class ProcessTreeSampler:
+    """Poll /proc for a process tree in a daemon thread.
+
+    CPU times and context switches are cumulative per process; the sampler keeps
+    the last value seen for every pid so that short-lived children still count
+    after they exit.
+    """
+
+    def __init__(self, pid: int, *, interval: float = 1.0, proc: Path = PROC) -> None:
+        self.pid = pid
+        self.interval = interval
+        self.proc = proc
+        self.samples: list[TreeSample] = []
+        self._cpu: dict[int, tuple[float, float]] = {}
+        self._ctxt: dict[int, tuple[int, int]] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=f"sampler-{pid}", daemon=True)
+        self._started_at = 0.0
+
+    def start(self) -> ProcessTreeSampler:
+        self._started_at = time.time()
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def sample_once(self) -> TreeSample | None:
+        tree = process_tree(self.pid, proc=self.proc)
+        if not tree:
+            return None
+        for p in tree:
+            self._cpu[p.pid] = (p.cpu_user, p.cpu_system)
+            self._ctxt[p.pid] = read_ctxt_switches(p.pid, proc=self.proc)
+        sample = TreeSample(
+            timestamp=time.time(),
+            rss_bytes=sum(p.rss_bytes for p in tree),
+            cpu_user=sum(u for u, _ in self._cpu.values()),
+            cpu_system=sum(s for _, s in self._cpu.values()),
+            voluntary_ctxt_switches=sum(v for v, _ in self._ctxt.values()),
+            involuntary_ctxt_switches=sum(i for _, i in self._ctxt.values()),
+            num_processes=len(tree),
+            num_threads=sum(p.num_threads for p in tree),
+        )
+        self.samples.append(sample)
+        return sample
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sample_once()
+            except Exception:
+                logger.exception("Resource sampling failed for pid %s", self.pid)
+            self._stop.wait(self.interval)
+
+    def write_timeseries(self, path: Path) -> None:
+        fields = [
+            "elapsed",
+            "rss_bytes",
+            "cpu_user",
+            "cpu_system",
+            "voluntary_ctxt_switches",
+            "involuntary_ctxt_switches",
+            "num_processes",
+            "num_threads",
+        ]
+        with path.open("w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(fields)
+            for s in self.samples:
+                writer.writerow(
+                    [
+                        round(s.timestamp - self._started_at, 3),
+                        s.rss_bytes,
+                        s.cpu_user,
+                        s.cpu_system,
+                        s.voluntary_ctxt_switches,
+                        s.involuntary_ctxt_switches,
+                        s.num_processes,
+                        s.num_threads,
+                    ]
+                )
+
+    def summary(self, *, wall_time: float, rusage: resource.struct_rusage | None = None) -> dict[str, Any]:
+        """Aggregate the samples (and exact `wait4` rusage, if given) into metadata fields."""
+        rss = [s.rss_bytes for s in self.samples]
+        last = self.samples[-1] if self.samples else None
+
+        out: dict[str, Any] = {
+            "sample_interval": self.interval,
+            "samples": len(self.samples),
+            "peak_rss_bytes": max(rss) if rss else None,
+            "mean_rss_bytes": sum(rss) / len(rss) if rss else None,
+            "cpu_user_seconds": last.cpu_user if last else None,
+            "cpu_system_seconds": last.cpu_system if last else None,
+            "voluntary_ctxt_switches": last.voluntary_ctxt_switches if last else None,
+            "involuntary_ctxt_switches": last.involuntary_ctxt_switches if last else None,
+            "peak_threads": max((s.num_threads for s in self.samples), default=None),
+        }
+
+        if rusage is not None:
+            # Exact totals for every waited-for process in the tree.
+            out.update(
+                {
+                    "cpu_user_seconds": rusage.ru_utime,
+                    "cpu_system_seconds": rusage.ru_stime,
+                    "voluntary_ctxt_switches": rusage.ru_nvcsw,
+                    "involuntary_ctxt_switches": rusage.ru_nivcsw,
+                    "rusage_max_rss_bytes": rusage.ru_maxrss * 1024,
+                    "rusage_minor_page_faults": rusage.ru_minflt,
+                    "rusage_major_page_faults": rusage.ru_majflt,
+                }
+            )
+
+        cpu_total = (out["cpu_user_seconds"] or 0.0) + (out["cpu_system_seconds"] or 0.0)
+        out["core_utilization"] = cpu_total / wall_time if wall_time > 0 else None
+        return out
@@ -0,0 +1,175 @@
+"""
+Thread-scaling studies.
+
+In a scaling study NUMBER_OF_THREADS follows a ladder instead of the grid:
+- strong: the total work is fixed; NUMBER_OF_EVENTS keeps its grid values.
+- weak: the work grows with the threads; NUMBER_OF_EVENTS is the grid value
+  at the lowest rung, scaled by threads / lowest rung.
+
+Configured per benchmark in params.yaml and enabled with `simulate --mode scaling`:
+
+    simulate:
+      scaling:
+        kind: strong            # or weak
+        threads: [1, 2, 4, 8, 16, 32]
+
+The extract stage derives, per simulation file and combination of the other
+parameters, the speedup and parallel efficiency relative to the lowest rung
+(from throughput, which covers both kinds) and the knee of the curve.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+import math
+from collections.abc import Mapping, Sequence
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from analysis.journal import load_simulation_metadata
+
+logger = logging.getLogger(__name__)
+
+SCALING_KINDS = ("strong", "weak")
+
+THREADS_PARAMETER = "NUMBER_OF_THREADS"
+EVENTS_PARAMETER = "NUMBER_OF_EVENTS"
+
+# Past the knee, an extra thread adds less than this fraction of a perfectly scaling one.
+KNEE_MARGINAL_EFFICIENCY = 0.5
+
+
+@dataclass(frozen=True)
+class ScalingStudy:
+    kind: str
+    threads: tuple[int, ...]
+
+    def to_metadata(self) -> dict[str, Any]:
+        return {**asdict(self), "threads": list(self.threads)}
+
+
+def parse_scaling_study(value: Any) -> ScalingStudy:
+    """Build a ScalingStudy from `simulate.scaling` in params.yaml."""
+    if not isinstance(value, dict):
+        raise TypeError("params.yaml: simulate.scaling must be a mapping (kind, threads)")
+    kind = value.get("kind", "strong")
+    if kind not in SCALING_KINDS:
+        raise ValueError(f"params.yaml: simulate.scaling.kind must be one of {SCALING_KINDS}")
+    threads = value.get("threads")
+    if (
+        not isinstance(threads, list)
+        or not threads
+        or not all(isinstance(t, int) and not isinstance(t, bool) and t >= 1 for t in threads)
+    ):
+        raise ValueError("params.yaml: simulate.scaling.threads must be a list of positive integers")
+    return ScalingStudy(kind=kind, threads=tuple(sorted(set(threads))))
+
+
+def scaling_parameter_sets(parameters: Mapping[str, list[Any]], study: ScalingStudy) -> list[dict[str, Any]]:
+    """Parameter combinations of a study: the grid with NUMBER_OF_THREADS replaced by the ladder."""
+    names = [k for k in parameters if k != THREADS_PARAMETER]
+    base = study.threads[0]
+    sets: list[dict[str, Any]] = []
+    for combo in itertools.product(*(parameters[k] for k in names)):
+        for threads in study.threads:
+            param_dict = {**dict(zip(names, combo)), THREADS_PARAMETER: threads}
+            if study.kind == "weak":
+                if EVENTS_PARAMETER not in param_dict:
+                    raise ValueError("weak scaling needs NUMBER_OF_EVENTS in the parameter grid")
+                param_dict[EVENTS_PARAMETER] = math.ceil(int(param_dict[EVENTS_PARAMETER]) * threads / base)
+            sets.append(param_dict)
+    return sets
+
+
+def find_knee(threads: Sequence[int], speedups: Sequence[float]) -> int | None:
+    """Thread count after which adding threads stops paying off.
+
+    The knee is the last rung before the first step whose marginal efficiency
+    (speedup gained per added thread, relative to perfect scaling) drops below
+    KNEE_MARGINAL_EFFICIENCY; the top rung when scaling never flattens.
+    """
+    if not threads:
+        return None
+    base = threads[0]
+    for i in range(1, len(threads)):
+        ideal_gain = (threads[i] - threads[i - 1]) / base
+        if (speedups[i] - speedups[i - 1]) / ideal_gain < KNEE_MARGINAL_EFFICIENCY:
+            return threads[i - 1]
+    return threads[-1]
+
+
+def scaling_table(
+    df: pd.DataFrame, *, parameters: Sequence[str], kind: str = "strong"
+) -> tuple[pd.DataFrame, list[dict[str, Any]]]:
+    """Speedup, efficiency and knee per simulation and combination of the other parameters.
+
+    `df` is the performance CSV (one row per run, repeats averaged here) and
+    `parameters` the names of its parameter columns. In a strong-scaling study
+    every event count is its own workload; in a weak one the event count
+    follows the threads and so is not a grouping key.
+    """
+    ladder = (THREADS_PARAMETER, EVENTS_PARAMETER) if kind == "weak" else (THREADS_PARAMETER,)
+    group_cols = [c for c in parameters if c in df.columns and c not in ladder]
+    keys = ["with_adept", *group_cols]
+    mean = df.groupby([*keys, THREADS_PARAMETER], dropna=False)["throughput"].mean().reset_index()
+
+    rows: list[pd.DataFrame] = []
+    knees: list[dict[str, Any]] = []
+    for key, sub in mean.groupby(keys, dropna=False):
+        sub = sub.sort_values(THREADS_PARAMETER).copy()
+        base_threads = sub[THREADS_PARAMETER].iloc[0]
+        base_throughput = sub["throughput"].iloc[0]
+        sub["speedup"] = sub["throughput"] / base_throughput
+        sub["efficiency"] = sub["speedup"] / (sub[THREADS_PARAMETER] / base_threads)
+        knee = find_knee(sub[THREADS_PARAMETER].tolist(), sub["speedup"].tolist())
+        sub["is_knee"] = sub[THREADS_PARAMETER] == knee
+        rows.append(sub)
+
+        values = key if isinstance(key, tuple) else (key,)
+        at_knee = sub[sub["is_knee"]]
+        knees.append(
+            {
+                **{k: _plain(v) for k, v in zip(keys, values)},
+                "knee_threads": _plain(knee),
+                "speedup_at_knee": float(at_knee["speedup"].iloc[0]) if not at_knee.empty else None,
+                "efficiency_at_knee": float(at_knee["efficiency"].iloc[0]) if not at_knee.empty else None,
+                "max_speedup": float(sub["speedup"].max()),
+            }
+        )
+    table = pd.concat(rows, ignore_index=True) if rows else mean
+    return table, knees
+
+
+def _plain(value: Any) -> Any:
+    """numpy scalars -> Python scalars, for JSON."""
+    return value.item() if hasattr(value, "item") else value
+
+
+def extract_scaling(
+    *, run_dir: Path, performance_csv: Path, out_dir: Path, parameters: Sequence[str]
+) -> Path | None:
+    """Write scaling-results.csv and scaling-summary.json if the run was a scaling study.
+
+    `parameters` are the parameter names of the benchmark (params.yaml).
+    """
+    study = load_simulation_metadata(run_dir).get("scaling")
+    if not isinstance(study, dict):
+        return None
+
+    df = pd.read_csv(performance_csv)
+    if "throughput" not in df.columns or THREADS_PARAMETER not in df.columns:
+        logger.warning("Scaling study without throughput/%s columns; skipping", THREADS_PARAMETER)
+        return None
+
+    table, knees = scaling_table(df, parameters=parameters, kind=study.get("kind", "strong"))
+    csv_path = out_dir / "scaling-results.csv"
+    table.to_csv(csv_path, index=False)
+    summary_path = out_dir / "scaling-summary.json"
+    summary_path.write_text(json.dumps({"study": study, "knees": knees}, indent=2))
+    logger.info("Wrote %s", csv_path)
+    return csv_path
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import logging
+import math
+import os
+from collections.abc import Callable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+def own_cgroup_dir(cgroup_root: Path) -> Path | None:
+    try:
+        lines = Path("/proc/self/cgroup").read_text().splitlines()
+    except OSError:
+        return None
+    for line in lines:
+        # cgroup v2 has a single "0::/path" entry.
+        if line.startswith("0::"):
+            return cgroup_root / line[3:].lstrip("/")
+    return None
+
+
+def cgroup_cpu_quota(cgroup_root: Path = CGROUP_ROOT) -> float | None:
+    """Return the cgroup v2 CPU quota (in CPUs) for this process, if any.
+
+    Walks from the process' own cgroup up to the root and returns the tightest
+    `cpu.max` limit found. Returns None when no quota applies or cgroup v2 is not
+    available.
+    """
+    current = own_cgroup_dir(cgroup_root)
+    if current is None:
+        return None
+
+    quota: float | None = None
+    while True:
+        try:
+            value = (current / "cpu.max").read_text().split()
+        except OSError:
+            value = []
+        if len(value) == 2 and value[0] != "max":
+            try:
+                limit = int(value[0]) / int(value[1])
+            except (ValueError, ZeroDivisionError):
+                limit = None
+            if limit is not None and (quota is None or limit < quota):
+                quota = limit
+        if current == cgroup_root or cgroup_root not in current.parents:
+            break
+        current = current.parent
+    return quota
+
+
+def visible_cpu_count() -> int:
+    """Number of CPUs this process may actually use (affinity mask and cgroup quota)."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - non-Linux
+        cpus = os.cpu_count() or 1
+
+    quota = cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return max(1, cpus)
+
+
+def run_with_core_budget[T, R](
+    items: Sequence[T],
+    *,
+    cost: Callable[[T], int],
+    budget: int | None,
+    run: Callable[[T], R],
+    on_done: Callable[[T, R], None],
+) -> None:
+    """Run `items` concurrently without exceeding a core budget.
+
+    Each item is admitted only when its `cost` (number of cores) fits into the
+    remaining budget. Items are considered in order, but a later item may start
+    ahead of an earlier one that does not fit yet (backfill). An item whose cost
+    exceeds the whole budget is clamped so it runs alone.
+
+    `on_done` is always called from the calling thread, so it can update shared
+    state (e.g. metadata files) without extra locking.
+
+    With `budget=None` items run sequentially, in order, in the calling thread.
+    """
+    if budget is None:
+        for item in items:
+            on_done(item, run(item))
+        return
+
+    if budget < 1:
+        raise ValueError(f"core budget must be >= 1, got {budget}")
+
+    pending: list[tuple[T, int]] = []
+    for item in items:
+        cores = max(1, int(cost(item)))
+        if cores > budget:
+            logger.warning(
+                "Job needs %s cores but the budget is %s; it will run alone", cores, budget
+            )
+            cores = budget
+        pending.append((item, cores))
+
+    free = budget
+    running: dict[Future[R], tuple[T, int]] = {}
+
+    with ThreadPoolExecutor(max_workers=budget) as pool:
+        try:
+            while pending or running:
+                idx = 0
+                while idx < len(pending):
+                    item, cores = pending[idx]
+                    if cores <= free:
+                        del pending[idx]
+                        free -= cores
+                        running[pool.submit(run, item)] = (item, cores)
+                        logger.debug("Admitted job (%s cores, %s free)", cores, free)
+                    else:
+                        idx += 1
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    item, cores = running.pop(fut)
+                    free += cores
+                    on_done(item, fut.result())
+        except BaseException:
+            # Do not start anything new; let running jobs finish before propagating.
+            pending.clear()
+            raise
@@ -4,16 +4,201 @@ import datetime
 import itertools
 import json
 import logging
+import math
 import os
+import shutil
+import statistics
 import subprocess
+import tempfile
 import time
-from dataclasses import dataclass
+from collections.abc import Mapping, Sequence
+from dataclasses import asdict, dataclass, field, replace
 from pathlib import Path
 from typing import Any
 
+from analysis.affinity import (
+    CpuAllocator,
+    PinningPolicy,
+    format_cpu_list,
+    pinned_thread,
+    read_topology,
+)
+from analysis.calibration import (
+    CALIBRATION_DIR,
+    EVENTS_PARAMETER,
+    EventCalibration,
+    calibrated_events,
+    calibration_key,
+    load_calibration,
+    save_calibration,
+    seconds_per_event,
+)
+from analysis.crossover import (
+    ADEPT_STEM,
+    REFERENCE_STEM,
+    CrossoverSearch,
+    CrossoverState,
+)
+from analysis.extractors import LogAccumulator, get_accumulator, performance_extractor
+from analysis.jobqueue import POLL_INTERVAL, QUEUE_NAME, JobQueue, spawn_workers
+from analysis.journal import (
+    JOURNAL_NAME,
+    RunJournal,
+    compact_journal,
+    entry_key,
+    load_simulation_metadata,
+)
+from analysis.limits import (
+    RunLimits,
+    cgroup_events,
+    check_cgroup_parent,
+    classify_limit_exit,
+    create_run_cgroup,
+    limit_exec_prefix,
+    remove_cgroup,
+)
+from analysis.logio import (
+    FLUSH_INTERVAL,
+    LOG_SUFFIXES,
+    LogPump,
+    extract_log,
+    open_log_writer,
+)
+from analysis.noise import NoiseProbe, run_noise_probe
+from analysis.ordering import (
+    ORDER_POLICIES,
+    DurationModel,
+    fit_duration_model,
+    load_history,
+    order_jobs,
+)
+from analysis.pagecache import WarmResult, dataset_dirs, warm_page_cache
+from analysis.pairing import PairOrder, order_pairs, pair_units, with_seed
+from analysis.preflight import (
+    PREFLIGHT_DIR,
+    PreflightCheck,
+    PreflightError,
+    missing_inputs,
+    smoke_parameters,
+    smoke_run_problems,
+)
+from analysis.profiler import (
+    ProfileOptions,
+    StackSampler,
+    fold_perf_data,
+    perf_record_prefix,
+    resolve_tool,
+    write_folded,
+)
+from analysis.repeats import (
+    SEED_ENV_VAR,
+    RepeatPolicy,
+    needs_more,
+    relative_ci_halfwidth,
+)
+from analysis.resultcache import ResultCache
+from analysis.runenv import (
+    LAUNCH_MODES,
+    LaunchEnv,
+    load_or_capture,
+    resolve_gaudirun,
+    resolve_launch_env,
+)
+from analysis.sampler import ProcessTreeSampler
+from analysis.scaling import ScalingStudy, scaling_parameter_sets
+from analysis.scheduler import run_with_core_budget, visible_cpu_count
+from analysis.watchdog import WatchdogLimits, kill_tree, supervise
+from analysis.wrappers import build_wrapper, parse_wrapper_output
+
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class RunOptions:
+    """How each individual simulation is launched and observed."""
+
+    # Poll /proc for the Gaussino process tree every `sample_interval` seconds
+    # and record resource usage in the run entry (None disables sampling).
+    sample_interval: float | None = None
+    # Extractor types (e.g. "performance") fed live from the child's output;
+    # their results are stored under "streamed_results" in the run entry.
+    stream_extract: tuple[str, ...] = ()
+    # Each simulation runs in its own scratch directory created under this root
+    # (default: <run_dir>/.scratch). Point it at tmpfs or a local SSD to keep
+    # heavy ROOT writes off network filesystems.
+    scratch_root: Path | None = None
+    # Per-run wall-time limit and stall detection; killed runs are recorded
+    # with status "timeout" or "stalled".
+    watchdog: WatchdogLimits = field(default_factory=WatchdogLimits)
+    # "run-env" starts every run through `run env`; "cached"/"verify" launch
+    # gaudirun.py directly with a cached environment (see analysis.runenv).
+    launch: str = "run-env"
+    env_cache_dir: Path | None = None
+    # Measurement command put in front of the Gaussino command line (see analysis.wrappers).
+    wrapper: tuple[str, ...] = ()
+    # Sampling profiler run alongside selected simulations (see analysis.profiler).
+    profile: ProfileOptions = field(default_factory=ProfileOptions)
+    # Memory/CPU limits of each run (see analysis.limits); runs that hit one
+    # are recorded with status "oom" or "cpu_limit".
+    limits: RunLimits = field(default_factory=RunLimits)
+    # Write logs gzip- or zstd-compressed as they are produced (see analysis.logio).
+    log_compression: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-serialisable form, handed to queue workers."""
+        data = asdict(self)
+        data["stream_extract"] = list(self.stream_extract)
+        data["wrapper"] = list(self.wrapper)
+        for key in ("scratch_root", "env_cache_dir"):
+            if data[key] is not None:
+                data[key] = str(data[key])
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> RunOptions:
+        return cls(
+            sample_interval=data.get("sample_interval"),
+            stream_extract=tuple(data.get("stream_extract", ())),
+            scratch_root=Path(data["scratch_root"]) if data.get("scratch_root") else None,
+            watchdog=WatchdogLimits(**data.get("watchdog", {})),
+            launch=data.get("launch", "run-env"),
+            env_cache_dir=Path(data["env_cache_dir"]) if data.get("env_cache_dir") else None,
+            wrapper=tuple(data.get("wrapper", ())),
+            profile=ProfileOptions(**data.get("profile", {})),
+            limits=RunLimits(**data.get("limits", {})),
+            log_compression=data.get("log_compression"),
+        )
+
+
+@dataclass
+class RunOutcome:
+    success: bool
+    log_path: Path | None
+    root_files: list[Path]
+    execution_time: float
+    # Extra fields merged into the run's metadata entry.
+    details: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class Scheduling:
+    """How and where the jobs of a sweep are started."""
+
+    # Run jobs concurrently, admitting each one only when its NUMBER_OF_THREADS
+    # fits in the remaining core budget (defaults to the visible CPUs).
+    parallel: bool = False
+    core_budget: int | None = None
+    # Order in which jobs are started (see analysis.ordering.ORDER_POLICIES);
+    # durations are predicted from earlier runs of the same benchmark.
+    order: str = "grid"
+    pinning: PinningPolicy = field(default_factory=PinningPolicy)
+    # Hand the jobs to this many local worker processes through the run dir's
+    # SQLite queue (see analysis.jobqueue) instead of running them in-process.
+    workers: int | None = None
+    # With workers: return once the jobs are queued instead of waiting for them.
+    detach: bool = False
+
+
 @dataclass(frozen=True)
 class SimulateConfig:
     benchmark: str
@@ -22,59 +207,841 @@ class SimulateConfig:
     simulation_files: list[Path]
     run_dir: Path
     parameters: dict[str, list[Any]]
+    scheduling: Scheduling = field(default_factory=Scheduling)
+    # Which jobs to run again when the run dir already has metadata:
+    # "missing" (default) skips successful and failed runs, "failed" also reruns
+    # failures, "all" ignores previous results.
+    rerun: str = "missing"
+    run_options: RunOptions = field(default_factory=RunOptions)
+    # How many times each combination runs (fixed count or until converged).
+    repeats: RepeatPolicy = field(default_factory=RepeatPolicy)
+    # Bisect for the AdePT/Geant4 break-even point instead of running the grid.
+    crossover: CrossoverSearch | None = None
+    # Pick NUMBER_OF_EVENTS per combination from a short probe run.
+    calibration: EventCalibration | None = None
+    # Run NUMBER_OF_THREADS along a ladder (strong or weak scaling) instead of the grid.
+    scaling: ScalingStudy | None = None
+    # Smoke-run every simulation file before the sweep (see analysis.preflight).
+    preflight: PreflightCheck | None = None
+    # Read the G4*DATA directories into the page cache with this many threads
+    # before the first run (see analysis.pagecache); None skips warming.
+    warm_cache: int | None = None
+    # Link results of identical runs from other run dirs instead of running
+    # them again (see analysis.resultcache); None disables the cache.
+    result_cache: ResultCache | None = None
+    # Microbenchmark the node before and after the sweep, and every N runs
+    # (see analysis.noise); None skips the probes.
+    noise_probe: NoiseProbe | None = None
+    # Run the AdePT and Geant4 job of each combination back to back, in a
+    # seeded random (or ABBA) order (see analysis.pairing).
+    pair_order: PairOrder = field(default_factory=PairOrder)
 
 
-def run_simulations(*, cfg: SimulateConfig) -> Path:
-    cfg.run_dir.mkdir(parents=True, exist_ok=True)
+RERUN_MODES = ("missing", "failed", "all")
 
-    metadata_file = cfg.run_dir / "simulation_metadata.json"
-    timestamp = datetime.datetime.now(datetime.UTC).isoformat()
+# How the jobs of a sweep are chosen: the parameter grid, a crossover search
+# (analysis.crossover) or a thread-scaling study (analysis.scaling).
+SWEEP_MODES = ("grid", "crossover", "scaling")
 
-    metadata: dict[str, Any] = {
-        "timestamp": timestamp,
-        "benchmark": cfg.benchmark,
-        "runs": [],
-    }
 
-    param_names = list(cfg.parameters.keys())
-    param_values = [cfg.parameters[k] for k in param_names]
-    param_combinations = list(itertools.product(*param_values))
+def _threads(parameters: Mapping[str, Any]) -> int:
+    try:
+        return max(1, int(parameters.get("NUMBER_OF_THREADS", 1)))
+    except (TypeError, ValueError):
+        return 1
+
 
-    total = len(param_combinations) * len(cfg.simulation_files)
-    completed = 0
-    logger.info("Running %s simulations", total)
+@dataclass(frozen=True)
+class SimJob:
+    index: int
+    simulation_file: Path
+    parameters: dict[str, Any]
+    repeat: int = 0
+    # Seed for this repeat; None when the benchmark does not use repeats.
+    seed: int | None = None
+    # 0 or 1 when the job runs first or second in its AdePT/Geant4 pair.
+    pair_position: int | None = None
 
-    for param_combo in param_combinations:
-        param_dict = dict(zip(param_names, param_combo))
+    @property
+    def threads(self) -> int:
+        return _threads(self.parameters)
 
+    @property
+    def env_parameters(self) -> dict[str, Any]:
+        """Parameters exported to Gaussino, including the repeat's seed."""
+        if self.seed is None:
+            return self.parameters
+        return {**self.parameters, SEED_ENV_VAR: self.seed}
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "simulation_file": str(self.simulation_file)}
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> SimJob:
+        return cls(**{**data, "simulation_file": Path(data["simulation_file"])})
+
+
+def run_entry(job: SimJob, outcome: RunOutcome) -> dict[str, Any]:
+    """Metadata entry of a finished run."""
+    entry: dict[str, Any] = {
+        "simulation_file": str(job.simulation_file),
+        "parameters": job.parameters,
+        "output_path": str(outcome.log_path) if outcome.log_path else None,
+        "root_files": [str(p) for p in outcome.root_files],
+        "execution_time": outcome.execution_time,
+        "success": outcome.success,
+        "with_adept": job.simulation_file.stem == "adept_simulation",
+    }
+    if job.seed is not None:
+        entry["repeat"] = job.repeat
+        entry["seed"] = job.seed
+    if job.pair_position is not None:
+        entry["pair_position"] = job.pair_position
+    entry.update(outcome.details)
+    return entry
+
+
+def expand_jobs(cfg: SimulateConfig) -> list[SimJob]:
+    """Expand the parameter grid into jobs, in (combination x simulation file) order."""
+    if cfg.scaling is not None:
+        parameter_sets = scaling_parameter_sets(cfg.parameters, cfg.scaling)
+    else:
+        param_names = list(cfg.parameters.keys())
+        param_values = [cfg.parameters[k] for k in param_names]
+        parameter_sets = [dict(zip(param_names, combo)) for combo in itertools.product(*param_values)]
+
+    jobs: list[SimJob] = []
+    for param_dict in parameter_sets:
         for sim_file in cfg.simulation_files:
-            completed += 1
-            logger.info("Simulation %s/%s: %s (%s)", completed, total, sim_file.name, param_dict)
+            jobs.append(SimJob(index=len(jobs), simulation_file=sim_file, parameters=param_dict))
+    return jobs
+
+
+def _other_combinations(cfg: SimulateConfig, parameter: str) -> list[dict[str, Any]]:
+    """Grid combinations of every parameter except `parameter`."""
+    names = [k for k in cfg.parameters if k != parameter]
+    return [dict(zip(names, combo)) for combo in itertools.product(*(cfg.parameters[k] for k in names))]
+
+
+def _crossover_files(simulation_files: list[Path], *, purpose: str = "crossover mode") -> tuple[Path, Path]:
+    by_stem = {p.stem: p for p in simulation_files}
+    missing = [stem for stem in (ADEPT_STEM, REFERENCE_STEM) if stem not in by_stem]
+    if missing:
+        raise ValueError(f"{purpose} needs simulation files {missing} in simulation_files")
+    return by_stem[ADEPT_STEM], by_stem[REFERENCE_STEM]
+
+
+def result_fingerprint(
+    cache: ResultCache,
+    job: SimJob,
+    *,
+    benchmark: str,
+    executable: Path,
+    options_files: Sequence[Path],
+    options: RunOptions,
+    pinning: PinningPolicy | None = None,
+) -> str:
+    """Result-cache fingerprint of a job, including what its entry measures besides the result."""
+    parameters = job.env_parameters
+    profile = options.profile
+    limits = asdict(options.limits)
+    limits.pop("cgroup")
+    measurement = {
+        "sample_interval": options.sample_interval,
+        "stream_extract": sorted(options.stream_extract),
+        "wrapper": list(options.wrapper),
+        "profile": (
+            [profile.tool, profile.frequency, profile.interval]
+            if profile.enabled and profile.selects(parameters)
+            else None
+        ),
+        "limits": limits,
+        "pinning": asdict(pinning or PinningPolicy()),
+    }
+    return cache.fingerprint(
+        benchmark=benchmark,
+        executable=executable,
+        options_files=options_files,
+        simulation_file=job.simulation_file,
+        parameters=parameters,
+        measurement=measurement,
+    )
+
+
+def _job_key(job: SimJob) -> str:
+    return entry_key(
+        {"simulation_file": str(job.simulation_file), "parameters": job.parameters, "repeat": job.repeat}
+    )
+
+
+def _load_previous_metadata(run_dir: Path) -> dict[str, Any]:
+    try:
+        return load_simulation_metadata(run_dir)
+    except FileNotFoundError:
+        return {}
+    except (OSError, TypeError, json.JSONDecodeError):
+        logger.warning("Ignoring unreadable metadata in %s", run_dir)
+        return {}
+
+
+def _dict_items(value: Any) -> list[dict[str, Any]]:
+    return [item for item in value if isinstance(item, dict)] if isinstance(value, list) else []
+
+
+def _is_complete(entry: dict[str, Any], run_dir: Path) -> bool:
+    """A run counts as done if it succeeded and left a non-empty log behind."""
+    if entry.get("success") is not True or not entry.get("output_path"):
+        return False
+    log_path = Path(entry["output_path"])
+    if not log_path.is_absolute():
+        log_path = run_dir / log_path
+    try:
+        return log_path.stat().st_size > 0
+    except OSError:
+        return False
+
+
+def _reusable_entry(entry: dict[str, Any] | None, *, run_dir: Path, rerun: str) -> bool:
+    if entry is None or rerun == "all":
+        return False
+    if _is_complete(entry, run_dir):
+        return True
+    # A recorded failure is kept unless failures were asked to be rerun.
+    return rerun == "missing" and entry.get("success") is False
+
+
+def entry_performance(entry: dict[str, Any], *, run_dir: Path) -> dict[str, float]:
+    """Performance metrics of a recorded run, from streamed results or from its log."""
+    streamed = entry.get("streamed_results")
+    if isinstance(streamed, dict) and isinstance(streamed.get("performance"), dict):
+        return streamed["performance"]
+    if not entry.get("output_path"):
+        return {}
+    log_path = Path(entry["output_path"])
+    if not log_path.is_absolute():
+        log_path = run_dir / log_path
+    try:
+        return extract_log(log_path, performance_extractor)  # type: ignore[return-value]
+    except OSError:
+        return {}
+
+
+def _validate(cfg: SimulateConfig) -> None:
+    scheduling = cfg.scheduling
+    if cfg.rerun not in RERUN_MODES:
+        raise ValueError(f"rerun must be one of {RERUN_MODES}, got {cfg.rerun!r}")
+    if scheduling.order not in ORDER_POLICIES:
+        raise ValueError(f"order must be one of {ORDER_POLICIES}, got {scheduling.order!r}")
+    if cfg.run_options.launch not in LAUNCH_MODES:
+        raise ValueError(f"launch must be one of {LAUNCH_MODES}, got {cfg.run_options.launch!r}")
+    check_cgroup_parent(cfg.run_options.limits)
+    if cfg.crossover is not None and cfg.calibration is not None:
+        raise ValueError("event calibration is not supported in crossover mode")
+    if cfg.scaling is not None and (cfg.crossover is not None or cfg.calibration is not None):
+        raise ValueError("a scaling study cannot be combined with crossover mode or event calibration")
+    if cfg.pair_order.enabled:
+        if scheduling.order != "grid":
+            raise ValueError("a pair order runs AdePT and Geant4 back to back; it needs order 'grid'")
+        _crossover_files(cfg.simulation_files, purpose="a pair order")
+    if scheduling.workers is not None:
+        if scheduling.workers < 1:
+            raise ValueError(f"workers must be >= 1, got {scheduling.workers}")
+        if scheduling.pinning.enabled:
+            raise ValueError("CPU pinning is not supported with queue workers")
+        if cfg.noise_probe is not None and cfg.noise_probe.every is not None:
+            raise ValueError("noise probes between runs are not supported with queue workers")
+        if cfg.pair_order.enabled:
+            raise ValueError("a pair order needs both runs of a pair back to back; not supported with queue workers")
+        if scheduling.detach and (
+            cfg.crossover is not None or cfg.calibration is not None or cfg.repeats.mode == "adaptive"
+        ):
+            raise ValueError("crossover mode, event calibration and adaptive repeats need results; do not detach")
+
+
+def run_simulations(*, cfg: SimulateConfig) -> Path:
+    _validate(cfg)
+    return Sweep(cfg).run()
+
+
+class Sweep:
+    """One `simulate` invocation over a run dir.
+
+    Jobs recorded in the run dir (or found in the result cache) are reused;
+    the others run in-process under the core budget or through queue workers.
+    Everything is journaled as it happens, and `run()` compacts the journal
+    into the metadata file.
+    """
+
+    def __init__(self, cfg: SimulateConfig) -> None:
+        self.cfg = cfg
+        cfg.run_dir.mkdir(parents=True, exist_ok=True)
+        self.journal = RunJournal(cfg.run_dir / JOURNAL_NAME)
+        # Runs already recorded in the run dir that this sweep reuses instead of rerunning.
+        self.reusable: dict[str, dict[str, Any]] = {}
+        # Noise probes of earlier sweeps stay, for the runs reused from them.
+        self.noise_probes: list[dict[str, Any]] = []
+        self._resume()
+
+        scheduling = cfg.scheduling
+        self.budget: int | None = (scheduling.core_budget or visible_cpu_count()) if scheduling.parallel else None
+        self.allocator: CpuAllocator | None = None
+        if scheduling.pinning.enabled:
+            self.allocator = CpuAllocator(read_topology(), smt=scheduling.pinning.smt)
+            # Pinned runs must never share CPUs, so the budget cannot exceed what can be handed out.
+            if self.budget is not None:
+                self.budget = min(self.budget, self.allocator.capacity)
+            logger.info("Pinning runs to NUMA-packed CPU sets (%s usable CPUs)", self.allocator.capacity)
+        if self.budget is not None:
+            logger.info("Concurrent mode with a budget of %s cores", self.budget)
+
+        self.model: DurationModel | None = None
+        if scheduling.order != "grid":
+            # Sibling run dirs of the same benchmark provide the history.
+            self.model = fit_duration_model(load_history(cfg.run_dir.parent))
+            logger.info("Jobs ordered %s (%s timed runs in history)", scheduling.order, len(self.model.observed))
+
+        self.env_cache_dir = cfg.run_options.env_cache_dir or (cfg.run_dir / ".cache")
+        self.launch_env = resolve_launch_env(
+            cfg.executable, mode=cfg.run_options.launch, cache_dir=self.env_cache_dir
+        )
+        self.journal.record_sweep(launch=self.launch_env.to_metadata())
+        # Until the first run that executes: see ensure_ready().
+        self.journal.record_sweep(page_cache=WarmResult(warmed=False).to_metadata())
+
+        self.pair_order = with_seed(cfg.pair_order)
+        if self.pair_order.enabled:
+            logger.info("AdePT/Geant4 pairs in %s order (seed %s)", self.pair_order.mode, self.pair_order.seed)
+            self.journal.record_sweep(pair_order=self.pair_order.to_metadata())
+
+        self.queue: JobQueue | None = None
+        self.workers: list[subprocess.Popen] = []
+        if scheduling.workers is not None:
+            self._open_queue(scheduling.workers)
+
+        self.cache = cfg.result_cache
+        self._fingerprints: dict[str, str] = {}
+        self.policy = cfg.repeats
+        self.scheduled: list[SimJob] = []
+        self.results: dict[str, dict[str, Any]] = {}
+        # Recorded runs per base job, and the repeat summary of adaptive/fixed repeats.
+        self.runs: dict[int, int] = {}
+        self.summary: list[dict[str, Any]] = []
+        self._performance: dict[str, dict[str, float]] = {}
+        self._counter = itertools.count(1)
+        self._total = 0
+        self._runs_since_probe = 0
+        self._warm_pending = cfg.warm_cache is not None
+        self._preflight_pending = cfg.preflight is not None
+
+    def _resume(self) -> None:
+        cfg = self.cfg
+        sweep: dict[str, Any] = {
+            "timestamp": datetime.datetime.now(datetime.UTC).isoformat(),
+            "benchmark": cfg.benchmark,
+        }
+        # Queue workers left over from an earlier sweep may still append to the journal.
+        with self.journal.locked():
+            if cfg.rerun != "all":
+                previous = _load_previous_metadata(cfg.run_dir)
+                # Entries that no longer match the grid are carried over rather than dropped.
+                for entry in _dict_items(previous.get("runs")):
+                    if _reusable_entry(entry, run_dir=cfg.run_dir, rerun=cfg.rerun):
+                        self.reusable[entry_key(entry)] = entry
+                self.noise_probes = _dict_items(previous.get("noise_probes"))
+            if self.noise_probes:
+                sweep["noise_probes"] = self.noise_probes
+            self.journal.start(sweep=sweep, entries=self.reusable.values())
+        if self.reusable:
+            logger.info("Resuming: %s simulations already recorded", len(self.reusable))
+
+    def _warm_page_cache(self, threads: int) -> None:
+        # The G4*DATA variables are only set inside the Gaussino environment.
+        gaussino_env: Mapping[str, str] | None = self.launch_env.env
+        if gaussino_env is None:
+            try:
+                gaussino_env, _ = load_or_capture(self.cfg.executable, cache_dir=self.env_cache_dir)
+            except RuntimeError:
+                logger.warning("Could not capture the Gaussino environment; warming from our own")
+                gaussino_env = os.environ
+        page_cache = warm_page_cache(dataset_dirs(gaussino_env), threads=threads)
+        if not page_cache.warmed:
+            logger.warning("No G4*DATA directories in the Gaussino environment; nothing warmed")
+        self.journal.record_sweep(page_cache=page_cache.to_metadata())
 
-            success, log_rel, root_rels, execution_time = _run_one(
+    def _open_queue(self, workers: int) -> None:
+        cfg = self.cfg
+        self.queue = JobQueue(cfg.run_dir / QUEUE_NAME)
+        self.queue.set_setting(
+            "config",
+            {
+                "benchmark": cfg.benchmark,
+                "executable": str(cfg.executable),
+                "options_files": [str(p) for p in cfg.options_files],
+                "run_options": cfg.run_options.to_dict(),
+                "budget": self.budget,
+                # Workers store their runs in the result cache themselves.
+                "result_cache": cfg.result_cache.to_dict() if cfg.result_cache is not None else None,
+            },
+        )
+        self.queue.set_setting("workers", workers)
+        self.queue.set_setting("drain", 0)
+
+    def run(self) -> Path:
+        """Run the sweep and write the metadata file; returns its path."""
+        cfg = self.cfg
+        if cfg.noise_probe is not None:
+            self.probe_noise("before")
+
+        if cfg.crossover is None:
+            jobs = expand_jobs(cfg)
+            if cfg.calibration is not None:
+                jobs = self.calibrate(jobs, cfg.calibration)
+            self.run_points(jobs)
+        else:
+            self.search_crossover(cfg.crossover)
+
+        if cfg.scaling is not None:
+            self.journal.record_sweep(scaling=cfg.scaling.to_metadata())
+        if self.policy.enabled:
+            self.journal.record_sweep(repeats=self.summary)
+        if cfg.noise_probe is not None and not cfg.scheduling.detach:
+            self.probe_noise("after")
+
+        if self.queue is not None:
+            self.queue.close()
+            if cfg.scheduling.detach:
+                logger.info("Jobs left to the workers; follow them with `analysis status`")
+
+        # Runs are listed in job order, whatever order they finished in.
+        self.scheduled.sort(key=lambda job: (job.index, job.repeat))
+        metadata_file = compact_journal(cfg.run_dir, order=[_job_key(job) for job in self.scheduled])
+        logger.info("Wrote %s", metadata_file)
+        return metadata_file
+
+    # Launching and recording runs.
+
+    def launch(self, job: SimJob, run_dir: Path) -> RunOutcome:
+        cfg = self.cfg
+        allocator = self.allocator
+        cpus = allocator.acquire(job.threads) if allocator is not None else []
+        try:
+            outcome = _run_one(
                 executable=cfg.executable,
                 options_files=cfg.options_files,
-                simulation_file=sim_file,
-                run_dir=cfg.run_dir,
-                param_dict=param_dict,
+                simulation_file=job.simulation_file,
+                run_dir=run_dir,
+                param_dict=job.env_parameters,
+                options=cfg.run_options,
+                benchmark=cfg.benchmark,
+                cpus=cpus,
+                launch_env=self.launch_env,
             )
+        finally:
+            if allocator is not None:
+                allocator.release(cpus)
+        if allocator is not None:
+            outcome.details["cpus"] = format_cpu_list(cpus)
+            outcome.details["numa_nodes"] = allocator.nodes_of(cpus)
+        return outcome
 
-            metadata["runs"].append(
-                {
-                    "simulation_file": str(sim_file),
-                    "parameters": param_dict,
-                    "output_path": str(log_rel) if log_rel else None,
-                    "root_files": [str(p) for p in root_rels],
-                    "execution_time": execution_time,
-                    "success": success,
-                    "with_adept": sim_file.stem == "adept_simulation",
-                }
+    def _run_unit(self, unit: list[SimJob]) -> list[RunOutcome]:
+        outcomes: list[RunOutcome] = []
+        for job in unit:
+            logger.info(
+                "Simulation %s/%s: %s (%s)",
+                next(self._counter),
+                self._total,
+                job.simulation_file.name,
+                job.env_parameters,
             )
+            outcomes.append(self.launch(job, self.cfg.run_dir))
+        return outcomes
+
+    def _record_unit(self, unit: list[SimJob], outcomes: list[RunOutcome]) -> None:
+        for job, outcome in zip(unit, outcomes):
+            entry = run_entry(job, outcome)
+            self.journal.record_run(entry)
+            self.results[_job_key(job)] = entry
+            self._cache_result(job, entry)
 
-            metadata_file.write_text(json.dumps(metadata, indent=2))
+    def probe_noise(self, label: str) -> None:
+        assert self.cfg.noise_probe is not None
+        probe = run_noise_probe(label=label, rounds=self.cfg.noise_probe.rounds)
+        logger.info(
+            "Noise probe (%s): cpu %.0f MB/s, memory %.0f MB/s", label, probe["cpu_score"], probe["memory_score"]
+        )
+        self.noise_probes.append(probe)
+        self.journal.record_sweep(noise_probes=self.noise_probes)
+        self._runs_since_probe = 0
 
-    logger.info("Wrote %s", metadata_file)
-    return metadata_file
+    # Result cache.
+
+    def fingerprint(self, job: SimJob) -> str | None:
+        """Result-cache fingerprint of `job`; None when an input cannot be read (a cache miss)."""
+        assert self.cache is not None
+        key = _job_key(job)
+        if key not in self._fingerprints:
+            try:
+                self._fingerprints[key] = result_fingerprint(
+                    self.cache,
+                    job,
+                    benchmark=self.cfg.benchmark,
+                    executable=self.cfg.executable,
+                    options_files=self.cfg.options_files,
+                    options=self.cfg.run_options,
+                    pinning=self.cfg.scheduling.pinning,
+                )
+            except OSError as err:
+                # Missing inputs are reported by the preflight, or fail the run itself.
+                logger.debug("No result-cache fingerprint for %s: %s", job.simulation_file.name, err)
+                return None
+        return self._fingerprints[key]
+
+    def _cache_result(self, job: SimJob, entry: dict[str, Any]) -> None:
+        if self.cache is not None and entry.get("success") is True and "result_cache" not in entry:
+            fingerprint = self.fingerprint(job)
+            if fingerprint is not None:
+                self.cache.store(fingerprint, entry, self.cfg.run_dir)
+
+    def _reuse(self, batch: list[SimJob]) -> list[SimJob]:
+        """Take the results of `batch` from the run dir or the result cache; returns the jobs left to run."""
+        to_run: list[SimJob] = []
+        restored = 0
+        for job in batch:
+            entry = self.reusable.get(_job_key(job))
+            if entry is None and self.cache is not None and self.cfg.rerun != "all":
+                fingerprint = self.fingerprint(job)
+                entry = self.cache.restore(fingerprint, self.cfg.run_dir) if fingerprint is not None else None
+                if entry is not None:
+                    self.journal.record_run(entry)
+                    restored += 1
+            if entry is not None:
+                self.results[_job_key(job)] = entry
+            else:
+                to_run.append(job)
+        if restored:
+            logger.info("Restored %s simulations from the result cache", restored)
+        return to_run
+
+    # Scheduling.
+
+    def execute(self, batch: list[SimJob]) -> None:
+        """Run the jobs of `batch` that have no result yet, and wait for them (unless detached)."""
+        self.scheduled.extend(batch)
+        to_run = self._reuse(batch)
+        if to_run:
+            self.ensure_ready()
+
+        if self.pair_order.enabled:
+            to_run = [
+                replace(job, pair_position=position)
+                for job, position in order_pairs(
+                    to_run,
+                    order=self.pair_order,
+                    combination=lambda job: job.parameters,
+                    repeat=lambda job: job.repeat,
+                    is_adept=lambda job: job.simulation_file.stem == ADEPT_STEM,
+                )
+            ]
+        model = self.model
+        if model is not None:
+            to_run = order_jobs(
+                to_run,
+                policy=self.cfg.scheduling.order,
+                duration=lambda job: model.predict(job.simulation_file, job.parameters),
+            )
+
+        self._total += len(to_run)
+        if self.queue is not None:
+            self._run_queued(self.queue, to_run)
+        else:
+            self._run_in_process(to_run)
+
+    def _run_in_process(self, jobs: list[SimJob]) -> None:
+        logger.info("Running %s simulations", len(jobs))
+        # The two runs of a pair are one unit: never concurrent, never split by a probe.
+        units = pair_units(jobs, position=lambda job: job.pair_position)
+        every = self.cfg.noise_probe.every if self.cfg.noise_probe is not None else None
+        while units:
+            chunk = units
+            if every is not None:
+                # Probes need a quiet node, so each chunk drains before the next probe.
+                if self._runs_since_probe >= every:
+                    self.probe_noise("between")
+                size, room = 1, every - self._runs_since_probe - len(units[0])
+                while size < len(units) and room >= len(units[size]):
+                    room -= len(units[size])
+                    size += 1
+                chunk = units[:size]
+            units = units[len(chunk) :]
+            run_with_core_budget(
+                chunk,
+                cost=lambda unit: max(job.threads for job in unit),
+                budget=self.budget,
+                run=self._run_unit,
+                on_done=self._record_unit,
+            )
+            self._runs_since_probe += sum(len(unit) for unit in chunk)
+
+    def _top_up_workers(self, queue: JobQueue) -> set[int]:
+        """Start workers until the queue's target count is alive. Returns the live pids."""
+        live = set(queue.live_workers()) | {p.pid for p in self.workers if p.poll() is None}
+        missing = int(queue.setting("workers", 0)) - len(live)
+        if missing > 0:
+            started = spawn_workers(self.cfg.run_dir, missing)
+            self.workers.extend(started)
+            live.update(p.pid for p in started)
+        return live
+
+    def _run_queued(self, queue: JobQueue, jobs: list[SimJob]) -> None:
+        keys = [_job_key(job) for job in jobs]
+        queue.enqueue((key, job.threads, job.to_dict()) for key, job in zip(keys, jobs))
+        logger.info("Queued %s simulations for %s workers", len(jobs), queue.setting("workers"))
+        if self.cfg.scheduling.detach:
+            self._top_up_workers(queue)
+            return
+
+        warned = False
+        while True:
+            queue.requeue_orphans()
+            counts = queue.counts(keys)
+            if counts["queued"] + counts["running"] == 0:
+                break
+            live = self._top_up_workers(queue) if counts["queued"] else set(queue.live_workers())
+            if not live and not warned:
+                logger.warning(
+                    "%s simulations queued but no worker is alive; add some with `analysis workers --add`",
+                    counts["queued"],
+                )
+            warned = not live
+            time.sleep(POLL_INTERVAL)
+        self.results.update(queue.entries(keys))
+
+    # Repeats.
+
+    def repeat_of(self, job: SimJob, repeat: int) -> SimJob:
+        seed = self.policy.seed(repeat) if self.policy.enabled else None
+        return replace(job, repeat=repeat, seed=seed)
+
+    def metric_values(self, job: SimJob, metric: str) -> list[float]:
+        """`metric` of every recorded repeat of base job `job`."""
+        values: list[float] = []
+        for r in range(self.runs[job.index]):
+            key = _job_key(self.repeat_of(job, r))
+            if key not in self._performance and key in self.results:
+                self._performance[key] = entry_performance(self.results[key], run_dir=self.cfg.run_dir)
+            value = self._performance.get(key, {}).get(metric)
+            if value is not None:
+                values.append(float(value))
+        return values
+
+    def run_points(self, base_jobs: list[SimJob]) -> None:
+        """Run every base job `policy.min_repeats` times, then adaptively more."""
+        policy = self.policy
+        for job in base_jobs:
+            self.runs[job.index] = policy.min_repeats
+        batch = [self.repeat_of(job, r) for job in base_jobs for r in range(policy.min_repeats)]
+        while batch:
+            self.execute(batch)
+            # Adaptive mode: one more repeat for every combination whose CI is still too wide.
+            batch = []
+            for job in base_jobs:
+                values = self.metric_values(job, policy.metric)
+                if needs_more(values, runs=self.runs[job.index], policy=policy):
+                    batch.append(self.repeat_of(job, self.runs[job.index]))
+                    self.runs[job.index] += 1
+
+        if policy.enabled:
+            for job in base_jobs:
+                values = self.metric_values(job, policy.metric)
+                rel_ci = relative_ci_halfwidth(values, confidence=policy.confidence)
+                self.summary.append(
+                    {
+                        "simulation_file": str(job.simulation_file),
+                        "parameters": job.parameters,
+                        "runs": self.runs[job.index],
+                        "metric": policy.metric,
+                        "mean": statistics.fmean(values) if values else None,
+                        "rel_ci_halfwidth": rel_ci if math.isfinite(rel_ci) else None,
+                        "converged": rel_ci <= policy.target_rel_ci,
+                    }
+                )
+
+    # Sweep modes besides the plain grid.
+
+    def calibrate(self, jobs: list[SimJob], calibration: EventCalibration) -> list[SimJob]:
+        """Set NUMBER_OF_EVENTS of every job from a short probe of its combination."""
+        cfg = self.cfg
+        calib_dir = cfg.run_dir / CALIBRATION_DIR
+        calib_dir.mkdir(parents=True, exist_ok=True)
+        known = load_calibration(cfg.run_dir) if cfg.rerun != "all" else {}
+        if cfg.rerun == "failed":
+            # Failed probes are retried like failed runs.
+            known = {key: result for key, result in known.items() if result.get("events") is not None}
+
+        probes: dict[str, SimJob] = {}
+        for job in jobs:
+            key = calibration_key(job.simulation_file, job.parameters)
+            if key not in known and key not in probes:
+                parameters = {**job.parameters, EVENTS_PARAMETER: calibration.probe_events}
+                probes[key] = replace(job, parameters=parameters)
+
+        def run_probe(job: SimJob) -> RunOutcome:
+            logger.info("Calibration probe: %s (%s)", job.simulation_file.name, job.parameters)
+            return self.launch(job, calib_dir)
+
+        def record_probe(job: SimJob, outcome: RunOutcome) -> None:
+            performance = entry_performance(
+                {"output_path": str(outcome.log_path) if outcome.log_path else None, **outcome.details},
+                run_dir=calib_dir,
+            )
+            per_event = seconds_per_event(
+                performance, events=calibration.probe_events, execution_time=outcome.execution_time
+            )
+            result: dict[str, Any] = {
+                "probe_events": calibration.probe_events,
+                "probe_log": str(outcome.log_path) if outcome.log_path else None,
+                "seconds_per_event": per_event,
+                "events": None,
+            }
+            if outcome.success and per_event is not None:
+                result["events"] = calibrated_events(per_event, calibration)
+            known[calibration_key(job.simulation_file, job.parameters)] = result
+            save_calibration(cfg.run_dir, known)
+
+        if probes:
+            self.ensure_ready()
+            logger.info("Calibrating NUMBER_OF_EVENTS with %s probe runs", len(probes))
+            run_with_core_budget(
+                list(probes.values()),
+                cost=lambda job: job.threads,
+                budget=self.budget,
+                run=run_probe,
+                on_done=record_probe,
+            )
+
+        calibrated: list[SimJob] = []
+        seen: set[str] = set()
+        for job in jobs:
+            key = calibration_key(job.simulation_file, job.parameters)
+            events = known.get(key, {}).get("events")
+            if events is None:
+                logger.warning(
+                    "Calibration failed for %s (%s); keeping NUMBER_OF_EVENTS from the grid",
+                    job.simulation_file.name,
+                    job.parameters,
+                )
+            else:
+                if key in seen:
+                    # Grid values of NUMBER_OF_EVENTS collapse onto the calibrated count.
+                    continue
+                seen.add(key)
+                job = replace(job, parameters={**job.parameters, EVENTS_PARAMETER: events})
+            calibrated.append(replace(job, index=len(calibrated)))
+        return calibrated
+
+    def search_crossover(self, search: CrossoverSearch) -> None:
+        """Bisect, per combination of the other parameters, for the AdePT/Geant4 break-even point."""
+        adept_file, reference_file = _crossover_files(self.cfg.simulation_files)
+        states = [CrossoverState(search, group) for group in _other_combinations(self.cfg, search.parameter)]
+        index = itertools.count()
+
+        def probe_jobs(state: CrossoverState, value: float) -> list[SimJob]:
+            parameters = {**state.group, search.parameter: value}
+            return [
+                SimJob(index=next(index), simulation_file=sim_file, parameters=parameters)
+                for sim_file in (adept_file, reference_file)
+            ]
+
+        def mean_metric(job: SimJob) -> float | None:
+            values = self.metric_values(job, search.metric)
+            return statistics.fmean(values) if values else None
+
+        pending = [(state, value) for state in states for value in state.initial_points()]
+        while pending:
+            probes = [(state, value, probe_jobs(state, value)) for state, value in pending]
+            self.run_points([job for _, _, jobs in probes for job in jobs])
+            for state, value, (adept_job, reference_job) in probes:
+                adept, reference = mean_metric(adept_job), mean_metric(reference_job)
+                state.ratios[value] = adept / reference if adept and reference else None
+                logger.info(
+                    "Crossover probe %s=%s %s: AdePT/Geant4 %s ratio %s",
+                    search.parameter,
+                    value,
+                    state.group,
+                    search.metric,
+                    state.ratios[value],
+                )
+            pending = [(state, value) for state in states if (value := state.propose()) is not None]
+
+        self.journal.record_sweep(crossover=[state.summary() for state in states])
+
+    # Before the first run.
+
+    def ensure_ready(self) -> None:
+        """Warm the page cache and preflight before the first simulation that runs.
+
+        Neither happens when every simulation is resumed or restored.
+        """
+        if self._warm_pending:
+            assert self.cfg.warm_cache is not None
+            self._warm_pending = False
+            self._warm_page_cache(self.cfg.warm_cache)
+        if self._preflight_pending:
+            assert self.cfg.preflight is not None
+            self._preflight_pending = False
+            self.preflight(self.cfg.preflight)
+
+    def preflight(self, check: PreflightCheck) -> None:
+        """Abort before the sweep if inputs are missing or a tiny run of any simulation file fails."""
+        cfg = self.cfg
+        problems = missing_inputs([*cfg.options_files, *cfg.simulation_files])
+        if problems:
+            raise PreflightError("Preflight failed, sweep not started:\n  " + "\n  ".join(problems))
+
+        preflight_dir = cfg.run_dir / PREFLIGHT_DIR
+        preflight_dir.mkdir(parents=True, exist_ok=True)
+        parameters = smoke_parameters(cfg.parameters, check)
+        smoke_jobs = [
+            SimJob(index=i, simulation_file=sim_file, parameters=parameters)
+            for i, sim_file in enumerate(cfg.simulation_files)
+        ]
+
+        def run_smoke(job: SimJob) -> RunOutcome:
+            logger.info("Preflight: %s (%s)", job.simulation_file.name, job.parameters)
+            return self.launch(job, preflight_dir)
+
+        def check_smoke(job: SimJob, outcome: RunOutcome) -> None:
+            problems.extend(
+                f"{job.simulation_file.name}: {problem}"
+                for problem in smoke_run_problems(
+                    success=outcome.success,
+                    log_path=preflight_dir / outcome.log_path if outcome.log_path else None,
+                    root_files=outcome.root_files,
+                    check=check,
+                )
+            )
+
+        run_with_core_budget(
+            smoke_jobs, cost=lambda job: job.threads, budget=self.budget, run=run_smoke, on_done=check_smoke
+        )
+        if problems:
+            raise PreflightError("Preflight failed, sweep not started:\n  " + "\n  ".join(problems))
+        logger.info("Preflight passed for %s simulation files", len(smoke_jobs))
+
+
+def _move_atomic(src: Path, dst: Path) -> None:
+    """Move `src` to `dst` so that `dst` never appears half-written."""
+    try:
+        os.replace(src, dst)
+        return
+    except OSError:
+        # Typically EXDEV: scratch lives on another filesystem (tmpfs, local SSD).
+        pass
+    partial = dst.with_name(f".{dst.name}.partial")
+    shutil.copyfile(src, partial)
+    os.replace(partial, dst)
+    src.unlink()
 
 
 def _run_one(
@@ -84,8 +1051,14 @@ def _run_one(
     simulation_file: Path,
     run_dir: Path,
     param_dict: dict[str, Any],
-) -> tuple[bool, Path | None, list[Path], float]:
-    env = dict(os.environ)
+    options: RunOptions | None = None,
+    benchmark: str = "",
+    cpus: Sequence[int] = (),
+    launch_env: LaunchEnv | None = None,
+) -> RunOutcome:
+    options = options or RunOptions()
+    launch_env = launch_env or LaunchEnv()
+    env = dict(os.environ if launch_env.env is None else launch_env.env)
     for k, v in param_dict.items():
         env[str(k)] = str(v)
 
@@ -93,37 +1066,177 @@ def _run_one(
     output_base = f"{simulation_file.stem}_{param_str}" if param_str else simulation_file.stem
 
     log_name = f"{output_base}.log"
+    if options.log_compression:
+        log_name += LOG_SUFFIXES[options.log_compression]
     log_path = run_dir / log_name
 
-    # Snapshot root files before
-    cwd = Path.cwd()
-    before = {p.resolve() for p in cwd.glob("*.root")}
+    # Paths must survive the change of working directory.
+    gaudirun_args = [os.path.abspath(p) for p in options_files] + [os.path.abspath(simulation_file)]
+    if launch_env.env is None:
+        cmd = (
+            [os.path.abspath(executable), "env"]
+            + [f"{k}={v}" for k, v in param_dict.items()]
+            + ["gaudirun.py"]
+            + gaudirun_args
+        )
+    else:
+        # The environment `run env` would set up is already in `env`.
+        cmd = [resolve_gaudirun(env) or "gaudirun.py"] + gaudirun_args
 
-    cmd = (
-        [str(executable), "env"]
-        + [f"{k}={v}" for k, v in param_dict.items()]
-        + ["gaudirun.py"]
-        + [str(p) for p in options_files]
-        + [str(simulation_file)]
-    )
+    wrapper_output = run_dir / f"{output_base}.wrapper.txt"
+    if options.wrapper:
+        cmd = build_wrapper(options.wrapper, output_path=wrapper_output) + cmd
+
+    profile_tool: str | None = None
+    perf_data = run_dir / f"{output_base}.perf.data"
+    if options.profile.enabled and options.profile.selects(param_dict):
+        profile_tool = resolve_tool(options.profile.tool)
+        if profile_tool == "perf":
+            cmd = perf_record_prefix(perf_data, frequency=options.profile.frequency) + cmd
+
+    folded = run_dir / f"{output_base}.folded"
+    timeseries = run_dir / f"{output_base}.resources.csv"
+    # Outputs of an earlier attempt may be hard links into the result cache;
+    # writing through them would change the cached copy.
+    for stale in (log_path, wrapper_output, folded, timeseries):
+        stale.unlink(missing_ok=True)
 
+    scratch_root = options.scratch_root or (run_dir / ".scratch")
+    scratch_root.mkdir(parents=True, exist_ok=True)
+    scratch_dir = Path(tempfile.mkdtemp(prefix=f"{simulation_file.stem}-", dir=scratch_root))
+
+    cgroup: Path | None = None
+    if options.limits.enabled:
+        if options.limits.needs_cgroup:
+            cgroup = create_run_cgroup(
+                options.limits, name=f"gaussino-{scratch_dir.name}", threads=_threads(param_dict)
+            )
+        cmd = limit_exec_prefix(options.limits, cgroup=cgroup) + cmd
+
+    accumulators: dict[str, LogAccumulator] = {}
+    for extract_type in options.stream_extract:
+        try:
+            accumulators[extract_type] = get_accumulator(benchmark, extract_type)
+        except ValueError:
+            logger.warning("No streaming %s extractor for benchmark %s", extract_type, benchmark)
+
+    details: dict[str, Any] = {"launch": launch_env.launch}
+    if launch_env.differing is not None:
+        # Whether the cached environment matched a fresh `run env` (launch mode verify).
+        details["launch_verification"] = launch_env.to_metadata()["verification"]
+    sampler: ProcessTreeSampler | None = None
+    stack_sampler: StackSampler | None = None
+    pump: LogPump | None = None
     start = time.time()
+    details["started_at"] = round(start, 3)
+    # A compressed log is written by the pump, never by the child itself.
+    piped = bool(accumulators) or options.log_compression is not None
     try:
-        with log_path.open("w") as f:
-            f.write(f"# Command: {' '.join(cmd)}\n")
-            f.write(f"# Timestamp: {datetime.datetime.now(datetime.UTC).isoformat()}\n\n")
-            proc = subprocess.run(cmd, env=env, stdout=f, stderr=subprocess.STDOUT, text=True)
+        with open_log_writer(log_path) as f:
+            f.write(f"# Command: {' '.join(cmd)}\n".encode())
+            f.write(f"# Timestamp: {datetime.datetime.now(datetime.UTC).isoformat()}\n\n".encode())
+            # Without the pump the child writes straight to the file descriptor.
+            f.flush()
+            with pinned_thread(cpus):
+                proc = subprocess.Popen(
+                    cmd,
+                    env=env,
+                    cwd=scratch_dir,
+                    stdout=subprocess.PIPE if piped else f,
+                    stderr=subprocess.STDOUT,
+                    # Own session, so the watchdog can kill the whole process tree.
+                    start_new_session=options.watchdog.enabled,
+                )
+            try:
+                if piped:
+                    pump = LogPump(
+                        proc.stdout,  # type: ignore[arg-type]
+                        f,
+                        accumulators,
+                        # Plain logs are flushed per line, compressed ones periodically, so the
+                        # stall watchdog sees the log grow while the run progresses.
+                        flush_interval=FLUSH_INTERVAL if options.log_compression else 0.0,
+                    ).start()
+                if options.sample_interval:
+                    sampler = ProcessTreeSampler(proc.pid, interval=options.sample_interval).start()
+                if profile_tool == "stack-sampler":
+                    stack_sampler = StackSampler(proc.pid, interval=options.profile.interval).start()
+                try:
+                    exit_info = supervise(proc, limits=options.watchdog, log_path=log_path)
+                finally:
+                    if sampler is not None:
+                        sampler.stop()
+                    if stack_sampler is not None:
+                        stack_sampler.stop()
+            except BaseException:
+                # Never leave the child running (or unreaped) behind a failed launch.
+                if proc.returncode is None:
+                    proc.returncode = kill_tree(proc, grace=options.watchdog.kill_grace)[0]
+                raise
+            if pump is not None:
+                streamed = pump.join()
+                if streamed:
+                    details["streamed_results"] = streamed
     except Exception:
         execution_time = time.time() - start
         logger.exception("Error running simulation")
-        return False, None, [], execution_time
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+        if cgroup is not None:
+            remove_cgroup(cgroup)
+        return RunOutcome(False, None, [], execution_time)
 
     execution_time = time.time() - start
-    with log_path.open("a") as f:
-        f.write(f"\n# Execution time: {execution_time:.2f} seconds\n")
+    returncode, rusage = exit_info.returncode, exit_info.rusage
+    limit_hit: str | None = None
+    if options.limits.enabled:
+        events = cgroup_events(cgroup) if cgroup is not None else {}
+        if cgroup is not None:
+            remove_cgroup(cgroup)
+        limit_hit = classify_limit_exit(
+            returncode, limits=options.limits, events=events, rusage=rusage, log_path=log_path
+        )
+        details["limits"] = {"cgroup": cgroup is not None, **events}
+
+    with open_log_writer(log_path, append=True) as f:
+        if exit_info.killed_reason:
+            f.write(f"\n# Killed by watchdog: {exit_info.killed_reason}\n".encode())
+        elif limit_hit:
+            f.write(f"\n# Hit resource limit: {limit_hit}\n".encode())
+        f.write(f"\n# Execution time: {execution_time:.2f} seconds\n".encode())
+
+    if exit_info.killed_reason:
+        details["status"] = exit_info.killed_reason
+    elif limit_hit:
+        details["status"] = limit_hit
+    else:
+        details["status"] = "ok" if returncode == 0 else "failed"
+
+    if options.wrapper:
+        details["counters"] = parse_wrapper_output(options.wrapper, wrapper_output)
+        if wrapper_output.exists():
+            details["wrapper_output"] = str(wrapper_output.relative_to(run_dir))
 
-    after = {p.resolve() for p in cwd.glob("*.root")}
-    new_roots = sorted(after - before)
+    if profile_tool is not None:
+        if stack_sampler is not None:
+            stacks = stack_sampler.stacks
+        else:
+            stacks = fold_perf_data(perf_data)
+            perf_data.unlink(missing_ok=True)
+        write_folded(folded, stacks)
+        details["profile"] = {
+            "tool": profile_tool,
+            "folded": str(folded.relative_to(run_dir)),
+            "samples": sum(stacks.values()),
+        }
+
+    if sampler is not None:
+        sampler.write_timeseries(timeseries)
+        details["resources"] = {
+            **sampler.summary(wall_time=execution_time, rusage=rusage),
+            "timeseries": str(timeseries.relative_to(run_dir)),
+        }
+
+    new_roots = sorted(scratch_dir.glob("*.root"))
 
     moved: list[Path] = []
     for idx, src in enumerate(new_roots):
@@ -131,12 +1244,20 @@ def _run_one(
         suffix = f"_{idx}" if len(new_roots) > 1 else ""
         dst = run_dir / f"{output_base}{suffix}.root"
         try:
-            src.rename(dst)
+            _move_atomic(src, dst)
             moved.append(dst.relative_to(run_dir))
         except Exception:
             logger.exception("Failed moving root file %s -> %s", src, dst)
 
+    shutil.rmtree(scratch_dir, ignore_errors=True)
+
     if not moved:
         logger.warning("No .root output detected for %s", output_base)
 
-    return proc.returncode == 0, log_path.relative_to(run_dir), moved, execution_time
+    return RunOutcome(
+        success=returncode == 0,
+        log_path=log_path.relative_to(run_dir),
+        root_files=moved,
+        execution_time=execution_time,
+        details=details,
+    )
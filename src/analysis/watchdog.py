@@ -0,0 +1,184 @@
+"""
+Supervision of a running simulation: wall-time limit and stall detection.
+
+A run is considered stalled when, for a whole quiet period, its log did not
+grow and its process tree used (almost) no CPU. Hung Gaussino jobs (e.g. a
+stuck GPU transfer or a deadlocked event slot) are killed, together with all
+their descendants, so that the sweep can carry on.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import select
+import signal
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from analysis.sampler import process_tree
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class WatchdogLimits:
+    # Maximum wall time of a run, in seconds.
+    timeout: float | None = None
+    # Quiet period after which a run without log growth or CPU activity is killed.
+    stall_timeout: float | None = None
+    # CPU use (in cores) below which the process tree counts as idle.
+    stall_cpu_cores: float = 0.05
+    poll_interval: float = 5.0
+    # Time between SIGTERM and SIGKILL.
+    kill_grace: float = 10.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.timeout is not None or self.stall_timeout is not None
+
+
+@dataclass(frozen=True)
+class ProcessExit:
+    returncode: int
+    rusage: Any
+    # "timeout" or "stalled" when the watchdog killed the run.
+    killed_reason: str | None = None
+
+
+def _seconds(settings: dict[str, Any], key: str) -> float | None:
+    value = settings.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError(f"params.yaml: simulate.{key} must be a positive number of seconds")
+    return float(value)
+
+
+def parse_watchdog_limits(
+    settings: dict[str, Any],
+    *,
+    timeout: float | None = None,
+    stall_timeout: float | None = None,
+) -> WatchdogLimits:
+    """Limits from `simulate.timeout`/`simulate.stall_timeout`; explicit arguments win."""
+    return WatchdogLimits(
+        timeout=timeout if timeout is not None else _seconds(settings, "timeout"),
+        stall_timeout=(
+            stall_timeout if stall_timeout is not None else _seconds(settings, "stall_timeout")
+        ),
+    )
+
+
+def _reap(pid: int, *, block: bool) -> tuple[int, Any] | None:
+    """wait4 the child; returns (returncode, rusage) or None if still running."""
+    got, status, rusage = os.wait4(pid, 0 if block else os.WNOHANG)
+    if got == 0:
+        return None
+    return os.waitstatus_to_exitcode(status), rusage
+
+
+def _wait_exit(pid: int, timeout: float) -> None:
+    """Sleep up to `timeout` seconds, waking up as soon as `pid` exits."""
+    try:
+        fd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        time.sleep(timeout)
+        return
+    try:
+        select.select([fd], [], [], timeout)
+    finally:
+        os.close(fd)
+
+
+def _tree_cpu_seconds(pid: int, seen: dict[int, float]) -> float:
+    """CPU seconds of the tree so far, including children that already exited.
+
+    `seen` keeps the highest value read for every pid, so the total never goes
+    backwards when a busy child exits between two checks.
+    """
+    for p in process_tree(pid):
+        seen[p.pid] = max(seen.get(p.pid, 0.0), p.cpu_user + p.cpu_system)
+    return sum(seen.values())
+
+
+def _signal_tree(pid: int, sig: int) -> None:
+    pids = [p.pid for p in process_tree(pid)]
+    try:
+        # The child leads its own session, so its process group covers most of the tree.
+        os.killpg(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+    for child in pids:
+        try:
+            os.kill(child, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def kill_tree(proc: subprocess.Popen, *, grace: float) -> tuple[int, Any]:
+    """SIGTERM the process tree, SIGKILL whatever is left after `grace` seconds, and reap."""
+    _signal_tree(proc.pid, signal.SIGTERM)
+    deadline = time.monotonic() + grace
+    while time.monotonic() < deadline:
+        reaped = _reap(proc.pid, block=False)
+        if reaped is not None:
+            # Descendants may outlive the child; make sure they go too.
+            _signal_tree(proc.pid, signal.SIGKILL)
+            return reaped
+        time.sleep(min(0.2, grace))
+    _signal_tree(proc.pid, signal.SIGKILL)
+    return _reap(proc.pid, block=True)  # type: ignore[return-value]
+
+
+def supervise(proc: subprocess.Popen, *, limits: WatchdogLimits, log_path: Path) -> ProcessExit:
+    """Wait for `proc` (with wait4, for exact rusage), enforcing `limits`."""
+    if not limits.enabled:
+        returncode, rusage = _reap(proc.pid, block=True)  # type: ignore[misc]
+        proc.returncode = returncode
+        return ProcessExit(returncode, rusage)
+
+    start = last_progress = last_check = time.monotonic()
+    last_size = -1
+    last_cpu = 0.0
+    cpu_seen: dict[int, float] = {}
+    reason: str | None = None
+    try:
+        while True:
+            reaped = _reap(proc.pid, block=False)
+            if reaped is not None:
+                proc.returncode = reaped[0]
+                return ProcessExit(*reaped)
+
+            now = time.monotonic()
+            if limits.timeout is not None and now - start > limits.timeout:
+                reason = "timeout"
+                break
+
+            if limits.stall_timeout is not None:
+                try:
+                    size = log_path.stat().st_size
+                except OSError:
+                    size = last_size
+                cpu = _tree_cpu_seconds(proc.pid, cpu_seen)
+                busy = cpu - last_cpu > limits.stall_cpu_cores * (now - last_check)
+                if size != last_size or busy:
+                    last_progress = now
+                last_size, last_cpu, last_check = size, cpu, now
+                if now - last_progress > limits.stall_timeout:
+                    reason = "stalled"
+                    break
+
+            _wait_exit(proc.pid, limits.poll_interval)
+    except BaseException:
+        # E.g. Ctrl-C: the child runs in its own session, so it must be cleaned up here.
+        proc.returncode = kill_tree(proc, grace=limits.kill_grace)[0]
+        raise
+
+    logger.warning("Killing pid %s: %s", proc.pid, reason)
+    returncode, rusage = kill_tree(proc, grace=limits.kill_grace)
+    proc.returncode = returncode
+    return ProcessExit(returncode, rusage, killed_reason=reason)
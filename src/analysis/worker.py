@@ -0,0 +1,120 @@
+"""
+Queue worker: `python -m analysis.worker <run_dir>`.
+
+Claims jobs from the run dir's SQLite queue (see analysis.jobqueue) one at a
+time, runs them like the in-process scheduler does and writes the run entries
+back to the queue and the run journal. Successful runs are added to the sweep's
+result cache (see analysis.resultcache). Exits when nothing is left to claim or
+when asked to drain.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from analysis import simulate
+from analysis.jobqueue import POLL_INTERVAL, QUEUE_NAME, JobQueue
+from analysis.journal import JOURNAL_NAME, RunJournal
+from analysis.resultcache import ResultCache
+from analysis.runenv import LaunchEnv, resolve_launch_env
+from analysis.simulate import RunOptions, SimJob, result_fingerprint, run_entry
+
+logger = logging.getLogger(__name__)
+
+
+def run_worker(run_dir: Path, *, poll_interval: float = POLL_INTERVAL) -> int:
+    """Drain the queue of `run_dir`. Returns the number of jobs run."""
+    queue = JobQueue(run_dir / QUEUE_NAME)
+    journal = RunJournal(run_dir / JOURNAL_NAME)
+    pid = os.getpid()
+    # Launch environments by sweep config; a restarted sweep may change the config.
+    launch_envs: dict[str, LaunchEnv] = {}
+    caches: dict[str, ResultCache] = {}
+    ran = 0
+
+    queue.register_worker(pid)
+    try:
+        while True:
+            if queue.take_drain():
+                logger.info("Worker %s drained", pid)
+                break
+            queue.requeue_orphans()
+            config: dict[str, Any] = queue.setting("config") or {}
+            claimed = queue.claim(pid, budget=config.get("budget"))
+            if claimed is None:
+                if queue.counts()["queued"] == 0:
+                    break
+                # Jobs are queued but the core budget is taken.
+                time.sleep(poll_interval)
+                continue
+
+            options = RunOptions.from_dict(config.get("run_options", {}))
+            executable = Path(config["executable"])
+            options_files = [Path(p) for p in config.get("options_files", [])]
+            config_key = json.dumps([config["executable"], options.launch, str(options.env_cache_dir)])
+            if config_key not in launch_envs:
+                launch_envs[config_key] = resolve_launch_env(
+                    executable,
+                    mode=options.launch,
+                    cache_dir=options.env_cache_dir or (run_dir / ".cache"),
+                )
+
+            job = SimJob.from_dict(claimed.payload)
+            logger.info("Worker %s: %s (%s)", pid, job.simulation_file.name, job.env_parameters)
+            outcome = simulate._run_one(
+                executable=executable,
+                options_files=options_files,
+                simulation_file=job.simulation_file,
+                run_dir=run_dir,
+                param_dict=job.env_parameters,
+                options=options,
+                benchmark=config.get("benchmark", ""),
+                launch_env=launch_envs[config_key],
+            )
+            entry = run_entry(job, outcome)
+            journal.record_run(entry)
+            if outcome.success and config.get("result_cache"):
+                cache_key = json.dumps(config["result_cache"], sort_keys=True)
+                if cache_key not in caches:
+                    caches[cache_key] = ResultCache.from_dict(config["result_cache"])
+                cache = caches[cache_key]
+                fingerprint = result_fingerprint(
+                    cache,
+                    job,
+                    benchmark=config.get("benchmark", ""),
+                    executable=executable,
+                    options_files=options_files,
+                    options=options,
+                )
+                cache.store(fingerprint, entry, run_dir)
+            queue.finish(claimed.id, success=outcome.success, entry=entry)
+            ran += 1
+    finally:
+        queue.unregister_worker(pid)
+        queue.close()
+    return ran
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="analysis.worker", description=__doc__.split("\n\n")[0])
+    parser.add_argument("run_dir")
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    ran = run_worker(Path(args.run_dir))
+    logger.info("Worker %s exiting after %s jobs", os.getpid(), ran)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
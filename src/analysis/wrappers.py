@@ -0,0 +1,136 @@
+"""
+Measurement wrappers put in front of the Gaussino command line.
+
+Declared per benchmark in params.yaml, as a string or an argument list:
+
+    simulate:
+      wrapper: perf stat -e cycles,instructions,cache-references,cache-misses
+      # or: wrapper: /usr/bin/time -v
+
+`perf stat` and GNU `time` are recognised: their report is redirected to a
+file next to the run's log (so it does not end up in the Gaussino output) and
+parsed into counters stored on the run record. Any other wrapper runs as is;
+a `{output}` placeholder in its arguments is replaced by that file's path.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import shlex
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_PLACEHOLDER = "{output}"
+
+# GNU time -v labels and the counter names they are stored under.
+_GNU_TIME_FIELDS = {
+    "User time (seconds)": "user_time",
+    "System time (seconds)": "system_time",
+    "Percent of CPU this job got": "percent_cpu",
+    "Maximum resident set size (kbytes)": "max_rss_kb",
+    "Major (requiring I/O) page faults": "major_page_faults",
+    "Minor (reclaiming a frame) page faults": "minor_page_faults",
+    "Voluntary context switches": "voluntary_context_switches",
+    "Involuntary context switches": "involuntary_context_switches",
+    "File system inputs": "fs_inputs",
+    "File system outputs": "fs_outputs",
+}
+_GNU_TIME_LINE = re.compile(r"^\s*(.+?):\s*([\d.]+)%?\s*$")
+
+
+def parse_wrapper(value: Any) -> tuple[str, ...]:
+    """Wrapper argv from `simulate.wrapper` in params.yaml."""
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        return tuple(shlex.split(value))
+    if isinstance(value, list) and all(isinstance(v, (str, int, float)) for v in value):
+        return tuple(str(v) for v in value)
+    raise TypeError("params.yaml: simulate.wrapper must be a string or a list of arguments")
+
+
+def wrapper_kind(wrapper: Sequence[str]) -> str | None:
+    """"perf-stat", "gnu-time" or None for wrappers whose output is not parsed."""
+    if not wrapper:
+        return None
+    tool = os.path.basename(wrapper[0])
+    if tool == "perf" and len(wrapper) > 1 and wrapper[1] == "stat":
+        return "perf-stat"
+    if tool == "time":
+        return "gnu-time"
+    return None
+
+
+def build_wrapper(wrapper: Sequence[str], *, output_path: Path) -> list[str]:
+    """Wrapper argv with its report redirected to `output_path`."""
+    argv = [arg.replace(OUTPUT_PLACEHOLDER, str(output_path)) for arg in wrapper]
+    kind = wrapper_kind(wrapper)
+    if kind == "perf-stat":
+        # CSV output is stable across perf versions and locales.
+        return argv[:2] + ["-x", ",", "-o", str(output_path)] + argv[2:]
+    if kind == "gnu-time":
+        return argv[:1] + ["-o", str(output_path)] + argv[1:]
+    return argv
+
+
+def parse_perf_stat_csv(text: str) -> dict[str, float]:
+    """Counter values from `perf stat -x ,` output, with IPC and cache-miss rate derived."""
+    raw: dict[str, float] = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        fields = line.split(",")
+        if len(fields) < 3:
+            continue
+        value, event = fields[0], fields[2]
+        try:
+            number = float(value)
+        except ValueError:
+            # "<not counted>" / "<not supported>"
+            continue
+        # Drop modifiers such as ":u" so counters are comparable across setups.
+        event = event.split(":")[0].strip()
+        if event:
+            raw[event] = raw.get(event, 0.0) + number
+
+    counters = {name.replace("-", "_"): value for name, value in raw.items()}
+    cycles, instructions = raw.get("cycles"), raw.get("instructions")
+    if cycles and instructions is not None:
+        counters["ipc"] = instructions / cycles
+    misses, references = raw.get("cache-misses"), raw.get("cache-references")
+    if misses is not None and references:
+        counters["cache_miss_rate"] = misses / references
+    if misses is not None and instructions:
+        counters["cache_misses_per_kinstr"] = 1000 * misses / instructions
+    return counters
+
+
+def parse_gnu_time(text: str) -> dict[str, float]:
+    """Resource figures from `/usr/bin/time -v` output."""
+    counters: dict[str, float] = {}
+    for line in text.splitlines():
+        match = _GNU_TIME_LINE.match(line)
+        if match and match.group(1) in _GNU_TIME_FIELDS:
+            counters[_GNU_TIME_FIELDS[match.group(1)]] = float(match.group(2))
+    if "max_rss_kb" in counters:
+        counters["max_rss_mb"] = counters["max_rss_kb"] / 1024
+    return counters
+
+
+def parse_wrapper_output(wrapper: Sequence[str], output_path: Path) -> dict[str, float]:
+    kind = wrapper_kind(wrapper)
+    if kind is None:
+        return {}
+    try:
+        text = output_path.read_text(errors="replace")
+    except OSError:
+        logger.warning("Wrapper output not found: %s", output_path)
+        return {}
+    if kind == "perf-stat":
+        return parse_perf_stat_csv(text)
+    return parse_gnu_time(text)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from analysis.affinity import (
+    CpuAllocator,
+    format_cpu_list,
+    parse_cpu_list,
+    pinned_thread,
+    read_topology,
+)
+
+
+def _fake_sysfs(root: Path, *, nodes: int, cores_per_node: int) -> Path:
+    """Dual-SMT machine: cpu c and c + total_cores are siblings of core c."""
+    total_cores = nodes * cores_per_node
+    for node in range(nodes):
+        cores = range(node * cores_per_node, (node + 1) * cores_per_node)
+        cpus = list(cores) + [c + total_cores for c in cores]
+        node_dir = root / "node" / f"node{node}"
+        node_dir.mkdir(parents=True)
+        (node_dir / "cpulist").write_text(format_cpu_list(cpus) + "\n")
+        for core in cores:
+            for cpu in (core, core + total_cores):
+                topo = root / "cpu" / f"cpu{cpu}" / "topology"
+                topo.mkdir(parents=True)
+                (topo / "core_id").write_text(f"{core % cores_per_node}\n")
+                (topo / "physical_package_id").write_text(f"{node}\n")
+    return root
+
+
+def test_cpu_list_round_trip() -> None:
+    assert parse_cpu_list("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+    assert format_cpu_list([11, 10, 8, 3, 2, 1, 0]) == "0-3,8,10-11"
+    assert format_cpu_list([]) == ""
+
+
+def test_read_topology_assigns_nodes_and_smt_ranks(tmp_path: Path) -> None:
+    sysfs = _fake_sysfs(tmp_path, nodes=2, cores_per_node=4)
+    infos = {info.cpu: info for info in read_topology(sysfs, allowed=range(16))}
+
+    assert infos[0].node == 0 and infos[0].thread == 0
+    assert infos[8].node == 0 and infos[8].thread == 1
+    assert infos[8].core == infos[0].core
+    assert infos[4].node == 1 and infos[12].node == 1
+
+
+@pytest.mark.parametrize(
+    ("smt", "expected"),
+    [
+        ("spread", [0, 1, 2, 3]),
+        ("pack", [0, 1, 8, 9]),
+        ("avoid", [0, 1, 2, 3]),
+    ],
+)
+def test_allocator_smt_policies(tmp_path: Path, smt: str, expected: list[int]) -> None:
+    topology = read_topology(_fake_sysfs(tmp_path, nodes=2, cores_per_node=4), allowed=range(16))
+    allocator = CpuAllocator(topology, smt=smt)
+
+    assert allocator.acquire(4) == expected
+    assert allocator.capacity == (8 if smt == "avoid" else 16)
+
+
+def test_allocator_packs_runs_per_numa_node(tmp_path: Path) -> None:
+    topology = read_topology(_fake_sysfs(tmp_path, nodes=2, cores_per_node=4), allowed=range(16))
+    allocator = CpuAllocator(topology, smt="spread")
+
+    first = allocator.acquire(6)
+    second = allocator.acquire(6)
+    assert allocator.nodes_of(first) == [0]
+    assert allocator.nodes_of(second) == [1]
+    assert not set(first) & set(second)
+
+    # A small run fills the remaining hole rather than spanning nodes.
+    third = allocator.acquire(2)
+    assert allocator.nodes_of(third) == [0]
+
+    # Nothing fits in a single node any more: the run spans both.
+    allocator.release(third)
+    spanning = allocator.acquire(4)
+    assert allocator.nodes_of(spanning) == [0, 1]
+    assert len(spanning) == 4
+
+
+def test_pinned_thread_child_inherits_cpu_set() -> None:
+    cpu = min(os.sched_getaffinity(0))
+    before = os.sched_getaffinity(0)
+
+    with pinned_thread([cpu]):
+        out = subprocess.run(
+            [sys.executable, "-c", "import os; print(sorted(os.sched_getaffinity(0)))"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+    assert out.strip() == str([cpu])
+    assert os.sched_getaffinity(0) == before
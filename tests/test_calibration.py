@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from analysis.calibration import (
+    EventCalibration,
+    calibrated_events,
+    calibration_key,
+    load_calibration,
+    parse_event_calibration,
+    save_calibration,
+    seconds_per_event,
+)
+
+
+def test_seconds_per_event_prefers_event_loop_time() -> None:
+    performance = {"event_loop_time": 2e9, "time_per_event": 5.0}
+    assert seconds_per_event(performance, events=20, execution_time=60) == pytest.approx(0.1)
+    assert seconds_per_event({"time_per_event": 5.0}, events=20) == 5.0
+    assert seconds_per_event({}, events=20, execution_time=60) == 3.0
+    assert seconds_per_event({}, events=20) is None
+
+
+def test_calibrated_events_hits_target_within_bounds() -> None:
+    calibration = EventCalibration(target_seconds=100, min_events=10, max_events=1000)
+    assert calibrated_events(0.5, calibration) == 200
+    assert calibrated_events(50.0, calibration) == 10
+    assert calibrated_events(0.001, calibration) == 1000
+
+
+def test_parse_event_calibration_validates_bounds() -> None:
+    assert parse_event_calibration(None) == EventCalibration()
+    assert parse_event_calibration({"target_seconds": 30}).target_seconds == 30.0
+    with pytest.raises(ValueError, match="min_events"):
+        parse_event_calibration({"min_events": 500, "max_events": 100})
+    with pytest.raises(TypeError):
+        parse_event_calibration([1])
+
+
+def test_calibration_key_ignores_event_count_and_round_trips(tmp_path: Path) -> None:
+    a = calibration_key("/x/sim.py", {"NUMBER_OF_EVENTS": 10, "P": 1})
+    assert a == calibration_key("/y/sim.py", {"P": 1, "NUMBER_OF_EVENTS": 5000})
+
+    save_calibration(tmp_path, {a: {"events": 42}})
+    assert load_calibration(tmp_path) == {a: {"events": 42}}
+    assert load_calibration(tmp_path / "missing") == {}
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from analysis.crossover import (
+    CrossoverState,
+    estimate_crossover,
+    find_bracket,
+    next_probe,
+    parse_crossover_search,
+)
+
+
+def test_parse_defaults_range_to_grid() -> None:
+    search = parse_crossover_search(None, parameters={"PARTICLES_PER_EVENT": [1, 10, 100, 1000]})
+    assert (search.parameter, search.low, search.high) == ("PARTICLES_PER_EVENT", 1, 1000)
+    assert search.integer is True
+
+    with pytest.raises(ValueError, match="low < high"):
+        parse_crossover_search({"low": 10, "high": 10}, parameters={})
+    with pytest.raises(ValueError, match="tolerance"):
+        parse_crossover_search({"low": 1, "high": 10, "tolerance": 1}, parameters={})
+
+
+def test_next_probe_is_geometric_and_stops_between_neighbours() -> None:
+    assert next_probe(1, 100, integer=True) == 10
+    assert next_probe(10, 11, integer=True) is None
+    assert next_probe(1.0, 4.0, integer=False) == pytest.approx(2.0)
+
+
+def test_find_bracket_skips_failed_points() -> None:
+    assert find_bracket({1: 0.5, 10: None, 100: 2.0}) == (1, 100)
+    assert find_bracket({1: 0.5, 100: 0.9}) is None
+
+
+def test_estimate_crossover_interpolates_in_log_space() -> None:
+    # ratio = x / 50 crosses 1 at x = 50.
+    assert estimate_crossover(10, 10 / 50, 1000, 1000 / 50) == pytest.approx(50)
+
+
+def test_state_bisects_until_tolerance() -> None:
+    search = parse_crossover_search({"low": 1, "high": 1000, "tolerance": 1.5}, parameters={})
+    state = CrossoverState(search, {})
+    pending = state.initial_points()
+    while pending:
+        for x in pending:
+            state.ratios[x] = x / 42
+        pending = [p] if (p := state.propose()) is not None else []
+
+    result = state.summary()
+    lo, hi = result["bracket"]
+    assert lo < 42 < hi and hi / lo <= 1.5
+    assert result["resolved"] is True
+    assert math.isclose(result["estimate"], 42, rel_tol=1e-9)
+    assert len(result["points"]) < 12
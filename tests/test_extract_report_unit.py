@@ -9,6 +9,7 @@ import pytest
 
 import analysis.extract as extract_mod
 from analysis.extract import extract_run
+from analysis.extractors import get_accumulator, get_extractor
 from analysis.report import generate_performance_report
 
 
@@ -154,3 +155,48 @@ def test_generate_performance_report_writes_metrics_and_plots(tmp_path: Path) ->
     # A plot for time_per_event should be generated.
     assert outputs.plots_dir.exists()
     assert (outputs.plots_dir / "time_per_event.png").exists()
+
+
+def test_extract_run_prefers_streamed_results(tmp_path: Path) -> None:
+    """Metrics parsed during simulation are used without reading the log again."""
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    metadata = {
+        "runs": [
+            {
+                "simulation_file": "adept_simulation.py",
+                "parameters": {"A": 1},
+                "output_path": "gone.log",
+                "execution_time": 1.0,
+                "with_adept": True,
+                "streamed_results": {"performance": {"throughput": 42.0}},
+                "counters": {"ipc": 1.5},
+            }
+        ]
+    }
+    (run_dir / "simulation_metadata.json").write_text(json.dumps(metadata))
+
+    csv_path = extract_run(
+        benchmark="b4_layered_calorimeter",
+        run_dir=run_dir,
+        out_dir=tmp_path / "derived",
+        extract_type="performance",
+    )
+    df = pd.read_csv(csv_path)
+    assert df["throughput"].tolist() == [42.0]
+    # Wrapper counters become performance columns.
+    assert df["counter_ipc"].tolist() == [1.5]
+
+
+def test_accumulators_match_whole_log_extractors() -> None:
+    log = (
+        "Measured event loop time [ns]: 1e9\n"
+        "Edep: 1.5 MeV track length: 2 mm sensitive detector: B4Calorimeter_Layer_GapSDet layer number: 3 eventID: 7\n"
+        "Throughput [1/s]: 10\n"
+        "Throughput [1/s]: 99"
+    )
+    for extract_type in ("performance", "physics"):
+        accumulator = get_accumulator("b4_layered_calorimeter", extract_type)
+        for line in log.splitlines():
+            accumulator.feed(line)
+        assert accumulator.result() == get_extractor("b4_layered_calorimeter", extract_type)(log)
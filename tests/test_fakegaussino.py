@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+
+import pandas as pd
+
+from analysis.extractors import (
+    b2chambertracker_physics_extractor,
+    b4layeredcalorimeter_physics_extractor,
+    performance_extractor,
+)
+from analysis.fakegaussino import write_launcher
+from analysis.pipeline_bench import run_pipeline_benchmark
+from analysis.runenv import capture_environment
+from analysis.simulate import SimulateConfig, run_simulations
+
+
+def _sim_file(tmp_path: Path, benchmark: str, name: str) -> Path:
+    path = tmp_path / "benchmarks" / benchmark / f"{name}.py"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("# sim")
+    return path
+
+
+def _run(executable: Path, sim: Path, cwd: Path, **env: str) -> str:
+    cmd = [str(executable), "env", *[f"{k}={v}" for k, v in env.items()], "gaudirun.py", str(sim)]
+    return subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, check=True).stdout
+
+
+def test_fake_gaussino_log_is_parsed_by_extractors(tmp_path: Path) -> None:
+    exe = write_launcher(tmp_path / "fake-gaussino")
+    b4 = _sim_file(tmp_path, "b4_layered_calorimeter", "adept_simulation")
+    b2 = _sim_file(tmp_path, "b2_chamber_tracker", "geant4_simulation")
+
+    log = _run(exe, b4, tmp_path, NUMBER_OF_EVENTS=3, FAKE_GAUSSINO_HIT_LINES=5, FAKE_GAUSSINO_LOG_SCALE=2)
+    performance = performance_extractor(log)
+    assert set(performance) == {"event_loop_time", "time_per_event", "throughput"}
+    hits = b4layeredcalorimeter_physics_extractor(log)
+    assert len(hits) == 3 * 10
+    assert {h["event_id"] for h in hits} == {0, 1, 2}
+    assert (tmp_path / "adept_simulation.root").exists()
+
+    log = _run(exe, b2, tmp_path, NUMBER_OF_EVENTS=2)
+    assert len(b2chambertracker_physics_extractor(log)) == 2 * 4
+
+
+def test_fake_gaussino_models_adept_crossover(tmp_path: Path) -> None:
+    exe = write_launcher(tmp_path / "fake-gaussino")
+    adept = _sim_file(tmp_path, "calo_challenge", "adept_simulation")
+    geant4 = _sim_file(tmp_path, "calo_challenge", "geant4_simulation")
+
+    def loop_time(sim: Path, particles: int) -> float:
+        log = _run(
+            exe, sim, tmp_path, NUMBER_OF_EVENTS=2, PARTICLES_PER_EVENT=particles,
+            FAKE_GAUSSINO_SECONDS_PER_UNIT="0.002",
+        )
+        return performance_extractor(log)["event_loop_time"]
+
+    assert loop_time(adept, 1) > loop_time(geant4, 1)
+    assert loop_time(adept, 100) < loop_time(geant4, 100)
+
+
+def test_fake_gaussino_drives_simulate_and_env_capture(tmp_path: Path) -> None:
+    exe = write_launcher(tmp_path / "fake-gaussino")
+    assert "PATH" in capture_environment(exe)
+
+    cfg = SimulateConfig(
+        benchmark="b4_layered_calorimeter",
+        executable=exe,
+        options_files=[],
+        simulation_files=[
+            _sim_file(tmp_path, "b4_layered_calorimeter", "adept_simulation"),
+            _sim_file(tmp_path, "b4_layered_calorimeter", "geant4_simulation"),
+        ],
+        run_dir=tmp_path / "run",
+        parameters={"PARTICLES_PER_EVENT": [10], "NUMBER_OF_EVENTS": [4]},
+    )
+    metadata_path = run_simulations(cfg=cfg)
+    assert metadata_path.exists()
+    assert sorted(p.name for p in (tmp_path / "run").glob("*.root")) == [
+        "adept_simulation_PARTICLES_PER_EVENT=10_NUMBER_OF_EVENTS=4.root",
+        "geant4_simulation_PARTICLES_PER_EVENT=10_NUMBER_OF_EVENTS=4.root",
+    ]
+
+
+def test_pipeline_benchmark_times_every_stage(tmp_path: Path) -> None:
+    results = run_pipeline_benchmark(
+        workdir=tmp_path, scales=[1, 2], events=3, particles=[1], source_root=tmp_path
+    )
+
+    assert [(r["scale"], r["stage"]) for r in results] == [
+        (scale, stage) for scale in (1, 2) for stage in ("manifest", "simulate", "extract", "report")
+    ]
+    log_bytes = {r["scale"]: r["log_bytes"] for r in results if r["stage"] == "report"}
+    assert log_bytes[2] > log_bytes[1] > 0
+    csv = next((tmp_path / "scale-2" / "derived").rglob("physics-results.csv"))
+    assert len(pd.read_csv(csv)) == 2 * 3 * 20 * 2
+
+
+def test_pipeline_benchmark_counts_compressed_logs(tmp_path: Path) -> None:
+    results = run_pipeline_benchmark(
+        workdir=tmp_path, scales=[1], events=3, particles=[1], source_root=tmp_path, compress_logs="gzip"
+    )
+    assert list((tmp_path / "scale-1" / "runs").rglob("*.log.gz"))
+    assert all(r["log_bytes"] > 0 for r in results if r["stage"] != "manifest")
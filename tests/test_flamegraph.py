@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import json
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from analysis.flamegraph import build_tree, inclusive_shares, render_flamegraph
+from analysis.profiler import write_folded
+from analysis.report import generate_profile_report
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+GEANT4 = {"main;run;G4Stepping": 80, "main;run;io": 20}
+ADEPT = {"main;run;G4Stepping": 10, "main;run;io": 20, "main;run;AdePTTransport": 30}
+
+
+def _titles(svg: str) -> dict[str, str]:
+    root = ET.fromstring(svg)
+    out = {}
+    for group in root.iter(f"{SVG}g"):
+        title = group.find(f"{SVG}title").text
+        rect = group.find(f"{SVG}rect")
+        out[title.split(" (")[0]] = rect.get("fill")
+    return out
+
+
+def test_tree_and_shares() -> None:
+    root = build_tree(GEANT4)
+    assert root.value == 100
+    assert root.children["main"].children["run"].children["io"].value == 20
+    assert inclusive_shares(GEANT4)[("main", "run", "G4Stepping")] == 0.8
+
+
+def test_differential_flamegraph_colours_losses_blue_and_gains_red() -> None:
+    svg = render_flamegraph(GEANT4, title="diff", compare=ADEPT)
+    fills = _titles(svg)
+
+    # Stepping drops from 80% to ~17% of samples: fully saturated blue.
+    assert fills["G4Stepping"] == "rgb(0,0,255)"
+    # io goes from 20% to ~33%: some red.
+    assert fills["io"].startswith("rgb(255,")
+    # Widths follow the baseline, so frames only AdePT has are not drawn.
+    assert "AdePTTransport" not in fills
+
+
+def test_generate_profile_report_pairs_adept_and_geant4(tmp_path: Path) -> None:
+    profiles = tmp_path / "profiles"
+    profiles.mkdir()
+    write_folded(profiles / "a.folded", ADEPT)
+    write_folded(profiles / "g.folded", GEANT4)
+    write_folded(profiles / "lonely.folded", GEANT4)
+    index = [
+        {"simulation": "adept_simulation", "parameters": {"P": 1000}, "folded": "a.folded"},
+        {"simulation": "geant4_simulation", "parameters": {"P": 1000}, "folded": "g.folded"},
+        {"simulation": "geant4_simulation", "parameters": {"P": 1}, "folded": "lonely.folded"},
+    ]
+    (profiles / "profiles.json").write_text(json.dumps(index))
+
+    written = generate_profile_report(profiles_dir=profiles, out_dir=tmp_path / "reports")
+
+    assert [p.name for p in written] == ["diff_P=1000.svg"]
+    ET.parse(written[0])
+    assert generate_profile_report(profiles_dir=tmp_path / "none", out_dir=tmp_path / "reports") == []
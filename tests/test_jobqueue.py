@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from analysis import simulate
+from analysis.fakegaussino import write_launcher
+from analysis.jobqueue import QUEUE_NAME, JobQueue
+from analysis.journal import load_simulation_metadata
+from analysis.profiler import ProfileOptions
+from analysis.simulate import (
+    RunOptions,
+    RunOutcome,
+    Scheduling,
+    SimJob,
+    SimulateConfig,
+    run_simulations,
+)
+from analysis.watchdog import WatchdogLimits
+from analysis.worker import run_worker
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_claim_respects_order_and_core_budget(tmp_path: Path) -> None:
+    queue = JobQueue(tmp_path / QUEUE_NAME)
+    queue.enqueue([("a", 4, {"n": "a"}), ("b", 4, {"n": "b"}), ("c", 2, {"n": "c"})])
+
+    first = queue.claim(1, budget=6)
+    # "b" does not fit next to "a"; "c" backfills.
+    second = queue.claim(2, budget=6)
+    assert (first.key, second.key) == ("a", "c")  # type: ignore[union-attr]
+    assert queue.claim(3, budget=6) is None
+
+    queue.finish(first.id, success=True, entry={"n": "a"})  # type: ignore[union-attr]
+    assert queue.claim(3, budget=6).key == "b"  # type: ignore[union-attr]
+    assert queue.counts() == {"queued": 0, "running": 2, "done": 1, "failed": 0}
+    assert queue.entries(["a", "b"]) == {"a": {"n": "a"}}
+
+
+def test_enqueue_keeps_running_jobs_and_drops_stale_ones(tmp_path: Path) -> None:
+    queue = JobQueue(tmp_path / QUEUE_NAME)
+    queue.enqueue([("a", 1, {}), ("b", 1, {}), ("old", 1, {})])
+    claimed = queue.claim(os.getpid())
+    assert claimed is not None and claimed.key == "a"
+
+    assert queue.enqueue([("a", 1, {}), ("b", 1, {})]) == 1
+    assert queue.counts(["a"])["running"] == 1
+    assert queue.counts() == {"queued": 1, "running": 1, "done": 0, "failed": 0}
+
+
+def test_jobs_of_dead_workers_are_requeued_then_failed(tmp_path: Path) -> None:
+    queue = JobQueue(tmp_path / QUEUE_NAME)
+    queue.enqueue([("a", 1, {})])
+    for _ in range(2):
+        assert queue.claim(_dead_pid()) is not None
+        assert queue.requeue_orphans() == 1
+        assert queue.counts()["queued"] == 1
+
+    assert queue.claim(_dead_pid()) is not None
+    queue.requeue_orphans()
+    assert queue.counts()["failed"] == 1
+
+
+def test_drain_requests_are_bounded_by_live_workers(tmp_path: Path) -> None:
+    queue = JobQueue(tmp_path / QUEUE_NAME)
+    queue.register_worker(os.getpid())
+    queue.register_worker(_dead_pid())
+
+    assert queue.request_drain(5) == 1
+    assert queue.take_drain() is True
+    assert queue.take_drain() is False
+
+
+def test_run_options_and_jobs_round_trip_through_json() -> None:
+    options = RunOptions(
+        sample_interval=0.5,
+        stream_extract=("performance",),
+        scratch_root=Path("/scratch"),
+        watchdog=WatchdogLimits(timeout=60.0),
+        wrapper=("perf", "stat"),
+        profile=ProfileOptions(tool="perf", only={"PARTICLES_PER_EVENT": [1000]}),
+    )
+    assert RunOptions.from_dict(json.loads(json.dumps(options.to_dict()))) == options
+
+    job = SimJob(index=3, simulation_file=Path("/b/adept_simulation.py"), parameters={"A": 1}, repeat=1, seed=2)
+    assert SimJob.from_dict(json.loads(json.dumps(job.to_dict()))) == job
+
+
+def test_worker_runs_queued_jobs_and_journals_them(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    seen: list[dict] = []
+
+    def fake_run_one(**kwargs):  # type: ignore[no-untyped-def]
+        seen.append(kwargs["param_dict"])
+        return RunOutcome(kwargs["param_dict"]["A"] != 2, Path("x.log"), [], 0.1)
+
+    monkeypatch.setattr(simulate, "_run_one", fake_run_one)
+    queue = JobQueue(tmp_path / QUEUE_NAME)
+    queue.set_setting("config", {"executable": "/bin/true", "run_options": RunOptions().to_dict()})
+    jobs = [SimJob(index=i, simulation_file=Path("sim.py"), parameters={"A": i}) for i in (1, 2)]
+    queue.enqueue((str(job.index), 1, job.to_dict()) for job in jobs)
+
+    assert run_worker(tmp_path, poll_interval=0.01) == 2
+    assert seen == [{"A": 1}, {"A": 2}]
+    assert queue.counts() == {"queued": 0, "running": 0, "done": 1, "failed": 1}
+    assert queue.live_workers() == []
+    runs = load_simulation_metadata(tmp_path)["runs"]
+    assert [(r["parameters"]["A"], r["success"]) for r in runs] == [(1, True), (2, False)]
+
+
+def test_run_simulations_with_worker_processes(tmp_path: Path) -> None:
+    sim_dir = tmp_path / "benchmarks" / "b4_layered_calorimeter"
+    sim_dir.mkdir(parents=True)
+    sims = []
+    for name in ("adept_simulation", "geant4_simulation"):
+        (sim_dir / f"{name}.py").write_text("# sim")
+        sims.append(sim_dir / f"{name}.py")
+
+    cfg = SimulateConfig(
+        benchmark="b4_layered_calorimeter",
+        executable=write_launcher(tmp_path / "fake-gaussino"),
+        options_files=[],
+        simulation_files=sims,
+        run_dir=tmp_path / "run",
+        parameters={"PARTICLES_PER_EVENT": [1, 10], "NUMBER_OF_EVENTS": [2]},
+        scheduling=Scheduling(workers=2),
+    )
+    metadata = json.loads(run_simulations(cfg=cfg).read_text())
+
+    assert len(metadata["runs"]) == 4
+    assert all(r["success"] for r in metadata["runs"])
+    assert [r["parameters"]["PARTICLES_PER_EVENT"] for r in metadata["runs"]] == [1, 1, 10, 10]
+    queue = JobQueue(cfg.run_dir / QUEUE_NAME)
+    assert queue.counts()["done"] == 4
+    assert list((cfg.run_dir / "workers").glob("worker-*.log"))
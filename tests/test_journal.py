@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from analysis.journal import (
+    JOURNAL_NAME,
+    METADATA_NAME,
+    RunJournal,
+    compact_journal,
+    entry_key,
+    load_simulation_metadata,
+)
+
+
+def _entry(a: int, **extra) -> dict:  # type: ignore[no-untyped-def]
+    return {"simulation_file": "sim.py", "parameters": {"A": a}, **extra}
+
+
+def test_journal_compacts_to_metadata_shape(tmp_path: Path) -> None:
+    journal = RunJournal(tmp_path / JOURNAL_NAME)
+    journal.start(sweep={"timestamp": "t0", "benchmark": "bench"}, entries=[_entry(1, success=True)])
+    journal.record_run(_entry(3, success=True))
+    journal.record_run(_entry(2, success=False))
+    # A later record for the same run replaces the earlier one.
+    journal.record_run(_entry(2, success=True))
+
+    metadata_path = compact_journal(tmp_path, order=[entry_key(_entry(a)) for a in (1, 2, 3)])
+
+    assert metadata_path == tmp_path / METADATA_NAME
+    data = json.loads(metadata_path.read_text())
+    assert data["timestamp"] == "t0"
+    assert data["benchmark"] == "bench"
+    assert [(e["parameters"]["A"], e["success"]) for e in data["runs"]] == [(1, True), (2, True), (3, True)]
+
+
+def test_load_simulation_metadata_reads_torn_journal(tmp_path: Path) -> None:
+    """A crash mid-append leaves a partial last line; earlier records survive."""
+    journal = RunJournal(tmp_path / JOURNAL_NAME)
+    journal.start(sweep={"benchmark": "bench"})
+    journal.record_run(_entry(1, success=True))
+    with (tmp_path / JOURNAL_NAME).open("a") as f:
+        f.write('{"kind": "run", "entry": {"simulation_')
+
+    # The journal wins over a stale metadata file.
+    (tmp_path / METADATA_NAME).write_text(json.dumps({"runs": []}))
+
+    data = load_simulation_metadata(tmp_path)
+    assert [e["parameters"] for e in data["runs"]] == [{"A": 1}]
+
+
+def test_load_simulation_metadata_falls_back_to_json(tmp_path: Path) -> None:
+    (tmp_path / METADATA_NAME).write_text(json.dumps({"runs": [_entry(1)]}))
+    assert load_simulation_metadata(tmp_path)["runs"] == [_entry(1)]
+
+    with pytest.raises(FileNotFoundError, match="Missing simulation metadata"):
+        load_simulation_metadata(tmp_path / "missing")
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import signal
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from analysis import simulate
+from analysis.limits import (
+    LIMIT_EXEC,
+    RunLimits,
+    cgroup_events,
+    check_cgroup_parent,
+    classify_limit_exit,
+    create_run_cgroup,
+    limit_exec_prefix,
+    parse_run_limits,
+    parse_size,
+    remove_cgroup,
+)
+from analysis.simulate import RunOptions
+
+BURN = "while True: pass"
+
+
+def test_parse_size_and_limits() -> None:
+    assert parse_size("512M") == 512 << 20
+    assert parse_size("1.5GiB") == 3 << 29
+    assert parse_size(4096) == 4096
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+    limits = parse_run_limits({"memory": "16G", "data": "8G", "cpu_time": 3600, "cpus": "threads"})
+    assert limits == RunLimits(memory=16 << 30, data=8 << 30, cpu_time=3600, cpus="threads")
+    assert limits.cpu_quota(8) == 8.0 and limits.needs_cgroup
+    assert not parse_run_limits(None).enabled
+    with pytest.raises(ValueError, match="memory"):
+        parse_run_limits({"memory": "-1G"})
+    with pytest.raises(ValueError, match="cpus"):
+        parse_run_limits({"cpus": "all"})
+
+
+def _limited(limits: RunLimits, code: str) -> subprocess.CompletedProcess:
+    cmd = limit_exec_prefix(limits, cgroup=None) + [sys.executable, "-c", code]
+    return subprocess.run(cmd, capture_output=True, text=True, timeout=60, check=False)
+
+
+def test_cpu_limit_is_applied_in_the_child_and_classified() -> None:
+    proc = _limited(RunLimits(cpu_time=1), BURN)
+    assert proc.returncode == -signal.SIGXCPU
+    assert classify_limit_exit(proc.returncode, limits=RunLimits(cpu_time=1), events={}) == "cpu_limit"
+
+
+def test_address_space_limit_shows_up_as_oom(tmp_path: Path) -> None:
+    limits = RunLimits(address_space=parse_size("1G"))
+    proc = _limited(limits, "bytearray(4 << 30)")
+    log = tmp_path / "run.log"
+    log.write_text(proc.stdout + proc.stderr)
+
+    assert proc.returncode != 0
+    assert classify_limit_exit(proc.returncode, limits=limits, events={}, log_path=log) == "oom"
+    # A plain failure is not a limit hit.
+    log.write_text("Traceback: KeyError\n")
+    assert classify_limit_exit(1, limits=limits, events={}, log_path=log) is None
+    # Nor is a full GPU, whatever the host limits.
+    log.write_text("AdePT: CUDA error: out of memory\ncudaErrorMemoryAllocation: cannot allocate memory\n")
+    assert classify_limit_exit(1, limits=limits, events={}, log_path=log) is None
+
+
+def test_data_limit_shows_up_as_oom(tmp_path: Path) -> None:
+    limits = RunLimits(data=parse_size("1G"))
+    proc = _limited(limits, "bytearray(4 << 30)")
+    log = tmp_path / "run.log"
+    log.write_text(proc.stdout + proc.stderr)
+
+    assert proc.returncode != 0
+    assert classify_limit_exit(proc.returncode, limits=limits, events={}, log_path=log) == "oom"
+
+
+def test_run_cgroup_is_configured_and_removed(tmp_path: Path) -> None:
+    parent = tmp_path / "bench.slice"
+    parent.mkdir()
+    (parent / "cgroup.subtree_control").write_text("cpu\n")
+    limits = RunLimits(memory=1 << 30, cpus="threads", cgroup=str(parent))
+
+    group = create_run_cgroup(limits, name="gaussino-run1", threads=16)
+
+    assert group == parent / "gaussino-run1"
+    assert (parent / "cgroup.subtree_control").read_text() == "+memory"
+    assert (group / "memory.max").read_text() == str(1 << 30)
+    assert (group / "memory.swap.max").read_text() == "0"
+    assert (group / "cpu.max").read_text() == "1600000 100000"
+
+    (group / "memory.events").write_text("low 0\nhigh 0\nmax 12\noom 1\noom_kill 1\n")
+    events = cgroup_events(group)
+    assert events["oom_kill"] == 1
+    assert classify_limit_exit(-signal.SIGKILL, limits=limits, events=events) == "oom"
+
+    remove_cgroup(group)
+    assert not group.exists()
+
+
+def _cgroup_dir(path: Path, *, procs: str = "", controllers: str = "cpu memory") -> Path:
+    path.mkdir(parents=True)
+    (path / "cgroup.procs").write_text(procs)
+    (path / "cgroup.controllers").write_text(controllers)
+    (path / "cgroup.subtree_control").write_text("")
+    return path
+
+
+def test_cgroup_parent_must_be_delegated_and_empty(tmp_path: Path) -> None:
+    check_cgroup_parent(RunLimits(cpu_time=10))
+    with pytest.raises(ValueError, match="need simulate.limits.cgroup"):
+        check_cgroup_parent(RunLimits(memory=1 << 30))
+
+    ok = _cgroup_dir(tmp_path / "ok")
+    check_cgroup_parent(RunLimits(memory=1 << 30, cpus=2, cgroup=str(ok)))
+    busy = _cgroup_dir(tmp_path / "busy", procs="123\n")
+    with pytest.raises(ValueError, match="processes of its own"):
+        check_cgroup_parent(RunLimits(memory=1 << 30, cgroup=str(busy)))
+    # Nothing is moved out of a busy group.
+    assert (busy / "cgroup.procs").read_text() == "123\n"
+    assert [p.name for p in busy.iterdir() if p.is_dir()] == []
+    no_memory = _cgroup_dir(tmp_path / "no-memory", controllers="cpu")
+    with pytest.raises(ValueError, match="not delegated"):
+        check_cgroup_parent(RunLimits(memory=1 << 30, cgroup=str(no_memory)))
+    with pytest.raises(ValueError, match="not a cgroup v2 group"):
+        check_cgroup_parent(RunLimits(cpus=1, cgroup=str(tmp_path / "missing")))
+
+
+def test_run_cgroup_falls_back_to_rlimits_only(tmp_path: Path) -> None:
+    # No cgroup.subtree_control: not a (delegated) cgroup v2 directory.
+    limits = RunLimits(memory=1 << 30, cgroup=str(tmp_path))
+    assert create_run_cgroup(limits, name="gaussino-run1", threads=1) is None
+    assert not (tmp_path / "gaussino-run1").exists()
+
+
+def test_run_one_records_cpu_limit_status(tmp_path: Path) -> None:
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    sim_file = tmp_path / "sim.py"
+    sim_file.write_text("# sim")
+    executable = tmp_path / "run-gaussino"
+    executable.write_text(f"#!/bin/sh\nexec {sys.executable} -c '{BURN}'\n")
+    executable.chmod(0o755)
+
+    outcome = simulate._run_one(  # type: ignore[attr-defined]
+        executable=executable,
+        options_files=[],
+        simulation_file=sim_file,
+        run_dir=run_dir,
+        param_dict={"FOO": "bar"},
+        options=RunOptions(limits=RunLimits(cpu_time=1)),
+    )
+
+    assert outcome.success is False
+    assert outcome.details["status"] == "cpu_limit"
+    log = (run_dir / outcome.log_path).read_text()  # type: ignore[operator]
+    assert f"{LIMIT_EXEC} --cpu 1" in log
+    assert "# Hit resource limit: cpu_limit" in log
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import json
+import os
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from analysis.extract import extract_run
+from analysis.extractors import (
+    b4layeredcalorimeter_physics_extractor,
+    performance_extractor,
+)
+from analysis.fakegaussino import write_launcher
+from analysis.logio import (
+    LogPump,
+    extract_log,
+    iter_log_lines,
+    open_log_writer,
+    read_log,
+    read_log_tail,
+)
+from analysis.simulate import RunOptions, SimulateConfig, run_simulations
+
+LOG = (
+    "# Command: gaudirun.py sim.py\n"
+    "Edep: 1.5 MeV track length: 2 mm sensitive detector: B4Calorimeter_Layer_GapSDet "
+    "layer number: 3 eventID: 0\n"
+    "Measured event loop time [ns]: 2e9\n"
+    "Time per event [s]: 0.5\n"
+    "Throughput [1/s]: 2\n"
+)
+
+
+def test_gzip_log_appends_and_streams_to_extractors(tmp_path: Path) -> None:
+    path = tmp_path / "sim.log.gz"
+    with open_log_writer(path) as f:
+        f.write(LOG.encode())
+    with open_log_writer(path, append=True) as f:
+        f.write(b"\n# Execution time: 1.00 seconds\n")
+
+    assert path.read_bytes()[:2] == b"\x1f\x8b"
+    assert read_log(path) == LOG + "\n# Execution time: 1.00 seconds\n"
+    assert list(iter_log_lines(path))[-1] == "# Execution time: 1.00 seconds"
+    assert extract_log(path, performance_extractor) == performance_extractor(LOG)
+    assert extract_log(path, b4layeredcalorimeter_physics_extractor) == b4layeredcalorimeter_physics_extractor(LOG)
+    assert read_log_tail(path, 20).endswith("# Execution time: 1.00 seconds\n")
+
+
+def test_truncated_gzip_log_yields_what_was_flushed(tmp_path: Path) -> None:
+    path = tmp_path / "killed.log.gz"
+    with open_log_writer(path) as f:
+        f.write(LOG.encode())
+        f.flush()
+        # The run is killed before the gzip trailer is written.
+        truncated = path.read_bytes()
+    path.write_bytes(truncated)
+
+    assert extract_log(path, performance_extractor) == performance_extractor(LOG)
+
+
+def test_zstd_log_round_trip(tmp_path: Path) -> None:
+    pytest.importorskip("zstandard")
+    path = tmp_path / "sim.log.zst"
+    with open_log_writer(path) as f:
+        f.write(LOG.encode())
+    with open_log_writer(path, append=True) as f:
+        f.write(b"# trailer\n")
+    assert read_log(path) == LOG + "# trailer\n"
+
+
+def test_compressed_sweep_extracts_like_plain_logs(tmp_path: Path) -> None:
+    sim = tmp_path / "benchmarks" / "b4_layered_calorimeter" / "geant4_simulation.py"
+    sim.parent.mkdir(parents=True)
+    sim.write_text("# sim")
+    cfg = SimulateConfig(
+        benchmark="b4_layered_calorimeter",
+        executable=write_launcher(tmp_path / "fake-gaussino"),
+        options_files=[],
+        simulation_files=[sim],
+        run_dir=tmp_path / "plain",
+        parameters={"NUMBER_OF_EVENTS": [2], "RUN_NUMBER": [7]},
+        run_options=RunOptions(env_cache_dir=tmp_path / "env-cache"),
+    )
+    gz_cfg = replace(
+        cfg,
+        run_dir=tmp_path / "gzip",
+        run_options=replace(cfg.run_options, log_compression="gzip", stream_extract=("performance",)),
+    )
+
+    tables = {}
+    for c in (cfg, gz_cfg):
+        run = json.loads(run_simulations(cfg=c).read_text())["runs"][0]
+        tables[c.run_dir.name] = [
+            list(csv.DictReader(path.open()))
+            for path in (
+                extract_run(
+                    benchmark=c.benchmark, run_dir=c.run_dir, out_dir=c.run_dir / "derived", extract_type=kind
+                )
+                for kind in ("performance", "physics")
+            )
+        ]
+        if c is gz_cfg:
+            assert run["output_path"].endswith(".log.gz")
+            with gzip.open(c.run_dir / run["output_path"], "rt") as f:
+                assert "# Execution time:" in f.read()
+            assert run["streamed_results"]["performance"]
+
+    plain, compressed = tables["plain"], tables["gzip"]
+    # Timings differ between the two sweeps; the physics records must not.
+    assert compressed[0][0].keys() == plain[0][0].keys()
+    assert len(compressed[1]) == len(plain[1]) > 0
+    for rows in (plain[1], compressed[1]):
+        for row in rows:
+            row.pop("log_file")
+            row.pop("execution_time")
+    assert compressed[1] == plain[1]
+
+
+def test_pump_flushes_plain_logs_while_the_child_runs(tmp_path: Path) -> None:
+    path = tmp_path / "sim.log"
+    read_fd, write_fd = os.pipe()
+    with open_log_writer(path) as sink, os.fdopen(write_fd, "wb") as child:
+        pump = LogPump(os.fdopen(read_fd, "rb"), sink, {}, flush_interval=0.0).start()
+        child.write(b"Event 1\n")
+        child.flush()
+        deadline = time.monotonic() + 5
+        while path.stat().st_size == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # Visible to the stall watchdog before the child closes its output.
+        assert path.read_bytes() == b"Event 1\n"
+    assert pump.join() == {}
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import csv
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from analysis import noise
+from analysis.extract import extract_run
+from analysis.fakegaussino import write_launcher
+from analysis.noise import NoiseProbe, node_scores, parse_noise_probe
+from analysis.report import generate_performance_report
+from analysis.simulate import RunOptions, SimulateConfig, run_simulations
+
+
+def test_parse_noise_probe() -> None:
+    assert parse_noise_probe(None) == NoiseProbe()
+    assert parse_noise_probe(False) is None
+    assert parse_noise_probe({"every": 10, "threshold": 0.1}) == NoiseProbe(every=10, threshold=0.1)
+    with pytest.raises(ValueError, match="every"):
+        parse_noise_probe({"every": 0})
+    with pytest.raises(ValueError, match="threshold"):
+        parse_noise_probe({"threshold": 5})
+    with pytest.raises(TypeError):
+        parse_noise_probe(20)
+
+
+def test_node_scores_average_the_probes_around_a_run() -> None:
+    probes = [
+        {"time": 100.0, "cpu_score": 1000.0, "memory_score": 8000.0},
+        {"time": 200.0, "cpu_score": 800.0, "memory_score": 6000.0},
+        {"time": 300.0, "cpu_score": 900.0, "memory_score": 7000.0},
+    ]
+    assert node_scores(probes, {"started_at": 150.0, "execution_time": 10.0}) == {
+        "node_cpu_score": 900.0,
+        "node_memory_score": 7000.0,
+    }
+    # After the last probe (e.g. an interrupted sweep) only the one before counts.
+    assert node_scores(probes, {"started_at": 310.0, "execution_time": 1.0})["node_cpu_score"] == 900.0
+    # Older than every probe, or no start time: no scores.
+    assert node_scores(probes, {"started_at": 50.0}) == {}
+    assert node_scores(probes, {"execution_time": 1.0}) == {}
+
+
+def test_sweep_probes_between_runs_and_extract_attributes_scores(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(noise, "CPU_ROUND_BYTES", 1 << 20)
+    monkeypatch.setattr(noise, "MEMORY_BYTES", 1 << 20)
+    sim = tmp_path / "benchmarks" / "b4_layered_calorimeter" / "geant4_simulation.py"
+    sim.parent.mkdir(parents=True)
+    sim.write_text("# sim")
+
+    cfg = SimulateConfig(
+        benchmark="b4_layered_calorimeter",
+        executable=write_launcher(tmp_path / "fake-gaussino"),
+        options_files=[],
+        simulation_files=[sim],
+        run_dir=tmp_path / "run",
+        parameters={"NUMBER_OF_EVENTS": [1, 2, 3]},
+        run_options=RunOptions(env_cache_dir=tmp_path / "env-cache"),
+        noise_probe=NoiseProbe(every=2, rounds=1),
+    )
+    metadata = json.loads(run_simulations(cfg=cfg).read_text())
+    assert [p["label"] for p in metadata["noise_probes"]] == ["before", "between", "after"]
+    assert all(p["cpu_score"] > 0 and p["memory_score"] > 0 for p in metadata["noise_probes"])
+
+    csv_path = extract_run(
+        benchmark="b4_layered_calorimeter",
+        run_dir=cfg.run_dir,
+        out_dir=tmp_path / "derived",
+        extract_type="performance",
+    )
+    rows = list(csv.DictReader(csv_path.open()))
+    assert len(rows) == 3
+    assert all(float(row["node_cpu_score"]) > 0 for row in rows)
+
+
+def test_report_flags_and_normalizes_degraded_runs(tmp_path: Path) -> None:
+    perf_csv = tmp_path / "performance-results.csv"
+    pd.DataFrame(
+        {
+            "log_file": ["a.log", "b.log", "c.log"],
+            "with_adept": [True, True, True],
+            "time_per_event": [1.0, 1.0, 1.25],
+            "throughput": [100.0, 100.0, 80.0],
+            "node_cpu_score": [1000.0, 990.0, 800.0],
+            "node_memory_score": [5000.0, 5000.0, 4000.0],
+        }
+    ).to_csv(perf_csv, index=False)
+
+    flagged = generate_performance_report(performance_csv=perf_csv, out_dir=tmp_path / "flag")
+    metrics = json.loads(flagged.metrics_path.read_text())
+    assert metrics["node_degraded_runs"] == 1
+    assert metrics["node_speed_min"] == pytest.approx(0.8)
+    assert metrics["time_per_event_with_adept_mean"] == pytest.approx(3.25 / 3)
+    noise_rows = list(csv.DictReader((tmp_path / "flag" / "node-noise.csv").open()))
+    assert [row["node_degraded"] for row in noise_rows] == ["False", "False", "True"]
+
+    normalized = generate_performance_report(
+        performance_csv=perf_csv, out_dir=tmp_path / "normalize", node_noise="normalize"
+    )
+    metrics = json.loads(normalized.metrics_path.read_text())
+    assert metrics["node_normalized"] is True
+    # The slow node's 1.25 s/event is worth 1.0 s/event on the best node.
+    assert metrics["time_per_event_with_adept_mean"] == pytest.approx((1.0 + 0.99**0.5 + 1.0) / 3)
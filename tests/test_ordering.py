@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from analysis.ordering import fit_duration_model, load_history, order_jobs
+
+
+def _entry(sim: str, ppe: int, duration: float) -> dict:
+    return {
+        "simulation_file": f"/old/checkout/{sim}",
+        "parameters": {"PARTICLES_PER_EVENT": ppe, "NUMBER_OF_EVENTS": 10},
+        "execution_time": duration,
+        "success": True,
+    }
+
+
+def test_duration_model_uses_history_then_linear_fallback(tmp_path: Path) -> None:
+    old_run = tmp_path / "bench-aaaa"
+    old_run.mkdir()
+    runs = [_entry("adept_simulation.py", 1, 5.0), _entry("adept_simulation.py", 10, 50.0)]
+    (old_run / "simulation_metadata.json").write_text(json.dumps({"runs": runs}))
+
+    model = fit_duration_model(load_history(tmp_path))
+
+    # Exact combination seen before, even from another checkout path.
+    assert model.predict("/repo/adept_simulation.py", runs[0]["parameters"]) == pytest.approx(5.0)
+    # Unseen combination: 0.5 s per (particle x event) fitted from history.
+    unseen = {"PARTICLES_PER_EVENT": 100, "NUMBER_OF_EVENTS": 10}
+    assert model.predict("/repo/adept_simulation.py", unseen) == pytest.approx(500.0)
+
+
+@pytest.mark.parametrize(
+    "policy, expected",
+    [
+        ("grid", [3, 1, 4, 2]),
+        ("longest-first", [4, 3, 2, 1]),
+        ("shortest-first", [1, 2, 3, 4]),
+        ("interleaved", [4, 1, 3, 2]),
+    ],
+)
+def test_order_jobs_policies(policy: str, expected: list[int]) -> None:
+    assert order_jobs([3, 1, 4, 2], policy=policy, duration=float) == expected
+
+
+def test_order_jobs_rejects_unknown_policy() -> None:
+    with pytest.raises(ValueError, match="order policy"):
+        order_jobs([1], policy="random", duration=float)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from analysis.fakegaussino import write_launcher
+from analysis.pagecache import dataset_dirs, warm_page_cache
+from analysis.simulate import RunOptions, SimulateConfig, run_simulations
+
+
+def _dataset(root: Path, name: str, sizes: list[int]) -> Path:
+    directory = root / name
+    (directory / "sub").mkdir(parents=True)
+    for i, size in enumerate(sizes):
+        (directory / ("sub" if i % 2 else "") / f"f{i}.dat").write_bytes(b"x" * size)
+    return directory
+
+
+def test_dataset_dirs_picks_existing_g4_data_variables(tmp_path: Path) -> None:
+    emlow = _dataset(tmp_path, "G4EMLOW8.5", [1])
+    env = {
+        "G4LEDATA": str(emlow),
+        "G4PARTICLEXSDATA": str(tmp_path / "missing"),
+        "G4ENSDFSTATEDATA": str(emlow),
+        "G4INSTALL": str(tmp_path),
+        "PATH": "/usr/bin",
+    }
+    assert dataset_dirs(env) == [emlow]
+
+
+def test_warm_page_cache_reads_every_file(tmp_path: Path) -> None:
+    dirs = [_dataset(tmp_path, "a", [10, 2_500_000]), _dataset(tmp_path, "b", [0, 7, 3])]
+    result = warm_page_cache(dirs, threads=3)
+
+    assert result.warmed
+    assert (result.files, result.bytes, result.errors) == (5, 2_500_020, 0)
+    assert result.directories == [str(d) for d in dirs]
+    assert not warm_page_cache([]).warmed
+
+
+def test_sweep_records_page_cache_warming(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    data = _dataset(tmp_path, "G4PARTICLEXS4.0", [100, 200])
+    monkeypatch.setenv("G4PARTICLEXSDATA", str(data))
+    sim = tmp_path / "benchmarks" / "b4_layered_calorimeter" / "geant4_simulation.py"
+    sim.parent.mkdir(parents=True)
+    sim.write_text("# sim")
+
+    cfg = SimulateConfig(
+        benchmark="b4_layered_calorimeter",
+        executable=write_launcher(tmp_path / "fake-gaussino"),
+        options_files=[],
+        simulation_files=[sim],
+        run_dir=tmp_path / "run",
+        parameters={"NUMBER_OF_EVENTS": [1]},
+        run_options=RunOptions(env_cache_dir=tmp_path / "env-cache"),
+        warm_cache=2,
+    )
+    page_cache = json.loads(run_simulations(cfg=cfg).read_text())["page_cache"]
+    assert page_cache["warmed"] is True
+    assert page_cache["bytes"] == 300
+    assert page_cache["directories"] == [str(data)]
+
+    # Nothing runs when every job is resumed, so nothing is warmed.
+    resumed = json.loads(run_simulations(cfg=cfg).read_text())["page_cache"]
+    assert resumed["warmed"] is False
+
+    cfg = replace(cfg, warm_cache=None, rerun="all")
+    assert json.loads(run_simulations(cfg=cfg).read_text())["page_cache"] == {
+        "warmed": False,
+        "directories": [],
+        "files": 0,
+        "bytes": 0,
+        "seconds": 0.0,
+        "errors": 0,
+    }
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+from dataclasses import replace
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from analysis import noise
+from analysis.fakegaussino import write_launcher
+from analysis.noise import NoiseProbe
+from analysis.pairing import (
+    PairOrder,
+    order_pairs,
+    pair_units,
+    paired_ratio_table,
+    parse_pair_order,
+    with_seed,
+)
+from analysis.repeats import parse_repeat_policy
+from analysis.simulate import RunOptions, Scheduling, SimulateConfig, run_simulations
+
+
+def _items(combos: list[int], repeats: int) -> list[tuple[str, int, int]]:
+    # Grid order with repeats: every repeat of AdePT, then every repeat of Geant4.
+    return [(sim, combo, r) for combo in combos for sim in ("adept", "geant4") for r in range(repeats)]
+
+
+def _order(items: list[tuple[str, int, int]], order: PairOrder) -> list[tuple[tuple[str, int, int], int | None]]:
+    return order_pairs(
+        items,
+        order=order,
+        combination=lambda item: {"PARTICLES_PER_EVENT": item[1]},
+        repeat=lambda item: item[2],
+        is_adept=lambda item: item[0] == "adept",
+    )
+
+
+def test_parse_pair_order() -> None:
+    assert parse_pair_order(None) == PairOrder()
+    assert parse_pair_order("abba") == PairOrder(mode="abba")
+    assert parse_pair_order({"mode": "random", "seed": 7}, mode="abba") == PairOrder(mode="abba", seed=7)
+    with pytest.raises(ValueError, match="mode"):
+        parse_pair_order({"mode": "shuffled"})
+    assert with_seed(PairOrder(mode="random")).seed is not None
+    assert with_seed(PairOrder()).seed is None
+
+
+def test_pairs_run_back_to_back_in_abba_blocks() -> None:
+    items = _items([1, 10], repeats=4)
+    ordered = _order(items, PairOrder(mode="abba", seed=3))
+    assert sorted(item for item, _ in ordered) == sorted(items)
+
+    for i in range(0, len(ordered), 2):
+        (first, pos0), (second, pos1) = ordered[i], ordered[i + 1]
+        assert (pos0, pos1) == (0, 1)
+        assert first[1:] == second[1:]
+        assert {first[0], second[0]} == {"adept", "geant4"}
+    for combo in (1, 10):
+        leaders = [item[0] for item, pos in ordered if item[1] == combo and pos == 0]
+        assert leaders[0] != leaders[1] and leaders[0] == leaders[2] and leaders[1] == leaders[3]
+
+    assert _order(items, PairOrder(mode="abba", seed=3)) == ordered
+    assert _order(items, PairOrder()) == [(item, None) for item in items]
+
+
+def test_random_order_is_seeded_per_pair() -> None:
+    items = _items(list(range(20)), repeats=1)
+    ordered = _order(items, PairOrder(mode="random", seed=11))
+    leaders = [item[0] for item, pos in ordered if pos == 0]
+    assert set(leaders) == {"adept", "geant4"}
+    assert _order(items, PairOrder(mode="random", seed=11)) == ordered
+    assert _order(items, PairOrder(mode="random", seed=12)) != ordered
+
+
+def test_pair_units_keep_pairs_together() -> None:
+    ordered = [("a", 0), ("b", 1), ("c", None), ("d", 1), ("e", 0), ("f", 1)]
+    units = pair_units(ordered, position=lambda item: item[1])
+    assert [[name for name, _ in unit] for unit in units] == [["a", "b"], ["c"], ["d"], ["e", "f"]]
+
+
+def test_paired_ratios_cancel_linear_drift() -> None:
+    rows = []
+    ordered = _order(_items([1, 10, 100], repeats=4), PairOrder(mode="abba", seed=5))
+    for t, ((sim, combo, r), pos) in enumerate(ordered):
+        base = 0.01 * combo * (0.5 if sim == "adept" else 1.0)
+        rows.append(
+            {
+                "with_adept": sim == "adept",
+                "PARTICLES_PER_EVENT": combo,
+                "repeat": r,
+                "pair_position": pos,
+                # The node slows down by 1% per run.
+                "time_per_event": base * (1 + 0.01 * t),
+                # Upper-case, but not a parameter: must not split the pairs.
+                "HOST": f"node{t}",
+            }
+        )
+    table, summary = paired_ratio_table(pd.DataFrame(rows), parameters=["PARTICLES_PER_EVENT"])
+
+    assert list(table["pairs"]) == [4, 4, 4]
+    assert table["ratio"].tolist() == pytest.approx([0.5] * 3, rel=1e-3)
+    assert summary["drift_corrected"] is True
+    assert summary["drift_per_pair"] == pytest.approx(0.01, rel=0.2)
+    assert summary["geomean_ratio"] == pytest.approx(0.5, rel=1e-3)
+
+
+def test_sweep_records_pair_order_and_positions(tmp_path: Path) -> None:
+    bench = tmp_path / "benchmarks" / "b4_layered_calorimeter"
+    bench.mkdir(parents=True)
+    sims = [bench / "adept_simulation.py", bench / "geant4_simulation.py"]
+    for sim in sims:
+        sim.write_text("# sim")
+
+    cfg = SimulateConfig(
+        benchmark="b4_layered_calorimeter",
+        executable=write_launcher(tmp_path / "fake-gaussino"),
+        options_files=[],
+        simulation_files=sims,
+        run_dir=tmp_path / "run",
+        parameters={"NUMBER_OF_EVENTS": [1]},
+        run_options=RunOptions(env_cache_dir=tmp_path / "env-cache"),
+        repeats=parse_repeat_policy(2),
+        pair_order=PairOrder(mode="abba"),
+    )
+    metadata = json.loads(run_simulations(cfg=cfg).read_text())
+    assert metadata["pair_order"]["mode"] == "abba"
+    assert isinstance(metadata["pair_order"]["seed"], int)
+
+    by_start = sorted(metadata["runs"], key=lambda run: run["started_at"])
+    assert [run["pair_position"] for run in by_start] == [0, 1, 0, 1]
+    assert by_start[0]["with_adept"] != by_start[2]["with_adept"]
+
+    with pytest.raises(ValueError, match="pair order"):
+        run_simulations(cfg=replace(cfg, simulation_files=sims[:1]))
+
+
+def test_pairs_never_overlap_or_straddle_a_probe(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(noise, "CPU_ROUND_BYTES", 1 << 20)
+    monkeypatch.setattr(noise, "MEMORY_BYTES", 1 << 20)
+    bench = tmp_path / "benchmarks" / "b4_layered_calorimeter"
+    bench.mkdir(parents=True)
+    sims = [bench / "adept_simulation.py", bench / "geant4_simulation.py"]
+    for sim in sims:
+        sim.write_text("# sim")
+
+    cfg = SimulateConfig(
+        benchmark="b4_layered_calorimeter",
+        executable=write_launcher(tmp_path / "fake-gaussino"),
+        options_files=[],
+        simulation_files=sims,
+        run_dir=tmp_path / "run",
+        parameters={"NUMBER_OF_EVENTS": [1, 2]},
+        run_options=RunOptions(env_cache_dir=tmp_path / "env-cache"),
+        pair_order=PairOrder(mode="random"),
+        scheduling=Scheduling(parallel=True, core_budget=4),
+        noise_probe=NoiseProbe(every=1, rounds=1),
+    )
+    metadata = json.loads(run_simulations(cfg=cfg).read_text())
+
+    runs = sorted(metadata["runs"], key=lambda run: run["started_at"])
+    for first, second in (runs[:2], runs[2:]):
+        assert (first["pair_position"], second["pair_position"]) == (0, 1)
+        assert first["parameters"] == second["parameters"]
+        assert second["started_at"] >= first["started_at"] + first["execution_time"] - 0.01
+    probes = [p["time"] for p in metadata["noise_probes"] if p["label"] == "between"]
+    assert len(probes) == 1
+    assert runs[1]["started_at"] < probes[0] < runs[2]["started_at"]
+
+    with pytest.raises(ValueError, match="queue workers"):
+        run_simulations(cfg=replace(cfg, scheduling=replace(cfg.scheduling, workers=1), noise_probe=None))
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from analysis import simulate
+from analysis.fakegaussino import write_launcher
+from analysis.preflight import (
+    PREFLIGHT_DIR,
+    PreflightCheck,
+    PreflightError,
+    parse_preflight,
+    smoke_parameters,
+    smoke_run_problems,
+)
+from analysis.resultcache import ResultCache
+from analysis.simulate import RunOutcome, SimulateConfig, run_simulations
+
+GRID = {
+    "PARTICLES_PER_EVENT": [100, 1000],
+    "NUMBER_OF_THREADS": [16],
+    "PARTICLE_TYPE": ["electron", "gamma"],
+    "NUMBER_OF_EVENTS": [5000],
+}
+
+
+def test_parse_preflight() -> None:
+    assert parse_preflight(None) == PreflightCheck()
+    assert parse_preflight(False) is None
+    assert parse_preflight({"events": 5, "expect_root": False}) == PreflightCheck(events=5, expect_root=False)
+    with pytest.raises(ValueError, match="events"):
+        parse_preflight({"events": 0})
+    with pytest.raises(TypeError):
+        parse_preflight("yes")
+
+
+def test_smoke_parameters_are_tiny() -> None:
+    assert smoke_parameters(GRID, PreflightCheck(events=2)) == {
+        "PARTICLES_PER_EVENT": 1,
+        "NUMBER_OF_THREADS": 1,
+        "PARTICLE_TYPE": "electron",
+        "NUMBER_OF_EVENTS": 2,
+    }
+
+
+def test_smoke_run_problems(tmp_path: Path) -> None:
+    log = tmp_path / "run.log"
+    log.write_text("Throughput [1/s]: 10\n")
+    problems = smoke_run_problems(
+        success=False, log_path=log, root_files=[], check=PreflightCheck(expect_root=True)
+    )
+    assert len(problems) == 3
+    assert len(smoke_run_problems(success=False, log_path=log, root_files=[], check=PreflightCheck())) == 2
+    assert "event_loop_time, time_per_event" in problems[1]
+
+    log.write_text(
+        "Measured event loop time [ns]: 1e9\nTime per event [s]: 0.5\nThroughput [1/s]: 2\n"
+    )
+    assert smoke_run_problems(success=True, log_path=log, root_files=[Path("a.root")], check=PreflightCheck()) == []
+    assert smoke_run_problems(success=True, log_path=None, root_files=[], check=PreflightCheck()) == [
+        "could not be started"
+    ]
+
+
+def _config(tmp_path: Path, **kwargs) -> SimulateConfig:  # type: ignore[no-untyped-def]
+    sim_dir = tmp_path / "benchmarks" / "b2_chamber_tracker"
+    sim_dir.mkdir(parents=True, exist_ok=True)
+    sims = []
+    for name in ("adept_simulation", "geant4_simulation"):
+        (sim_dir / f"{name}.py").write_text("# sim")
+        sims.append(sim_dir / f"{name}.py")
+    defaults = {
+        "benchmark": "b2_chamber_tracker",
+        "executable": write_launcher(tmp_path / "fake-gaussino"),
+        "options_files": [],
+        "simulation_files": sims,
+        "run_dir": tmp_path / "run",
+        "parameters": {"PARTICLES_PER_EVENT": [10], "NUMBER_OF_EVENTS": [3]},
+        "preflight": PreflightCheck(),
+    }
+    return SimulateConfig(**{**defaults, **kwargs})
+
+
+def test_preflight_passes_then_sweep_runs(tmp_path: Path) -> None:
+    cfg = _config(tmp_path)
+    metadata = json.loads(run_simulations(cfg=cfg).read_text())
+
+    assert len(metadata["runs"]) == 2
+    smoke_logs = sorted(p.name for p in (cfg.run_dir / PREFLIGHT_DIR).glob("*.log"))
+    assert smoke_logs == [
+        "adept_simulation_PARTICLES_PER_EVENT=1_NUMBER_OF_EVENTS=2.log",
+        "geant4_simulation_PARTICLES_PER_EVENT=1_NUMBER_OF_EVENTS=2.log",
+    ]
+
+
+def test_missing_options_file_aborts_before_running(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[dict] = []
+    monkeypatch.setattr(simulate, "_run_one", lambda **kwargs: calls.append(kwargs))
+    cfg = _config(tmp_path, options_files=[tmp_path / "benchmarks" / "options.py"])
+
+    with pytest.raises(PreflightError, match="missing input file: .*options.py"):
+        run_simulations(cfg=cfg)
+    assert calls == []
+
+
+def test_missing_options_file_aborts_with_the_result_cache(tmp_path: Path) -> None:
+    cfg = _config(
+        tmp_path,
+        options_files=[tmp_path / "benchmarks" / "options.py"],
+        result_cache=ResultCache(tmp_path / "cache", stack={}),
+    )
+    # Fingerprinting cannot hash the missing file; the preflight still reports it.
+    with pytest.raises(PreflightError, match="missing input file: .*options.py"):
+        run_simulations(cfg=cfg)
+
+
+def test_failing_smoke_run_aborts_the_sweep(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    run_dir = tmp_path / "run"
+
+    def fake_run_one(*, simulation_file: Path, run_dir: Path, **kwargs):  # type: ignore[no-untyped-def]
+        log = run_dir / f"{simulation_file.stem}.log"
+        log.write_text("Application Manager Terminated successfully\n")
+        return RunOutcome(True, log.relative_to(run_dir), [Path("x.root")], 0.1)
+
+    monkeypatch.setattr(simulate, "_run_one", fake_run_one)
+    with pytest.raises(PreflightError) as err:
+        run_simulations(cfg=_config(tmp_path, run_dir=run_dir))
+    assert "adept_simulation.py: log lacks the performance lines" in str(err.value)
+    assert not (run_dir / "adept_simulation.log").exists()
+
+
+def test_preflight_is_skipped_when_every_run_is_resumed(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cfg = _config(tmp_path)
+    run_simulations(cfg=cfg)
+    (cfg.run_dir / PREFLIGHT_DIR).rename(tmp_path / "first-preflight")
+
+    calls: list[dict] = []
+    monkeypatch.setattr(simulate, "_run_one", lambda **kwargs: calls.append(kwargs))
+    metadata = json.loads(run_simulations(cfg=cfg).read_text())
+    assert len(metadata["runs"]) == 2
+    assert calls == []
+    assert not (cfg.run_dir / PREFLIGHT_DIR).exists()
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from analysis.profiler import (
+    ProfileOptions,
+    StackSampler,
+    collect_profiles,
+    fold_perf_script,
+    parse_debugger_stacks,
+    parse_profile_options,
+    read_folded,
+    write_folded,
+)
+
+PERF_SCRIPT = """\
+python3 1234/1235 [003] 100.000001:   10101010 cycles:u:
+\t    7f0000001000 G4SteppingManager::Stepping+0x20 (/lib/libG4tracking.so)
+\t    7f0000002000 G4TrackingManager::ProcessOneTrack+0x1c0 (/lib/libG4tracking.so)
+\t    5600000000aa main+0x10 (/usr/bin/python3)
+
+python3 1234/1236 [001] 100.000002:   10101010 cycles:u:
+\t    7f0000002000 G4TrackingManager::ProcessOneTrack+0x1c0 (/lib/libG4tracking.so)
+\t    5600000000aa main+0x10 (/usr/bin/python3)
+
+python3 1234/1235 [003] 100.000003:   10101010 cycles:u:
+\t    7f0000001000 G4SteppingManager::Stepping+0x24 (/lib/libG4tracking.so)
+\t    7f0000002000 G4TrackingManager::ProcessOneTrack+0x1c0 (/lib/libG4tracking.so)
+\t    5600000000aa main+0x10 (/usr/bin/python3)
+"""
+
+GDB_BT = """\
+[New LWP 1236]
+Thread 2 (Thread 0x7f12 (LWP 1236) "G4WT0"):
+#0  0x00007f01 in __futex_abstimed_wait_common () from /lib/libc.so.6
+#1  0x00007f02 in G4MTRunManager::WaitForEndEventLoopWorkers() () from /lib/libG4run.so
+Thread 1 (Thread 0x7f11 (LWP 1235) "python3"):
+#0  G4SteppingManager::Stepping (this=0x1) at G4SteppingManager.cc:150
+#1  0x00007f03 in main ()
+"""
+
+EU_STACK = """\
+PID 1235 - process
+TID 1235:
+#0  0x00007f0000001000 G4SteppingManager::Stepping
+#1  0x00005600000000aa main
+"""
+
+
+def test_fold_perf_script_merges_identical_stacks() -> None:
+    stacks = fold_perf_script(PERF_SCRIPT)
+    assert stacks == {
+        "python3;main;G4TrackingManager::ProcessOneTrack;G4SteppingManager::Stepping": 2,
+        "python3;main;G4TrackingManager::ProcessOneTrack": 1,
+    }
+
+
+def test_parse_debugger_stacks_gdb_and_eu_stack() -> None:
+    assert parse_debugger_stacks(GDB_BT) == [
+        ["__futex_abstimed_wait_common", "G4MTRunManager::WaitForEndEventLoopWorkers()"],
+        ["G4SteppingManager::Stepping", "main"],
+    ]
+    assert parse_debugger_stacks(EU_STACK) == [["G4SteppingManager::Stepping", "main"]]
+
+
+def test_stack_sampler_falls_back_to_thread_states() -> None:
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+    try:
+        time.sleep(0.2)
+        # A debugger that yields nothing forces the /proc fallback.
+        sampler = StackSampler(proc.pid, interval=0.05, debugger=lambda pid: ["true"])
+        sampler.sample_once()
+    finally:
+        proc.kill()
+        proc.wait()
+
+    (stack,) = sampler.stacks
+    comm, _thread, state = stack.split(";")
+    assert comm.startswith("python")
+    assert state.startswith("S")
+
+
+def test_folded_round_trip_and_collect(tmp_path: Path) -> None:
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    write_folded(run_dir / "adept.folded", {"a;b": 3, "a": 1})
+    assert read_folded(run_dir / "adept.folded") == {"a;b": 3, "a": 1}
+
+    metadata = {
+        "runs": [
+            {
+                "simulation_file": "/x/adept_simulation.py",
+                "parameters": {"P": 1},
+                "profile": {"tool": "perf", "folded": "adept.folded"},
+            },
+            {"simulation_file": "/x/geant4_simulation.py", "parameters": {"P": 1}},
+        ]
+    }
+    (run_dir / "simulation_metadata.json").write_text(json.dumps(metadata))
+
+    index_path = collect_profiles(run_dir=run_dir, out_dir=tmp_path / "derived")
+    assert index_path is not None
+    (item,) = json.loads(index_path.read_text())
+    assert item["simulation"] == "adept_simulation"
+    assert (index_path.parent / item["folded"]).exists()
+
+
+def test_profile_options_select_combinations() -> None:
+    options = parse_profile_options({"tool": "auto", "only": {"PARTICLES_PER_EVENT": 1000}})
+    assert options.selects({"PARTICLES_PER_EVENT": "1000", "X": 1})
+    assert not options.selects({"PARTICLES_PER_EVENT": 10})
+    assert parse_profile_options(None, tool="perf") == ProfileOptions(tool="perf")
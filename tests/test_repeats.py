@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from analysis.repeats import (
+    RepeatPolicy,
+    needs_more,
+    parse_repeat_policy,
+    relative_ci_halfwidth,
+)
+
+
+def test_parse_repeat_policy_forms() -> None:
+    assert parse_repeat_policy(None) == RepeatPolicy()
+    assert not parse_repeat_policy(None).enabled
+
+    fixed = parse_repeat_policy(3)
+    assert (fixed.mode, fixed.min_repeats, fixed.max_repeats) == ("fixed", 3, 3)
+    assert fixed.enabled
+
+    adaptive = parse_repeat_policy({"mode": "adaptive", "min": 2, "max": 6, "target_rel_ci": 0.1})
+    assert (adaptive.min_repeats, adaptive.max_repeats, adaptive.target_rel_ci) == (2, 6, 0.1)
+
+    with pytest.raises(TypeError, match="simulate.repeats"):
+        parse_repeat_policy("3")
+    with pytest.raises(ValueError, match="min <= max"):
+        parse_repeat_policy({"mode": "adaptive", "min": 5, "max": 2})
+
+
+def test_relative_ci_halfwidth() -> None:
+    assert relative_ci_halfwidth([1.0], confidence=0.95) == math.inf
+    # mean 100, stdev 1, n=4 -> t(0.975, 3) * 0.5 / 100
+    values = [99.0, 101.0, 99.0, 101.0]
+    stdev = 2 / math.sqrt(3)
+    assert relative_ci_halfwidth(values, confidence=0.95) == pytest.approx(3.182446 * stdev / 2 / 100, rel=1e-5)
+
+
+def test_needs_more_respects_min_max_and_target() -> None:
+    policy = parse_repeat_policy({"mode": "adaptive", "min": 2, "max": 4, "target_rel_ci": 0.05})
+    assert needs_more([100.0], runs=1, policy=policy)
+    assert not needs_more([100.0, 100.5], runs=2, policy=policy)
+    assert needs_more([50.0, 150.0], runs=2, policy=policy)
+    assert not needs_more([50.0, 150.0, 60.0, 140.0], runs=4, policy=policy)
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import json
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from analysis import simulate
+from analysis.fakegaussino import write_launcher
+from analysis.jobqueue import QUEUE_NAME, JobQueue
+from analysis.limits import RunLimits
+from analysis.profiler import ProfileOptions
+from analysis.resultcache import ENTRY_NAME, ResultCache
+from analysis.simulate import (
+    RunOptions,
+    RunOutcome,
+    SimJob,
+    SimulateConfig,
+    result_fingerprint,
+    run_simulations,
+)
+from analysis.worker import run_worker
+
+
+def _inputs(tmp_path: Path) -> tuple[Path, Path, Path]:
+    executable = write_launcher(tmp_path / "fake-gaussino")
+    options = tmp_path / "options.py"
+    options.write_text("# options")
+    sim = tmp_path / "benchmarks" / "b4_layered_calorimeter" / "geant4_simulation.py"
+    sim.parent.mkdir(parents=True)
+    sim.write_text("# sim")
+    return executable, options, sim
+
+
+def test_fingerprint_covers_inputs_parameters_and_stack(tmp_path: Path) -> None:
+    executable, options, sim = _inputs(tmp_path)
+
+    def fingerprint(cache: ResultCache, **parameters: object) -> str:
+        return cache.fingerprint(
+            benchmark="b4",
+            executable=executable,
+            options_files=[options],
+            simulation_file=sim,
+            parameters=parameters or {"NUMBER_OF_EVENTS": 10},
+        )
+
+    cache = ResultCache(tmp_path / "cache", stack={"Gaussino": {"commit": "abc"}})
+    base = fingerprint(cache)
+    assert fingerprint(cache) == base
+    assert fingerprint(cache, NUMBER_OF_EVENTS=20) != base
+    assert fingerprint(cache, NUMBER_OF_EVENTS=10, RUN_NUMBER=7) != base
+
+    dirty = ResultCache(tmp_path / "cache", stack={"Gaussino": {"commit": "abc", "changes": "f00"}})
+    assert fingerprint(dirty) != base
+
+    options.write_text("# options, edited")
+    assert fingerprint(ResultCache(tmp_path / "cache", stack=cache.stack)) != base
+
+
+def test_fingerprint_is_shared_between_checkouts(tmp_path: Path) -> None:
+    fingerprints = []
+    for checkout in ("a", "b"):
+        (tmp_path / checkout).mkdir()
+        executable, options, sim = _inputs(tmp_path / checkout)
+        fingerprints.append(
+            ResultCache(tmp_path / "cache", stack={}).fingerprint(
+                benchmark="b4",
+                executable=executable,
+                options_files=[options],
+                simulation_file=sim,
+                parameters={"NUMBER_OF_EVENTS": 10},
+            )
+        )
+    assert fingerprints[0] == fingerprints[1]
+
+
+def test_store_and_restore_link_the_outputs(tmp_path: Path) -> None:
+    source, target = tmp_path / "run-a", tmp_path / "run-b"
+    source.mkdir()
+    target.mkdir()
+    (source / "sim.log").write_text("log")
+    (source / "sim.root").write_bytes(b"root")
+    entry = {"output_path": "sim.log", "root_files": ["sim.root"], "success": True, "execution_time": 1.5}
+
+    cache = ResultCache(tmp_path / "cache", stack={})
+    fp = "ab" + "0" * 62
+    assert cache.restore(fp, target) is None
+    cache.store(fp, entry, source)
+
+    restored = cache.restore(fp, target)
+    assert restored is not None
+    assert restored["execution_time"] == 1.5
+    assert restored["result_cache"] == {"fingerprint": fp, "source": str(source)}
+    assert (target / "sim.log").read_text() == "log"
+    assert (target / "sim.root").stat().st_ino == (source / "sim.root").stat().st_ino
+
+    # An entry whose files are gone is a miss.
+    (tmp_path / "cache" / "ab" / fp / "sim.root").unlink()
+    assert cache.restore(fp, tmp_path) is None
+    assert json.loads((tmp_path / "cache" / "ab" / fp / ENTRY_NAME).read_text())["success"] is True
+
+
+def test_new_run_id_only_runs_new_combinations(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    executable, options, sim = _inputs(tmp_path)
+    launched: list[dict] = []
+    run_one = simulate._run_one
+
+    def counting_run_one(**kwargs):  # type: ignore[no-untyped-def]
+        launched.append(kwargs["param_dict"])
+        return run_one(**kwargs)
+
+    monkeypatch.setattr(simulate, "_run_one", counting_run_one)
+    cfg = SimulateConfig(
+        benchmark="b4_layered_calorimeter",
+        executable=executable,
+        options_files=[options],
+        simulation_files=[sim],
+        run_dir=tmp_path / "run-1",
+        parameters={"NUMBER_OF_EVENTS": [1, 2]},
+        run_options=RunOptions(env_cache_dir=tmp_path / "env-cache"),
+        result_cache=ResultCache(tmp_path / "cache", stack={}),
+    )
+    run_simulations(cfg=cfg)
+    assert len(launched) == 2
+
+    launched.clear()
+    cfg = replace(cfg, run_dir=tmp_path / "run-2", parameters={"NUMBER_OF_EVENTS": [1, 2, 3]})
+    runs = json.loads(run_simulations(cfg=cfg).read_text())["runs"]
+    assert launched == [{"NUMBER_OF_EVENTS": 3}]
+    restored = [r for r in runs if "result_cache" in r]
+    assert [r["parameters"] for r in restored] == [{"NUMBER_OF_EVENTS": 1}, {"NUMBER_OF_EVENTS": 2}]
+    for run in runs:
+        assert (cfg.run_dir / run["output_path"]).stat().st_size > 0
+        assert all((cfg.run_dir / f).is_file() for f in run["root_files"])
+
+    # --force runs everything again.
+    launched.clear()
+    run_simulations(cfg=replace(cfg, run_dir=tmp_path / "run-3", rerun="all"))
+    assert len(launched) == 3
+
+
+def test_measurement_options_are_part_of_the_fingerprint(tmp_path: Path) -> None:
+    executable, options, sim = _inputs(tmp_path)
+    cache = ResultCache(tmp_path / "cache", stack={})
+    job = SimJob(index=0, simulation_file=sim, parameters={"PARTICLES_PER_EVENT": 10})
+
+    def fingerprint(run_options: RunOptions) -> str:
+        return result_fingerprint(
+            cache, job, benchmark="b4", executable=executable, options_files=[options], options=run_options
+        )
+
+    base = fingerprint(RunOptions())
+    assert fingerprint(RunOptions(scratch_root=tmp_path / "scratch")) == base
+    assert fingerprint(RunOptions(sample_interval=1.0)) != base
+    assert fingerprint(RunOptions(wrapper=("perf", "stat"))) != base
+    assert fingerprint(RunOptions(limits=RunLimits(memory=1 << 30))) != base
+    assert fingerprint(RunOptions(profile=ProfileOptions(tool="perf"))) != base
+    # A profile that does not select this job does not change what it records.
+    unselected = ProfileOptions(tool="perf", only={"PARTICLES_PER_EVENT": [1000]})
+    assert fingerprint(RunOptions(profile=unselected)) == base
+
+
+def test_queue_workers_store_their_runs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    executable, options, sim = _inputs(tmp_path)
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+
+    def fake_run_one(*, run_dir: Path, **kwargs):  # type: ignore[no-untyped-def]
+        (run_dir / "sim.log").write_text("log")
+        return RunOutcome(True, Path("sim.log"), [], 0.1)
+
+    monkeypatch.setattr(simulate, "_run_one", fake_run_one)
+    cache = ResultCache(tmp_path / "cache", stack={"Gaussino": {"commit": "abc"}})
+    queue = JobQueue(run_dir / QUEUE_NAME)
+    queue.set_setting(
+        "config",
+        {
+            "benchmark": "b4",
+            "executable": str(executable),
+            "options_files": [str(options)],
+            "run_options": RunOptions().to_dict(),
+            "result_cache": cache.to_dict(),
+        },
+    )
+    job = SimJob(index=0, simulation_file=sim, parameters={"NUMBER_OF_EVENTS": 1})
+    queue.enqueue([("0", 1, job.to_dict())])
+
+    assert run_worker(run_dir, poll_interval=0.01) == 1
+    fp = result_fingerprint(
+        cache, job, benchmark="b4", executable=executable, options_files=[options], options=RunOptions()
+    )
+    restored = cache.restore(fp, tmp_path / "other")
+    assert restored is not None and restored["result_cache"]["source"] == str(run_dir)
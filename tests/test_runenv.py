@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from analysis import runenv
+from analysis.runenv import (
+    environment_diff,
+    load_or_capture,
+    parse_env0,
+    resolve_launch_env,
+    stack_fingerprint,
+)
+
+
+def _fake_stack(tmp_path: Path) -> Path:
+    """A `run` wrapper that sets up a stack variable and PATH, then execs its arguments."""
+    stack = tmp_path / "stack" / "Gaussino"
+    bindir = stack / "bin"
+    bindir.mkdir(parents=True)
+    gaudirun = bindir / "gaudirun.py"
+    gaudirun.write_text('#!/bin/sh\necho "STACK=$GAUSSINO_STACK FOO=$FOO args=$*"\n')
+    gaudirun.chmod(0o755)
+
+    run = stack / "run"
+    run.write_text(
+        "#!/bin/sh\n"
+        f'echo x >> "{tmp_path}/captures"\n'
+        "shift\n"
+        "export GAUSSINO_STACK=v1\n"
+        f'export PATH="{bindir}:$PATH"\n'
+        'exec env "$@"\n'
+    )
+    run.chmod(0o755)
+    return run
+
+
+def test_parse_env0_handles_values_with_equals_and_newlines() -> None:
+    assert parse_env0(b"A=1\0B=x=y\0C=line1\nline2\0") == {"A": "1", "B": "x=y", "C": "line1\nline2"}
+
+
+def test_fingerprint_changes_with_stack_and_environment(tmp_path: Path) -> None:
+    run = _fake_stack(tmp_path)
+    base = stack_fingerprint(run, environ={"HOME": "/h"})
+    assert stack_fingerprint(run, environ={"HOME": "/h", "PWD": "/elsewhere"}) == base
+    assert stack_fingerprint(run, environ={"HOME": "/h", "GITHUB_TOKEN": "t", "TERM": "xterm"}) == base
+    assert stack_fingerprint(run, environ={"HOME": "/other"}) != base
+    assert stack_fingerprint(run, environ={"HOME": "/h", "LCG_VERSION": "105"}) != base
+
+    (run.parent / "InstallArea").mkdir()
+    assert stack_fingerprint(run, environ={"HOME": "/h"}) != base
+
+
+def test_load_or_capture_caches_environment(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    run = _fake_stack(tmp_path)
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("API_TOKEN", "s3cret")
+
+    env, path = load_or_capture(run, cache_dir=cache_dir)
+    assert env["GAUSSINO_STACK"] == "v1"
+    assert env["API_TOKEN"] == "s3cret"
+    assert path.parent == cache_dir and path.exists()
+    # Only what `run env` changed is persisted, privately.
+    assert "s3cret" not in path.read_text()
+    assert path.stat().st_mode & 0o777 == 0o600
+
+    again, _ = load_or_capture(run, cache_dir=cache_dir)
+    assert again == env
+    assert (tmp_path / "captures").read_text().count("x") == 1
+
+
+def test_verify_falls_back_to_run_env_on_mismatch(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    run = _fake_stack(tmp_path)
+    cache_dir = tmp_path / "cache"
+
+    verified = resolve_launch_env(run, mode="verify", cache_dir=cache_dir)
+    env = verified.env
+    assert env is not None and env["GAUSSINO_STACK"] == "v1"
+    assert verified.to_metadata() == {
+        "mode": "verify",
+        "launch": "verify",
+        "verification": {"matches": True, "differing": []},
+    }
+
+    monkeypatch.setattr(runenv, "capture_environment", lambda executable: {**env, "GAUSSINO_STACK": "v2"})
+    mismatch = resolve_launch_env(run, mode="verify", cache_dir=cache_dir)
+    assert mismatch.env is None
+    assert mismatch.to_metadata() == {
+        "mode": "verify",
+        "launch": "run-env",
+        "verification": {"matches": False, "differing": ["GAUSSINO_STACK"]},
+    }
+    assert environment_diff(env, {**env, "PWD": "/x"}) == []
+
+    assert resolve_launch_env(run, mode="cached", cache_dir=cache_dir).launch == "cached"
+    assert resolve_launch_env(run, mode="run-env", cache_dir=cache_dir).env is None
+    with pytest.raises(ValueError):
+        resolve_launch_env(run, mode="direct", cache_dir=cache_dir)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from analysis.sampler import (
+    ProcessTreeSampler,
+    process_tree,
+    read_ctxt_switches,
+    read_proc_stat,
+)
+
+
+def _fake_proc(root: Path, pid: int, ppid: int, *, comm: str = "gaudi run", utime: int = 100, rss_pages: int = 10) -> None:
+    d = root / str(pid)
+    (d / "task" / str(pid)).mkdir(parents=True)
+    # Fields after "(comm)": state ppid pgrp session tty tpgid flags minflt cminflt majflt cmajflt utime stime ...
+    rest = ["S", str(ppid)] + ["0"] * 9 + [str(utime), "50"] + ["0"] * 4 + ["4"] + ["0"] * 3 + [str(rss_pages)]
+    (d / "stat").write_text(f"{pid} ({comm}) {' '.join(rest)}\n")
+    (d / "task" / str(pid) / "status").write_text(
+        "Name:\tx\nvoluntary_ctxt_switches:\t7\nnonvoluntary_ctxt_switches:\t3\n"
+    )
+
+
+def test_read_proc_stat_handles_spaces_in_command_name(tmp_path: Path) -> None:
+    _fake_proc(tmp_path, 10, 1, comm="weird ) name")
+    sample = read_proc_stat(10, proc=tmp_path)
+    assert sample is not None
+    assert sample.ppid == 1
+    assert sample.num_threads == 4
+    assert sample.cpu_system > 0
+    assert read_proc_stat(99, proc=tmp_path) is None
+
+
+def test_process_tree_and_sampler_aggregate_descendants(tmp_path: Path) -> None:
+    _fake_proc(tmp_path, 10, 1)
+    _fake_proc(tmp_path, 11, 10)
+    _fake_proc(tmp_path, 12, 11)
+    _fake_proc(tmp_path, 20, 1)  # unrelated process
+
+    assert sorted(p.pid for p in process_tree(10, proc=tmp_path)) == [10, 11, 12]
+    assert read_ctxt_switches(11, proc=tmp_path) == (7, 3)
+
+    sampler = ProcessTreeSampler(10, interval=1.0, proc=tmp_path)
+    sample = sampler.sample_once()
+    assert sample is not None
+    assert sample.num_processes == 3
+    assert sample.voluntary_ctxt_switches == 21
+
+    summary = sampler.summary(wall_time=1.0)
+    assert summary["samples"] == 1
+    assert summary["peak_rss_bytes"] == sample.rss_bytes
+    assert summary["core_utilization"] == summary["cpu_user_seconds"] + summary["cpu_system_seconds"]
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from analysis.scaling import (
+    ScalingStudy,
+    extract_scaling,
+    find_knee,
+    parse_scaling_study,
+    scaling_parameter_sets,
+    scaling_table,
+)
+
+GRID = {"PARTICLES_PER_EVENT": [10], "NUMBER_OF_THREADS": [16], "NUMBER_OF_EVENTS": [100]}
+PARAMETERS = list(GRID)
+
+
+def test_parse_scaling_study_sorts_ladder() -> None:
+    assert parse_scaling_study({"kind": "weak", "threads": [4, 1, 2, 2]}) == ScalingStudy("weak", (1, 2, 4))
+    with pytest.raises(ValueError, match="kind"):
+        parse_scaling_study({"kind": "sideways", "threads": [1]})
+    with pytest.raises(ValueError, match="threads"):
+        parse_scaling_study({"threads": [0, 2]})
+
+
+def test_strong_scaling_keeps_events_and_weak_scales_them() -> None:
+    strong = scaling_parameter_sets(GRID, ScalingStudy("strong", (1, 2, 4)))
+    assert [(p["NUMBER_OF_THREADS"], p["NUMBER_OF_EVENTS"]) for p in strong] == [(1, 100), (2, 100), (4, 100)]
+
+    weak = scaling_parameter_sets(GRID, ScalingStudy("weak", (2, 4, 8)))
+    assert [(p["NUMBER_OF_THREADS"], p["NUMBER_OF_EVENTS"]) for p in weak] == [(2, 100), (4, 200), (8, 400)]
+
+
+def test_find_knee_stops_where_marginal_gain_collapses() -> None:
+    # Perfect up to 8 threads, then 8 -> 16 adds only 1.0 of an ideal 8.0.
+    assert find_knee([1, 2, 4, 8, 16], [1.0, 2.0, 4.0, 7.5, 8.5]) == 8
+    assert find_knee([1, 2, 4], [1.0, 1.9, 3.7]) == 4
+    assert find_knee([], []) is None
+
+
+def _performance_df() -> pd.DataFrame:
+    rows = []
+    for with_adept, throughputs in ((True, [10, 19, 30, 32]), (False, [5, 10, 20, 40])):
+        for threads, throughput in zip((1, 2, 4, 8), throughputs):
+            for repeat_offset in (-0.5, 0.5):
+                rows.append(
+                    {
+                        "with_adept": with_adept,
+                        "PARTICLES_PER_EVENT": 10,
+                        "NUMBER_OF_THREADS": threads,
+                        "NUMBER_OF_EVENTS": 100,
+                        "throughput": throughput + repeat_offset,
+                    }
+                )
+    return pd.DataFrame(rows)
+
+
+def test_scaling_table_per_simulation() -> None:
+    table, knees = scaling_table(_performance_df(), parameters=PARAMETERS)
+
+    adept = table[table["with_adept"] == True].set_index("NUMBER_OF_THREADS")
+    assert adept.loc[2, "speedup"] == pytest.approx(1.9)
+    assert adept.loc[4, "efficiency"] == pytest.approx(0.75)
+
+    by_adept = {k["with_adept"]: k for k in knees}
+    assert by_adept[True]["knee_threads"] == 4
+    assert by_adept[False]["knee_threads"] == 8
+    assert by_adept[False]["efficiency_at_knee"] == pytest.approx(1.0)
+
+
+def test_strong_scaling_keeps_event_counts_apart() -> None:
+    small = _performance_df()
+    large = small.assign(NUMBER_OF_EVENTS=1000, throughput=small["throughput"] * 2)
+    df = pd.concat([small, large], ignore_index=True)
+
+    table, knees = scaling_table(df, parameters=PARAMETERS, kind="strong")
+    assert len(knees) == 4
+    assert sorted({k["NUMBER_OF_EVENTS"] for k in knees}) == [100, 1000]
+    adept = table[(table["with_adept"] == True) & (table["NUMBER_OF_EVENTS"] == 1000)]
+    assert adept.set_index("NUMBER_OF_THREADS").loc[2, "speedup"] == pytest.approx(1.9)
+
+    _, weak_knees = scaling_table(df, parameters=PARAMETERS, kind="weak")
+    assert len(weak_knees) == 2
+
+
+def test_scaling_groups_only_by_parameters() -> None:
+    df = _performance_df()
+    # Upper-case, but a measurement that differs per run: must not split the ladder.
+    df["HOST"] = [f"node{i}" for i in range(len(df))]
+    # A lower-case parameter: must keep its values apart.
+    df["seed_mode"] = "fixed"
+    other = df.assign(seed_mode="random", throughput=df["throughput"] * 3)
+    df = pd.concat([df, other], ignore_index=True)
+
+    _, knees = scaling_table(df, parameters=[*PARAMETERS, "seed_mode"])
+    assert len(knees) == 4
+    assert "HOST" not in knees[0]
+    assert {k["seed_mode"] for k in knees} == {"fixed", "random"}
+
+
+def test_extract_scaling_only_for_scaling_runs(tmp_path: Path) -> None:
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    csv = tmp_path / "performance-results.csv"
+    _performance_df().to_csv(csv, index=False)
+
+    (run_dir / "simulation_metadata.json").write_text(json.dumps({"runs": []}))
+    assert extract_scaling(run_dir=run_dir, performance_csv=csv, out_dir=tmp_path, parameters=PARAMETERS) is None
+
+    study = {"kind": "strong", "threads": [1, 2, 4, 8]}
+    (run_dir / "simulation_metadata.json").write_text(json.dumps({"runs": [], "scaling": study}))
+    out = extract_scaling(run_dir=run_dir, performance_csv=csv, out_dir=tmp_path, parameters=PARAMETERS)
+    assert out is not None and len(pd.read_csv(out)) == 8
+    summary = json.loads((tmp_path / "scaling-summary.json").read_text())
+    assert summary["study"] == study and len(summary["knees"]) == 2
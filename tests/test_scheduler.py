@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from analysis import scheduler
+from analysis.scheduler import cgroup_cpu_quota, run_with_core_budget
+
+
+def test_run_with_core_budget_never_exceeds_budget() -> None:
+    """Concurrently running jobs should never use more cores than the budget."""
+    lock = threading.Lock()
+    in_use = 0
+    peak = 0
+
+    def run(cores: int) -> int:
+        nonlocal in_use, peak
+        with lock:
+            in_use += cores
+            peak = max(peak, in_use)
+        time.sleep(0.02)
+        with lock:
+            in_use -= cores
+        return cores
+
+    done: list[int] = []
+    run_with_core_budget(
+        [4, 2, 2, 3, 1, 4],
+        cost=lambda c: c,
+        budget=6,
+        run=run,
+        on_done=lambda item, result: done.append(result),
+    )
+
+    assert sorted(done) == [1, 2, 2, 3, 4, 4]
+    assert peak <= 6
+    # Some jobs must have overlapped, otherwise the budget was not used.
+    assert peak > 4
+
+
+def test_run_with_core_budget_clamps_oversized_jobs() -> None:
+    done: list[int] = []
+    run_with_core_budget(
+        [16, 1],
+        cost=lambda c: c,
+        budget=4,
+        run=lambda c: c,
+        on_done=lambda item, result: done.append(result),
+    )
+    assert sorted(done) == [1, 16]
+
+
+def test_run_with_core_budget_sequential_keeps_order() -> None:
+    done: list[str] = []
+    run_with_core_budget(
+        ["a", "b", "c"],
+        cost=lambda _: 1,
+        budget=None,
+        run=str.upper,
+        on_done=lambda item, result: done.append(result),
+    )
+    assert done == ["A", "B", "C"]
+
+
+def test_cgroup_cpu_quota_takes_tightest_limit(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    leaf = tmp_path / "a" / "b"
+    leaf.mkdir(parents=True)
+    (tmp_path / "a" / "cpu.max").write_text("200000 100000\n")
+    (leaf / "cpu.max").write_text("max 100000\n")
+
+    monkeypatch.setattr(scheduler, "own_cgroup_dir", lambda root: leaf)
+
+    assert cgroup_cpu_quota(tmp_path) == pytest.approx(2.0)
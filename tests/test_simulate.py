@@ -1,12 +1,24 @@
 from __future__ import annotations
 
 import json
+import os
+import subprocess
+import time
+from dataclasses import replace
 from pathlib import Path
 
 import pytest
 
-import analysis.simulate as simulate
-from analysis.simulate import SimulateConfig
+from analysis import simulate
+from analysis.affinity import CpuInfo, PinningPolicy
+from analysis.calibration import EventCalibration
+from analysis.crossover import parse_crossover_search
+from analysis.profiler import ProfileOptions, read_folded
+from analysis.repeats import RepeatPolicy
+from analysis.runenv import LaunchEnv
+from analysis.scaling import ScalingStudy
+from analysis.simulate import RunOptions, RunOutcome, Scheduling, SimulateConfig
+from analysis.watchdog import WatchdogLimits
 
 
 def test_run_simulations_writes_metadata_and_calls_runner(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
@@ -28,7 +40,7 @@ def test_run_simulations_writes_metadata_and_calls_runner(tmp_path: Path, monkey
 
     calls: list[dict] = []
 
-    def fake_run_one(*, executable: Path, options_files, simulation_file: Path, run_dir: Path, param_dict):  # type: ignore[explicit-any]
+    def fake_run_one(*, executable: Path, options_files, simulation_file: Path, run_dir: Path, param_dict, **kwargs):  # type: ignore[explicit-any]
         # Record the high-level behavior we care about (what simulations and params were requested).
         calls.append(
             {
@@ -40,7 +52,7 @@ def test_run_simulations_writes_metadata_and_calls_runner(tmp_path: Path, monkey
             }
         )
         # Simulate a successful run; details are not important for run_simulations.
-        return True, Path("logs/run.log"), [Path("out.root")], 1.0
+        return RunOutcome(True, Path("logs/run.log"), [Path("out.root")], 1.0)
 
     monkeypatch.setattr(simulate, "_run_one", fake_run_one)
 
@@ -68,11 +80,26 @@ def test_run_simulations_writes_metadata_and_calls_runner(tmp_path: Path, monkey
     assert with_adept_values == {True, False}
 
 
+def _fake_gaussino(tmp_path: Path, body: str = "") -> Path:
+    """A stand-in for stack/Gaussino/run: echoes its env and writes a ROOT file in cwd."""
+    executable = tmp_path / "gaussino"
+    executable.write_text(
+        "#!/bin/sh\n"
+        'echo "FOO=$FOO"\n'
+        'echo "args: $*"\n'
+        f"{body}\n"
+        "echo root-data > result.root\n"
+    )
+    executable.chmod(0o755)
+    return executable
+
+
 def test_run_one_writes_log_and_moves_root_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
     """_run_one should write a log, expose execution time, and move new .root files.
 
-    We mock subprocess.run and create a .root file in the working directory to verify
-    that it is relocated into the run directory with a derived name.
+    A small shell script stands in for Gaussino and creates a .root file in its
+    working directory, so we can verify that it is relocated into the run
+    directory with a derived name.
     """
     workdir = tmp_path / "work"
     workdir.mkdir()
@@ -80,31 +107,15 @@ def test_run_one_writes_log_and_moves_root_files(tmp_path: Path, monkeypatch: py
     run_dir.mkdir()
 
     monkeypatch.chdir(workdir)
+    # A ROOT file that was already in the cwd must not be picked up.
+    (workdir / "unrelated.root").write_text("other")
 
     sim_file = tmp_path / "mysim.py"
     sim_file.write_text("# sim")
 
-    executable = tmp_path / "gaussino"
-    executable.write_text("#!/bin/sh\n")
-
-    seen: dict = {}
+    executable = _fake_gaussino(tmp_path)
 
-    def fake_run(cmd, env, stdout, stderr, text):  # type: ignore[explicit-any]
-        # Record the command and environment passed to subprocess.run
-        seen["cmd"] = list(cmd)
-        seen["env"] = dict(env)
-        # Produce a new .root file in the current working directory
-        root_path = workdir / "result.root"
-        root_path.write_text("root-data")
-
-        class Dummy:
-            returncode = 0
-
-        return Dummy()
-
-    monkeypatch.setattr(simulate.subprocess, "run", fake_run)
-
-    success, log_rel, root_files, elapsed = simulate._run_one(  # type: ignore[attr-defined]
+    outcome = simulate._run_one(  # type: ignore[attr-defined]
         executable=executable,
         options_files=[tmp_path / "opts.py"],
         simulation_file=sim_file,
@@ -112,25 +123,547 @@ def test_run_one_writes_log_and_moves_root_files(tmp_path: Path, monkeypatch: py
         param_dict={"FOO": "bar"},
     )
 
-    assert success is True
-    assert isinstance(log_rel, Path)
-    assert log_rel.suffix == ".log"
-    assert elapsed >= 0.0
+    assert outcome.success is True
+    assert isinstance(outcome.log_path, Path)
+    assert outcome.log_path.suffix == ".log"
+    assert outcome.execution_time >= 0.0
 
     # Log file is written under run_dir and contains expected headers.
-    log_path = run_dir / log_rel
+    log_path = run_dir / outcome.log_path
     assert log_path.exists()
     log_text = log_path.read_text()
-    assert "# Command:" in log_text
+    assert log_text.startswith("# Command:")
     assert "# Execution time:" in log_text
 
-    # Environment should include parameter values as strings.
-    assert seen["env"]["FOO"] == "bar"
+    # Environment should include parameter values as strings, and the command
+    # goes through `run env K=V gaudirun.py ...`.
+    assert "FOO=bar" in log_text
+    assert "args: env FOO=bar gaudirun.py" in log_text
 
     # Root file produced in workdir should be moved into run_dir.
-    assert root_files
-    moved_rel = root_files[0]
-    moved_abs = run_dir / moved_rel
-    assert moved_abs.exists()
-    # After the move, there should be no .root files left in the working directory.
-    assert not list(workdir.glob("*.root"))
+    assert outcome.root_files
+    assert len(outcome.root_files) == 1
+    moved_abs = run_dir / outcome.root_files[0]
+    assert moved_abs.read_text() == "root-data\n"
+    # The simulation ran in its own scratch dir, which is cleaned up afterwards.
+    assert list(workdir.glob("*.root")) == [workdir / "unrelated.root"]
+    assert not any((run_dir / ".scratch").iterdir())
+
+
+def test_move_atomic_falls_back_to_copy_across_filesystems(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    src = tmp_path / "scratch" / "out.root"
+    src.parent.mkdir()
+    src.write_text("data")
+    dst = tmp_path / "run" / "out.root"
+    dst.parent.mkdir()
+
+    real_replace = simulate.os.replace
+
+    def replace(a, b):  # type: ignore[no-untyped-def]
+        if Path(a) == src:
+            raise OSError(18, "Invalid cross-device link")
+        return real_replace(a, b)
+
+    monkeypatch.setattr(simulate.os, "replace", replace)
+    simulate._move_atomic(src, dst)  # type: ignore[attr-defined]
+
+    assert dst.read_text() == "data"
+    assert not src.exists()
+    assert not list(dst.parent.glob(".*.partial"))
+
+
+def test_run_one_records_resource_usage(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """With sampling enabled, the run entry gets resource stats and a time series file."""
+    monkeypatch.chdir(tmp_path)
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    sim_file = tmp_path / "mysim.py"
+    sim_file.write_text("# sim")
+
+    executable = _fake_gaussino(tmp_path, body="sleep 0.3")
+
+    outcome = simulate._run_one(  # type: ignore[attr-defined]
+        executable=executable,
+        options_files=[],
+        simulation_file=sim_file,
+        run_dir=run_dir,
+        param_dict={"FOO": "bar"},
+        options=RunOptions(sample_interval=0.05),
+    )
+
+    resources = outcome.details["resources"]
+    assert resources["samples"] > 0
+    assert resources["peak_rss_bytes"] > 0
+    assert resources["cpu_user_seconds"] is not None
+    assert resources["core_utilization"] is not None
+    assert (run_dir / resources["timeseries"]).read_text().startswith("elapsed,rss_bytes")
+
+
+def test_run_simulations_parallel_keeps_job_order(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Jobs finishing out of order must still be written in expansion order."""
+    sim = tmp_path / "sim.py"
+    sim.write_text("# sim")
+
+    def fake_run_one(*, executable, options_files, simulation_file, run_dir, param_dict, **kwargs):  # type: ignore[explicit-any]
+        # Earlier jobs take longer, so they finish last.
+        time.sleep(0.01 * (4 - param_dict["A"]))
+        return RunOutcome(True, Path(f"run_{param_dict['A']}.log"), [], 1.0)
+
+    monkeypatch.setattr(simulate, "_run_one", fake_run_one)
+
+    cfg = SimulateConfig(
+        benchmark="bench",
+        executable=Path("/bin/gaussino"),
+        options_files=[],
+        simulation_files=[sim],
+        run_dir=tmp_path / "run",
+        parameters={"A": [1, 2, 3], "NUMBER_OF_THREADS": [2]},
+        scheduling=Scheduling(parallel=True, core_budget=6),
+    )
+
+    data = json.loads(simulate.run_simulations(cfg=cfg).read_text())
+    assert [entry["parameters"]["A"] for entry in data["runs"]] == [1, 2, 3]
+
+
+@pytest.mark.parametrize(
+    "rerun, expected_calls",
+    [("missing", {3}), ("failed", {2, 3}), ("all", {1, 2, 3})],
+)
+def test_run_simulations_resumes_from_existing_metadata(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, rerun: str, expected_calls: set[int]
+) -> None:
+    """Successful runs with a non-empty log are skipped; failures depend on the rerun mode."""
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    sim = tmp_path / "sim.py"
+    sim.write_text("# sim")
+
+    (run_dir / "ok.log").write_text("done")
+    (run_dir / "failed.log").write_text("boom")
+    previous = {
+        "runs": [
+            {"simulation_file": str(sim), "parameters": {"A": 1}, "output_path": "ok.log", "success": True},
+            {"simulation_file": str(sim), "parameters": {"A": 2}, "output_path": "failed.log", "success": False},
+        ]
+    }
+    (run_dir / "simulation_metadata.json").write_text(json.dumps(previous))
+
+    calls: list[int] = []
+
+    def fake_run_one(*, executable, options_files, simulation_file, run_dir, param_dict, **kwargs):  # type: ignore[explicit-any]
+        calls.append(param_dict["A"])
+        return RunOutcome(True, Path(f"new_{param_dict['A']}.log"), [], 1.0)
+
+    monkeypatch.setattr(simulate, "_run_one", fake_run_one)
+
+    cfg = SimulateConfig(
+        benchmark="bench",
+        executable=Path("/bin/gaussino"),
+        options_files=[],
+        simulation_files=[sim],
+        run_dir=run_dir,
+        parameters={"A": [1, 2, 3]},
+        rerun=rerun,
+    )
+    data = json.loads(simulate.run_simulations(cfg=cfg).read_text())
+
+    assert set(calls) == expected_calls
+    assert [entry["parameters"]["A"] for entry in data["runs"]] == [1, 2, 3]
+
+
+def test_run_one_streams_performance_metrics(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """In streaming mode the log is still written and metrics land in the outcome."""
+    monkeypatch.chdir(tmp_path)
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    sim_file = tmp_path / "adept_simulation.py"
+    sim_file.write_text("# sim")
+
+    executable = _fake_gaussino(
+        tmp_path,
+        body='echo "Time per event [s]: 0.5"\necho "Throughput [1/s]: 2"',
+    )
+
+    outcome = simulate._run_one(  # type: ignore[attr-defined]
+        executable=executable,
+        options_files=[],
+        simulation_file=sim_file,
+        run_dir=run_dir,
+        param_dict={"FOO": "bar"},
+        options=RunOptions(stream_extract=("performance",)),
+        benchmark="b4_layered_calorimeter",
+    )
+
+    assert outcome.details["streamed_results"] == {
+        "performance": {"time_per_event": 0.5, "throughput": 2.0}
+    }
+    log_text = (run_dir / outcome.log_path).read_text()
+    assert log_text.startswith("# Command:")
+    assert "Throughput [1/s]: 2" in log_text
+    assert log_text.rstrip().endswith("seconds")
+
+
+def test_run_simulations_adaptive_repeats_until_converged(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Noisy combinations get more repeats (with distinct seeds) than stable ones."""
+    sim = tmp_path / "adept_simulation.py"
+    sim.write_text("# sim")
+
+    noisy = iter([50.0, 150.0, 90.0, 110.0, 100.0])
+    seeds: dict[int, list[int]] = {1: [], 2: []}
+
+    def fake_run_one(*, executable, options_files, simulation_file, run_dir, param_dict, **kwargs):  # type: ignore[explicit-any]
+        seeds[param_dict["A"]].append(param_dict["RUN_NUMBER"])
+        throughput = 100.0 if param_dict["A"] == 1 else next(noisy)
+        details = {"streamed_results": {"performance": {"throughput": throughput}}}
+        return RunOutcome(True, Path(f"run_{param_dict['A']}_{param_dict['RUN_NUMBER']}.log"), [], 1.0, details)
+
+    monkeypatch.setattr(simulate, "_run_one", fake_run_one)
+
+    cfg = SimulateConfig(
+        benchmark="bench",
+        executable=Path("/bin/gaussino"),
+        options_files=[],
+        simulation_files=[sim],
+        run_dir=tmp_path / "run",
+        parameters={"A": [1, 2]},
+        repeats=RepeatPolicy(mode="adaptive", min_repeats=2, max_repeats=4, target_rel_ci=0.05),
+    )
+    data = json.loads(simulate.run_simulations(cfg=cfg).read_text())
+
+    assert seeds == {1: [1, 2], 2: [1, 2, 3, 4]}
+    assert [(e["parameters"]["A"], e["repeat"]) for e in data["runs"]] == [
+        (1, 0), (1, 1), (2, 0), (2, 1), (2, 2), (2, 3)
+    ]
+    summary = {s["parameters"]["A"]: s for s in data["repeats"]}
+    assert summary[1]["converged"] is True
+    assert summary[2]["runs"] == 4
+
+
+def test_run_one_records_watchdog_kill(tmp_path: Path) -> None:
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    sim_file = tmp_path / "sim.py"
+    sim_file.write_text("# sim")
+    executable = _fake_gaussino(tmp_path, body="sleep 30")
+
+    outcome = simulate._run_one(  # type: ignore[attr-defined]
+        executable=executable,
+        options_files=[],
+        simulation_file=sim_file,
+        run_dir=run_dir,
+        param_dict={"FOO": "bar"},
+        options=RunOptions(
+            watchdog=WatchdogLimits(timeout=0.5, poll_interval=0.05, kill_grace=1.0)
+        ),
+    )
+
+    assert outcome.success is False
+    assert outcome.details["status"] == "timeout"
+    assert outcome.log_path is not None
+    assert "# Killed by watchdog: timeout" in (run_dir / outcome.log_path).read_text()
+    assert outcome.execution_time < 10
+
+
+def test_run_one_kills_child_when_launch_fails(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    sim_file = tmp_path / "sim.py"
+    sim_file.write_text("# sim")
+    executable = _fake_gaussino(tmp_path, body="sleep 30")
+    started: list[subprocess.Popen] = []
+
+    class RecordingPopen(subprocess.Popen):
+        def __init__(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
+            super().__init__(*args, **kwargs)
+            started.append(self)
+
+    def broken_sampler(*args, **kwargs):  # type: ignore[no-untyped-def]
+        raise OSError("no /proc")
+
+    monkeypatch.setattr(simulate.subprocess, "Popen", RecordingPopen)
+    monkeypatch.setattr(simulate, "ProcessTreeSampler", broken_sampler)
+    outcome = simulate._run_one(  # type: ignore[attr-defined]
+        executable=executable,
+        options_files=[],
+        simulation_file=sim_file,
+        run_dir=run_dir,
+        param_dict={"FOO": "bar"},
+        options=RunOptions(sample_interval=0.1),
+    )
+
+    assert outcome.success is False
+    assert len(started) == 1 and started[0].returncode is not None
+
+
+def test_run_simulations_records_pinned_cpus(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cpu = min(os.sched_getaffinity(0))
+    seen: list[list[int]] = []
+
+    def fake_run_one(**kwargs):
+        seen.append(list(kwargs["cpus"]))
+        return RunOutcome(True, None, [], 0.1)
+
+    monkeypatch.setattr(simulate, "_run_one", fake_run_one)
+    monkeypatch.setattr(
+        simulate, "read_topology", lambda: [CpuInfo(cpu=cpu, node=0, core=(0, 0), thread=0)]
+    )
+
+    sim = tmp_path / "sim.py"
+    sim.write_text("# sim")
+    cfg = SimulateConfig(
+        benchmark="b",
+        executable=tmp_path / "exe",
+        options_files=[],
+        simulation_files=[sim],
+        run_dir=tmp_path / "run",
+        parameters={"NUMBER_OF_THREADS": [1], "NUMBER_OF_EVENTS": [1, 2]},
+        scheduling=Scheduling(parallel=True, core_budget=8, pinning=PinningPolicy(mode="numa")),
+    )
+    metadata_path = simulate.run_simulations(cfg=cfg)
+
+    assert seen == [[cpu], [cpu]]
+    runs = json.loads(metadata_path.read_text())["runs"]
+    assert [r["cpus"] for r in runs] == [str(cpu), str(cpu)]
+    assert all(r["numa_nodes"] == [0] for r in runs)
+
+
+def test_run_simulations_crossover_mode_bisects(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """AdePT throughput grows with load, Geant4 stays flat; they cross at 30 particles."""
+    probed: list[tuple[str, int]] = []
+
+    def fake_run_one(*, simulation_file, param_dict, **kwargs):
+        particles = param_dict["PARTICLES_PER_EVENT"]
+        probed.append((simulation_file.stem, particles))
+        throughput = particles / 30 if simulation_file.stem == "adept_simulation" else 1.0
+        return RunOutcome(
+            True, None, [], 0.1, details={"streamed_results": {"performance": {"throughput": throughput}}}
+        )
+
+    monkeypatch.setattr(simulate, "_run_one", fake_run_one)
+
+    sims = []
+    for name in ("adept_simulation", "geant4_simulation"):
+        sims.append(tmp_path / f"{name}.py")
+        sims[-1].write_text("# sim")
+    cfg = SimulateConfig(
+        benchmark="b",
+        executable=tmp_path / "exe",
+        options_files=[],
+        simulation_files=sims,
+        run_dir=tmp_path / "run",
+        parameters={"PARTICLES_PER_EVENT": [1, 1000], "NUMBER_OF_EVENTS": [5]},
+        crossover=parse_crossover_search({"tolerance": 2}, parameters={"PARTICLES_PER_EVENT": [1, 1000]}),
+    )
+    metadata = json.loads(simulate.run_simulations(cfg=cfg).read_text())
+
+    # Ends first, then bisection; both files run at every probe point.
+    assert probed[:4] == [
+        ("adept_simulation", 1),
+        ("geant4_simulation", 1),
+        ("adept_simulation", 1000),
+        ("geant4_simulation", 1000),
+    ]
+    assert len(metadata["runs"]) == len(probed) < 2 * 12
+    assert all(r["parameters"]["NUMBER_OF_EVENTS"] == 5 for r in metadata["runs"])
+
+    (result,) = metadata["crossover"]
+    assert result["parameters"] == {"NUMBER_OF_EVENTS": 5}
+    lo, hi = result["bracket"]
+    assert lo < 30 < hi and hi / lo <= 2
+    assert result["resolved"] is True
+
+
+def test_run_simulations_calibrates_event_counts(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[tuple[Path, dict]] = []
+
+    def fake_run_one(*, run_dir, param_dict, **kwargs):
+        calls.append((run_dir, dict(param_dict)))
+        # 10 ms of event loop per particle and event.
+        loop_ns = param_dict["PARTICLES_PER_EVENT"] * param_dict["NUMBER_OF_EVENTS"] * 1e7
+        return RunOutcome(
+            True, None, [], 1.0, details={"streamed_results": {"performance": {"event_loop_time": loop_ns}}}
+        )
+
+    monkeypatch.setattr(simulate, "_run_one", fake_run_one)
+
+    sim = tmp_path / "sim.py"
+    sim.write_text("# sim")
+    run_dir = tmp_path / "run"
+    cfg = SimulateConfig(
+        benchmark="b",
+        executable=tmp_path / "exe",
+        options_files=[],
+        simulation_files=[sim],
+        run_dir=run_dir,
+        parameters={"PARTICLES_PER_EVENT": [1, 10, 1000], "NUMBER_OF_EVENTS": [5000, 100]},
+        calibration=EventCalibration(target_seconds=10, probe_events=4, min_events=2, max_events=500),
+    )
+    runs = json.loads(simulate.run_simulations(cfg=cfg).read_text())["runs"]
+
+    probes = [params for d, params in calls if d == run_dir / "calibration"]
+    assert [p["NUMBER_OF_EVENTS"] for p in probes] == [4, 4, 4]
+    # target 10 s / (0.01 s * particles), clamped to [2, 500]; grid event counts collapse.
+    assert [r["parameters"]["NUMBER_OF_EVENTS"] for r in runs] == [500, 100, 2]
+    assert [r["parameters"]["PARTICLES_PER_EVENT"] for r in runs] == [1, 10, 1000]
+
+    # A second invocation reuses both the calibration and the finished runs.
+    calls.clear()
+    monkeypatch.setattr(simulate, "_is_complete", lambda entry, run_dir: True)
+    simulate.run_simulations(cfg=cfg)
+    assert calls == []
+
+
+def test_failed_calibration_probes_are_retried_with_rerun_failed(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: list[tuple[Path, dict]] = []
+    probe_fails = True
+
+    def fake_run_one(*, run_dir, param_dict, **kwargs):
+        calls.append((run_dir, dict(param_dict)))
+        loop_ns = param_dict["NUMBER_OF_EVENTS"] * 1e7
+        success = not (probe_fails and run_dir.name == "calibration")
+        return RunOutcome(
+            success, None, [], 1.0, details={"streamed_results": {"performance": {"event_loop_time": loop_ns}}}
+        )
+
+    monkeypatch.setattr(simulate, "_run_one", fake_run_one)
+    sim = tmp_path / "sim.py"
+    sim.write_text("# sim")
+    cfg = SimulateConfig(
+        benchmark="b",
+        executable=tmp_path / "exe",
+        options_files=[],
+        simulation_files=[sim],
+        run_dir=tmp_path / "run",
+        parameters={"NUMBER_OF_EVENTS": [50]},
+        calibration=EventCalibration(target_seconds=1, probe_events=4, min_events=2, max_events=500),
+    )
+    runs = json.loads(simulate.run_simulations(cfg=cfg).read_text())["runs"]
+    assert runs[0]["parameters"]["NUMBER_OF_EVENTS"] == 50
+
+    def probes() -> list[dict]:
+        return [params for d, params in calls if d.name == "calibration"]
+
+    # "missing" keeps the failed probe, like a failed run.
+    calls.clear()
+    probe_fails = False
+    simulate.run_simulations(cfg=cfg)
+    assert probes() == []
+
+    calls.clear()
+    runs = json.loads(simulate.run_simulations(cfg=replace(cfg, rerun="failed")).read_text())["runs"]
+    assert [p["NUMBER_OF_EVENTS"] for p in probes()] == [4]
+    assert runs[0]["parameters"]["NUMBER_OF_EVENTS"] == 100
+
+
+def test_run_one_with_cached_environment_launches_gaudirun_directly(tmp_path: Path) -> None:
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    gaudirun = bindir / "gaudirun.py"
+    gaudirun.write_text('#!/bin/sh\necho "STACK=$GAUSSINO_STACK FOO=$FOO"\n')
+    gaudirun.chmod(0o755)
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    sim_file = tmp_path / "sim.py"
+    sim_file.write_text("# sim")
+
+    env = {"PATH": f"{bindir}:/usr/bin:/bin", "GAUSSINO_STACK": "v1"}
+
+    def run_one(launch_env: LaunchEnv) -> simulate.RunOutcome:
+        return simulate._run_one(  # type: ignore[attr-defined]
+            executable=tmp_path / "does-not-exist",
+            options_files=[],
+            simulation_file=sim_file,
+            run_dir=run_dir,
+            param_dict={"FOO": "bar"},
+            launch_env=launch_env,
+        )
+
+    outcome = run_one(LaunchEnv(mode="cached", env=env))
+    assert outcome.success is True
+    assert outcome.details["launch"] == "cached"
+    assert "launch_verification" not in outcome.details
+    log_text = (run_dir / outcome.log_path).read_text()
+    assert f"# Command: {gaudirun} " in log_text
+    assert "STACK=v1 FOO=bar" in log_text
+
+    verified = run_one(LaunchEnv(mode="verify", env=env, differing=()))
+    assert verified.details["launch"] == "verify"
+    assert verified.details["launch_verification"] == {"matches": True, "differing": []}
+
+
+def test_run_one_parses_wrapper_counters(tmp_path: Path) -> None:
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    sim_file = tmp_path / "sim.py"
+    sim_file.write_text("# sim")
+    # A stand-in for GNU time: `time -o FILE -v cmd...` writes its report to FILE.
+    fake_time = tmp_path / "time"
+    fake_time.write_text(
+        "#!/bin/sh\n"
+        'out="$2"; shift 3\n'
+        '"$@"; status=$?\n'
+        'printf "\\tMaximum resident set size (kbytes): 4096\\n\\tMajor (requiring I/O) page faults: 3\\n" > "$out"\n'
+        "exit $status\n"
+    )
+    fake_time.chmod(0o755)
+
+    outcome = simulate._run_one(  # type: ignore[attr-defined]
+        executable=_fake_gaussino(tmp_path),
+        options_files=[],
+        simulation_file=sim_file,
+        run_dir=run_dir,
+        param_dict={"FOO": "bar"},
+        options=RunOptions(wrapper=(str(fake_time), "-v")),
+    )
+
+    assert outcome.success is True
+    assert outcome.details["counters"] == {"max_rss_kb": 4096.0, "max_rss_mb": 4.0, "major_page_faults": 3.0}
+    assert (run_dir / outcome.details["wrapper_output"]).exists()
+    # The wrapper report stays out of the Gaussino log.
+    assert "Maximum resident" not in (run_dir / outcome.log_path).read_text()
+
+
+def test_run_one_writes_folded_profile(tmp_path: Path) -> None:
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    sim_file = tmp_path / "sim.py"
+    sim_file.write_text("# sim")
+
+    outcome = simulate._run_one(  # type: ignore[attr-defined]
+        executable=_fake_gaussino(tmp_path, body="sleep 0.5"),
+        options_files=[],
+        simulation_file=sim_file,
+        run_dir=run_dir,
+        param_dict={"FOO": "bar"},
+        options=RunOptions(profile=ProfileOptions(tool="stack-sampler", interval=0.05)),
+    )
+
+    profile = outcome.details["profile"]
+    assert profile["tool"] == "stack-sampler"
+    assert profile["samples"] > 0
+    assert read_folded(run_dir / profile["folded"])
+
+
+def test_run_simulations_scaling_mode_runs_thread_ladder(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(simulate, "_run_one", lambda **kwargs: RunOutcome(True, None, [], 0.1))
+    sim = tmp_path / "sim.py"
+    sim.write_text("# sim")
+    cfg = SimulateConfig(
+        benchmark="b",
+        executable=tmp_path / "exe",
+        options_files=[],
+        simulation_files=[sim],
+        run_dir=tmp_path / "run",
+        parameters={"NUMBER_OF_THREADS": [16], "NUMBER_OF_EVENTS": [50]},
+        scaling=ScalingStudy(kind="weak", threads=(1, 2, 4)),
+    )
+    metadata = json.loads(simulate.run_simulations(cfg=cfg).read_text())
+
+    assert [(r["parameters"]["NUMBER_OF_THREADS"], r["parameters"]["NUMBER_OF_EVENTS"]) for r in metadata["runs"]] == [
+        (1, 50),
+        (2, 100),
+        (4, 200),
+    ]
+    assert metadata["scaling"] == {"kind": "weak", "threads": [1, 2, 4]}
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from analysis import watchdog
+from analysis.sampler import ProcSample
+from analysis.watchdog import WatchdogLimits, parse_watchdog_limits, supervise
+
+
+def _start(script: str, log_path: Path) -> subprocess.Popen:
+    log = log_path.open("wb")
+    try:
+        return subprocess.Popen(
+            [sys.executable, "-c", script],
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+    finally:
+        log.close()
+
+
+def test_supervise_returns_exit_code_without_limits(tmp_path: Path) -> None:
+    log_path = tmp_path / "run.log"
+    proc = _start("import sys; sys.exit(3)", log_path)
+
+    result = supervise(proc, limits=WatchdogLimits(), log_path=log_path)
+
+    assert result.returncode == 3
+    assert result.killed_reason is None
+    assert result.rusage is not None
+
+
+def test_supervise_kills_run_over_timeout(tmp_path: Path) -> None:
+    log_path = tmp_path / "run.log"
+    # Keeps printing, so only the wall-time limit can stop it.
+    proc = _start(
+        "import time\nwhile True:\n    print('tick', flush=True)\n    time.sleep(0.05)\n", log_path
+    )
+
+    start = time.monotonic()
+    result = supervise(
+        proc, limits=WatchdogLimits(timeout=0.5, poll_interval=0.05, kill_grace=1.0), log_path=log_path
+    )
+
+    assert result.killed_reason == "timeout"
+    assert result.returncode != 0
+    assert time.monotonic() - start < 5
+
+
+def test_supervise_kills_silent_idle_run_as_stalled(tmp_path: Path) -> None:
+    log_path = tmp_path / "run.log"
+    proc = _start("import time; time.sleep(60)", log_path)
+
+    result = supervise(
+        proc,
+        limits=WatchdogLimits(stall_timeout=0.5, poll_interval=0.05, kill_grace=1.0),
+        log_path=log_path,
+    )
+
+    assert result.killed_reason == "stalled"
+
+
+def test_supervise_keeps_run_that_writes_output(tmp_path: Path) -> None:
+    log_path = tmp_path / "run.log"
+    proc = _start(
+        "import time\nfor _ in range(20):\n    print('event', flush=True)\n    time.sleep(0.05)\n",
+        log_path,
+    )
+
+    result = supervise(
+        proc, limits=WatchdogLimits(stall_timeout=0.5, poll_interval=0.05), log_path=log_path
+    )
+
+    assert result.killed_reason is None
+    assert result.returncode == 0
+
+
+def test_parse_watchdog_limits_cli_overrides_params() -> None:
+    limits = parse_watchdog_limits({"timeout": 100, "stall_timeout": 30}, timeout=5.0)
+    assert limits.timeout == 5.0
+    assert limits.stall_timeout == 30.0
+
+    assert parse_watchdog_limits({}).enabled is False
+    with pytest.raises(ValueError, match="simulate.timeout"):
+        parse_watchdog_limits({"timeout": -1})
+
+
+def test_tree_cpu_does_not_go_backwards_when_a_child_exits(monkeypatch: pytest.MonkeyPatch) -> None:
+    parent = ProcSample(pid=10, ppid=1, rss_bytes=0, cpu_user=1.0, cpu_system=0.0, num_threads=1)
+    child = ProcSample(pid=11, ppid=10, rss_bytes=0, cpu_user=5.0, cpu_system=1.0, num_threads=1)
+    trees = iter([[parent, child], [parent]])
+    monkeypatch.setattr(watchdog, "process_tree", lambda pid: next(trees))
+
+    seen: dict[int, float] = {}
+    assert watchdog._tree_cpu_seconds(10, seen) == 7.0
+    assert watchdog._tree_cpu_seconds(10, seen) == 7.0
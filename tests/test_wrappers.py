@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from analysis.wrappers import (
+    build_wrapper,
+    parse_gnu_time,
+    parse_perf_stat_csv,
+    parse_wrapper,
+    wrapper_kind,
+)
+
+PERF_STAT_CSV = """\
+# started on Mon Jan  1 00:00:00 2024
+
+4000000000,,cycles:u,1000000,100.00,,
+6000000000,,instructions:u,1000000,100.00,1.50,insn per cycle
+2000000,,cache-references:u,1000000,100.00,,
+500000,,cache-misses:u,1000000,100.00,25.00,of all cache refs
+<not supported>,,branch-misses:u,0,100.00,,
+"""
+
+GNU_TIME_V = """\
+\tCommand being timed: "gaudirun.py sim.py"
+\tUser time (seconds): 120.50
+\tSystem time (seconds): 3.25
+\tPercent of CPU this job got: 780%
+\tElapsed (wall clock) time (h:mm:ss or m:ss): 0:15.87
+\tMaximum resident set size (kbytes): 2097152
+\tMajor (requiring I/O) page faults: 12
+\tMinor (reclaiming a frame) page faults: 345678
+\tVoluntary context switches: 1000
+\tInvoluntary context switches: 250
+\tExit status: 0
+"""
+
+
+def test_parse_perf_stat_csv_derives_ipc_and_miss_rate() -> None:
+    counters = parse_perf_stat_csv(PERF_STAT_CSV)
+    assert counters["cycles"] == 4e9
+    assert counters["ipc"] == pytest.approx(1.5)
+    assert counters["cache_miss_rate"] == pytest.approx(0.25)
+    assert counters["cache_misses_per_kinstr"] == pytest.approx(500000 / 6e6)
+    assert "branch_misses" not in counters
+
+
+def test_parse_gnu_time_reads_rss_and_page_faults() -> None:
+    counters = parse_gnu_time(GNU_TIME_V)
+    assert counters["max_rss_kb"] == 2097152
+    assert counters["max_rss_mb"] == 2048
+    assert counters["major_page_faults"] == 12
+    assert counters["minor_page_faults"] == 345678
+    assert counters["percent_cpu"] == 780
+    assert counters["user_time"] == pytest.approx(120.5)
+
+
+def test_build_wrapper_redirects_known_tools(tmp_path: Path) -> None:
+    out = tmp_path / "w.txt"
+    perf = parse_wrapper("perf stat -e cycles,instructions")
+    assert wrapper_kind(perf) == "perf-stat"
+    assert build_wrapper(perf, output_path=out) == [
+        "perf", "stat", "-x", ",", "-o", str(out), "-e", "cycles,instructions"
+    ]
+    assert build_wrapper(["/usr/bin/time", "-v"], output_path=out) == ["/usr/bin/time", "-o", str(out), "-v"]
+    assert build_wrapper(["strace", "-o", "{output}"], output_path=out) == ["strace", "-o", str(out)]
+
+    assert parse_wrapper(None) == ()
+    with pytest.raises(TypeError):
+        parse_wrapper({"cmd": "perf"})